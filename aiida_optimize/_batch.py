@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Defines the helpers for evaluating several points in one evaluation
+process, see the 'evaluation_batch_size' input of the OptimizationWorkChain.
+"""
+
+import typing as ty
+
+from aiida import orm
+from aiida.engine import calcfunction
+import numpy as np
+
+from ._utils import _ARRAY_NAME, _from_aiida_type
+from .process_inputs import load_object
+
+__all__ = ("BATCH_ARRAY_NAME", "stack_inputs", "split_batch_outputs", "is_batch_array")
+
+#: Name of the array which contains the stacked values of a batch. This
+#: is the same name as for the ArrayData vector inputs of the engines.
+BATCH_ARRAY_NAME = _ARRAY_NAME
+
+
+def stack_inputs(inputs_list: ty.List[ty.Dict[str, orm.Node]]) -> ty.Dict[str, orm.ArrayData]:
+    """
+    Stack the inputs of several evaluations into one ArrayData per input,
+    whose array has one row per evaluation.
+    """
+    res = {}
+    for key in inputs_list[0]:
+        if ":" in key:
+            raise ValueError(
+                f"Cannot stack the input '{key}', because values inside a Dict input "
+                "cannot be evaluated in batches."
+            )
+        array = orm.ArrayData()
+        array.set_array(
+            BATCH_ARRAY_NAME, np.array([_from_aiida_type(inputs[key]) for inputs in inputs_list])
+        )
+        res[key] = array
+    return res
+
+
+def _validate_batch_inputs(value, _):  # pylint: disable=inconsistent-return-statements
+    """
+    Reject batch evaluations for input keys which the engine sets inside a
+    Dict input. These values cannot be stacked into an ArrayData.
+    """
+    if "evaluation_batch_size" not in value or "engine_kwargs" not in value:
+        return
+    try:
+        engine = load_object(value["engine"])
+    except ValueError:
+        # Engines which cannot be loaded are reported when creating the engine.
+        return
+    input_keys = engine.get_input_keys(value["engine_kwargs"].get_dict())
+    nested_keys = sorted(key for key in input_keys if ":" in key)
+    if nested_keys:
+        return (
+            f"The 'evaluation_batch_size' input cannot be used with the nested keys "
+            f"{nested_keys}, because values inside a Dict input cannot be stacked."
+        )
+
+
+def is_batch_array(node: orm.Node) -> bool:
+    """
+    Returns whether the given evaluation output contains stacked values.
+    """
+    return isinstance(node, orm.ArrayData) and BATCH_ARRAY_NAME in node.get_arraynames()
+
+
+def _to_aiida_value(value: np.ndarray) -> orm.Node:
+    if value.ndim > 0:
+        return orm.List(list=value.tolist())
+    if np.issubdtype(value.dtype, np.integer):
+        return orm.Int(int(value))
+    return orm.Float(float(value))
+
+
+@calcfunction
+def split_batch_outputs(**outputs):
+    """
+    Split the stacked outputs of a batch evaluation into the outputs of
+    the individual points, in the 'point_<position>' namespaces.
+    """
+    arrays = {label: node.get_array(BATCH_ARRAY_NAME) for label, node in outputs.items()}
+    num_points = len(next(iter(arrays.values())))
+    return {
+        f"point_{pos}": {label: _to_aiida_value(array[pos]) for label, array in arrays.items()}
+        for pos in range(num_points)
+    }
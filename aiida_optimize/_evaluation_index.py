@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Defines how the OptimizationWorkChain tags and groups its evaluations,
+and how it finds finished evaluations to re-use instead of launching them.
+"""
+
+from aiida import orm
+from aiida.engine import ProcessState
+
+from ._utils import _get_evaluation_hash, _get_inputs_dict
+from .helpers import get_nested_result
+from .process_inputs import load_object
+from .wrappers._run_process_function import RunProcessFunctionWorkChain
+
+
+def _get_evaluated_inputs(node, process_name):
+    """
+    Returns the inputs with which the given process, called by an
+    OptimizationWorkChain, evaluated the process 'process_name', or None
+    if it is not an evaluation. For process functions which were submitted
+    wrapped in a :class:`.RunProcessFunctionWorkChain`, these are the
+    inputs of the process function.
+    """
+    try:
+        process_class = node.process_class
+    except (AttributeError, ValueError):
+        return None
+    if process_class is RunProcessFunctionWorkChain:
+        if node.inputs.process_function.value != process_name:
+            return None
+        return _get_inputs_dict(node).get("function_inputs", {})
+    if process_class is not load_object(process_name):
+        return None
+    return _get_inputs_dict(node)
+
+
+class _EvaluationIndexMixin:
+    """
+    Adds the 'index_evaluations' and 'use_evaluation_cache' inputs to the
+    OptimizationWorkChain, and the methods which tag the evaluations and
+    find re-usable evaluations.
+    """
+
+    _EVAL_HASH_EXTRA = "optimize_evaluation_hash"
+    _EVAL_WORKCHAIN_EXTRA = "optimize_workchain_uuid"
+    _EVAL_INDEX_EXTRA = "optimize_evaluation_index"
+    _EVAL_ITERATION_EXTRA = "optimize_iteration"
+    _EVAL_OBJECTIVE_EXTRA = "optimize_objective"
+    _EVAL_BATCH_OBJECTIVES_EXTRA = "optimize_batch_objectives"
+    _GROUP_LABEL_PREFIX = "aiida_optimize/"
+
+    @classmethod
+    def define(cls, spec):
+        """
+        Add the indexing and caching inputs to the spec.
+        """
+        super().define(spec)
+
+        spec.input(
+            "use_evaluation_cache",
+            valid_type=orm.Bool,
+            default=lambda: orm.Bool(False),
+            help="Before launching an evaluation, look for a finished evaluation of the same "
+            "process with inputs of identical content, also from previous optimizations, and "
+            "re-use it instead. Evaluations are found through the "
+            f"'{cls._EVAL_HASH_EXTRA}' extra, which is set on the evaluations launched with "
+            "'use_evaluation_cache' or 'restart_from'.",
+        )
+        spec.input(
+            "index_evaluations",
+            valid_type=orm.Bool,
+            default=lambda: orm.Bool(False),
+            help="Tag the evaluations launched by the workchain with extras containing the "
+            "UUID of the workchain ('optimize_workchain_uuid'), the evaluation index "
+            "('optimize_evaluation_index'), the iteration in which it was launched "
+            "('optimize_iteration') and, once it has finished, its scalar result "
+            "('optimize_objective'). For batch evaluations, the index extra is the list of "
+            "the indices of the points, 'optimize_batch_objectives' contains their results "
+            "and 'optimize_objective' the lowest of them. All evaluations are also added to "
+            "the group 'aiida_optimize/<workchain UUID>'. The lowest result reported by "
+            "'get_status' is read from these extras.",
+        )
+
+    def _get_index_extras(self, idx):
+        """
+        Returns the extras with which the evaluation with the given index,
+        or list of indices for batch evaluations, is tagged. This is an
+        empty dict if 'index_evaluations' is not set.
+        """
+        if not self._get_input_value("index_evaluations"):
+            return {}
+        return {
+            self._EVAL_WORKCHAIN_EXTRA: self.node.uuid,
+            self._EVAL_INDEX_EXTRA: idx,
+            self._EVAL_ITERATION_EXTRA: self.ctx.num_iterations,
+        }
+
+    def _copy_index_extras(self, wrapper, eval_proc):
+        """
+        Tag the process function of an evaluation which was submitted
+        wrapped in a workchain with the same extras as the wrapper, and add
+        it to the group of this workchain.
+        """
+        extras = wrapper.base.extras.all
+        if extras.get(self._EVAL_WORKCHAIN_EXTRA, None) != self.node.uuid:
+            return
+        index_keys = [
+            self._EVAL_WORKCHAIN_EXTRA,
+            self._EVAL_INDEX_EXTRA,
+            self._EVAL_ITERATION_EXTRA,
+        ]
+        eval_proc.base.extras.set_many({name: extras[name] for name in index_keys})
+        self._add_to_evaluation_group([eval_proc])
+
+    def _add_to_evaluation_group(self, nodes):
+        """
+        Add the given evaluation nodes to the group of this workchain.
+        """
+        if nodes and "evaluation_group" in self.ctx:
+            orm.load_group(uuid=self.ctx.evaluation_group).add_nodes(nodes)
+
+    def _set_objective_extra(self, eval_proc, outputs, position=None):
+        """
+        Tag an evaluation launched by this workchain with its result, if
+        this is a scalar number. A batch evaluation is tagged with the
+        results of its points, in the order of its index extra, and with
+        the lowest of them as objective.
+        """
+        if eval_proc.base.extras.get(self._EVAL_WORKCHAIN_EXTRA, None) != self.node.uuid:
+            return
+        result_key = self.inputs.engine_kwargs.get_dict().get("result_key", "result")
+        try:
+            result = get_nested_result(outputs, result_key)
+        except (KeyError, TypeError):
+            return
+        if not isinstance(result, (orm.Float, orm.Int)):
+            return
+        if position is None:
+            eval_proc.base.extras.set(self._EVAL_OBJECTIVE_EXTRA, result.value)
+            return
+        objectives = eval_proc.base.extras.get(self._EVAL_BATCH_OBJECTIVES_EXTRA, [])
+        objectives += [None] * (position + 1 - len(objectives))
+        objectives[position] = result.value
+        eval_proc.base.extras.set_many(
+            {
+                self._EVAL_BATCH_OBJECTIVES_EXTRA: objectives,
+                self._EVAL_OBJECTIVE_EXTRA: min(value for value in objectives if value is not None),
+            }
+        )
+
+    def _find_reusable_evaluation(self, eval_hash):
+        """
+        Returns a finished evaluation with the given hash from the restarted
+        workchains or, if 'use_evaluation_cache' is set, from the cache.
+        """
+        restart_chain = self.ctx.get("restart_chain", None)
+        if restart_chain:
+            cached_node = self._find_cached_evaluation(eval_hash, callers=restart_chain)
+            if cached_node is not None:
+                self.ctx.num_restored_evaluations += 1
+                return cached_node
+        if not self._get_input_value("use_evaluation_cache"):
+            return None
+        cached_node = self._find_cached_evaluation(eval_hash)
+        if cached_node is None:
+            self.ctx.num_cache_misses += 1
+        else:
+            self.ctx.num_cache_hits += 1
+        return cached_node
+
+    @classmethod
+    def _find_cached_evaluation(cls, eval_hash, callers=None):
+        """
+        Returns a successfully finished evaluation with the given hash, or
+        None if there is no such evaluation. If 'callers' is given, only
+        evaluations called by the workflows with these UUIDs are considered.
+        """
+        query = orm.QueryBuilder()
+        append_kwargs = {}
+        if callers is not None:
+            query.append(orm.WorkflowNode, filters={"uuid": {"in": callers}}, tag="caller")
+            append_kwargs["with_incoming"] = "caller"
+        query.append(
+            orm.ProcessNode,
+            filters={
+                f"extras.{cls._EVAL_HASH_EXTRA}": eval_hash,
+                "attributes.process_state": ProcessState.FINISHED.value,
+                "attributes.exit_status": 0,
+            },
+            project="*",
+            **append_kwargs,
+        )
+        query.limit(1)
+        return query.first(flat=True)
+
+    def _get_restart_chain(self, uuid):
+        """
+        Returns the UUIDs of the given OptimizationWorkChain and the ones
+        it was (recursively) restarted from. Their evaluations are tagged
+        with their hash if this was not done at launch. Other processes
+        they called, like the calcfunctions creating penalty outputs, are
+        not evaluations and are left untouched.
+        """
+        chain = []
+        while uuid is not None and uuid not in chain:
+            chain.append(uuid)
+            node = orm.load_node(uuid)
+            self._report(f"Restoring evaluations of OptimizationWorkChain {node.pk}.")
+            process_name = node.inputs.evaluate_process.value
+            for called in node.called:
+                if self._EVAL_HASH_EXTRA in called.base.extras.keys():
+                    continue
+                inputs = _get_evaluated_inputs(called, process_name)
+                if inputs is not None:
+                    called.base.extras.set(
+                        self._EVAL_HASH_EXTRA, _get_evaluation_hash(process_name, inputs)
+                    )
+            uuid = node.inputs.restart_from.value if "restart_from" in node.inputs else None
+        return chain
+
+    def _check_restored_evaluations(self):
+        """
+        Warn if 'restart_from' is set, but none of the evaluations of the
+        restarted workchains matched an evaluation of this workchain.
+        """
+        if "restart_from" in self.inputs and not self.ctx.get("num_restored_evaluations", 0):
+            self.logger.warning(
+                "None of the evaluations of the workchains given by 'restart_from' were "
+                "re-used. Check that the engine, the evaluate process and the 'evaluate' "
+                "inputs are the same as in the previous optimization."
+            )
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Defines how the OptimizationWorkChain handles evaluation processes which
+do not finish ok, see its 'failure_policy' inputs.
+"""
+
+from aiida import orm
+
+from ._utils import _get_outputs_dict, create_penalty_output
+
+_FAILURE_ACTIONS = ("abort", "penalty", "drop")
+
+
+def _validate_failure_policy(value, _):  # pylint: disable=inconsistent-return-statements
+    if not value:
+        return
+    action = value["action"].value if "action" in value else "abort"
+    if action not in _FAILURE_ACTIONS:
+        return f"Invalid failure action '{action}', must be one of {_FAILURE_ACTIONS}."
+    if action == "penalty" and "penalty_value" not in value:
+        return "The 'penalty_value' input is required for the 'penalty' failure action."
+    if "max_retries" in value and value["max_retries"].value < 0:
+        return "The 'max_retries' input must not be negative."
+
+
+class _FailurePolicyMixin:
+    """
+    Adds the 'failure_policy' inputs to the OptimizationWorkChain, and
+    the methods which retry failed evaluations or apply the failure action.
+    """
+
+    @classmethod
+    def define(cls, spec):
+        """
+        Add the 'failure_policy' inputs to the spec.
+        """
+        super().define(spec)
+
+        spec.input_namespace(
+            "failure_policy",
+            validator=_validate_failure_policy,
+            help="Defines how evaluation processes which do not finish ok are handled.",
+        )
+        spec.input(
+            "failure_policy.max_retries",
+            valid_type=orm.Int,
+            default=lambda: orm.Int(0),
+            help="Number of times a failed evaluation is re-launched with the same inputs. "
+            "The total number of re-launches is given in 'engine_outputs.num_evaluation_retries'.",
+        )
+        spec.input(
+            "failure_policy.retry_exit_codes",
+            valid_type=orm.List,
+            required=False,
+            help="If given, only evaluations which failed with one of these exit statuses "
+            "are retried.",
+        )
+        spec.input(
+            "failure_policy.action",
+            valid_type=orm.Str,
+            default=lambda: orm.Str("abort"),
+            help="Action for failed evaluations which are not retried: 'abort' the "
+            "optimization, pass 'penalty_value' to the engine as the result, or 'drop' the "
+            "evaluation. Dropping is only supported by engines which accept partial updates.",
+        )
+        spec.input(
+            "failure_policy.penalty_value",
+            valid_type=orm.Float,
+            required=False,
+            help="Result assigned to failed evaluations for the 'penalty' action. It is "
+            "passed to the engine under its 'result_key'.",
+        )
+
+    def _retry_failed_evaluations(self, indices, process_results):
+        """
+        Queue the failed evaluations among the given indices for
+        re-launching, if this is allowed by the failure policy. Returns the
+        indices of the evaluations which are not retried, and whether any
+        evaluation is retried.
+        """
+        finished = []
+        retried = False
+        for idx in indices:
+            finished_ok, exit_status, _ = process_results[self.ctx[self.eval_key(idx)].pk]
+            if not finished_ok and self._retry_evaluation(idx, exit_status):
+                retried = True
+            else:
+                finished.append(idx)
+        return finished, retried
+
+    def _retry_evaluation(self, idx, exit_status):
+        """
+        Queue the failed evaluation with the given index and exit status
+        for re-launching, if this is allowed by the failure policy.
+        Returns whether the evaluation is retried.
+        """
+        policy = self.inputs.get("failure_policy", {})
+        max_retries = self._get_input_value("failure_policy.max_retries")
+        num_retries = self.ctx.evaluation_retries.get(idx, 0)
+        if num_retries >= max_retries:
+            return False
+        if "retry_exit_codes" in policy and exit_status not in policy.retry_exit_codes.get_list():
+            return False
+        self.ctx.evaluation_retries[idx] = num_retries + 1
+        self.ctx.get("batch_positions", {}).pop(idx, None)
+        self.ctx.num_evaluation_retries += 1
+        self._report(
+            f"Evaluation {idx} failed with exit status {exit_status}, retrying "
+            f"({num_retries + 1}/{max_retries})."
+        )
+        with self.optimizer() as opt:
+            inputs = opt.get_inputs(idx)
+        self.indices_to_retrieve.remove(idx)
+        self.queued_evaluations.insert(0, (idx, inputs))
+        return True
+
+    def _apply_failure_action(self, idx, outputs, dropped):
+        """
+        Apply the failure action to the failed evaluation with the given
+        index, by adding the penalty to 'outputs' or the index to 'dropped'.
+        Returns the exit code if the optimization is aborted instead.
+        """
+        action = self._get_input_value("failure_policy.action")
+        if action == "penalty":
+            self.ctx.num_failed_evaluations += 1
+            self._report(f"Evaluation {idx} failed, assigning the penalty value.")
+            _, penalty_proc = create_penalty_output.run_get_node(
+                orm.Str(self.inputs.engine_kwargs.get_dict().get("result_key", "result")),
+                self.inputs.failure_policy.penalty_value,
+            )
+            outputs[idx] = _get_outputs_dict(penalty_proc)
+            return None
+        if action == "drop":
+            self.ctx.num_failed_evaluations += 1
+            self._report(f"Evaluation {idx} failed, dropping it.")
+            dropped.append(idx)
+            return None
+        return self.exit_codes.ERROR_EVALUATE_PROCESS_FAILED
+
+    def _get_failure_outputs(self):
+        """
+        Returns the engine outputs with the number of failed evaluations
+        and, if evaluations are retried, the number of retries.
+        """
+        outputs = {
+            "num_failed_evaluations": orm.Int(self.ctx.get("num_failed_evaluations", 0)).store()
+        }
+        if self._get_input_value("failure_policy.max_retries") > 0:
+            outputs["num_evaluation_retries"] = orm.Int(self.ctx.num_evaluation_retries).store()
+        return outputs
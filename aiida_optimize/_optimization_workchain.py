@@ -7,19 +7,111 @@ Defines the WorkChain which runs the optimization procedure.
 """
 
 from contextlib import contextmanager
+import time
 
 from aiida import orm
-from aiida.engine import WorkChain, while_
-from aiida.engine.launch import run_get_node
-from aiida.engine.utils import is_process_function
+from aiida.common.exceptions import MultipleObjectsError, NotExistent
+from aiida.engine import while_
+from plumpy.workchains import STEPPER_STATE
 
-from ._utils import _get_outputs_dict, _merge_nested_keys
+from ._batch import _validate_batch_inputs, is_batch_array, split_batch_outputs, stack_inputs
+from ._evaluation_index import _EvaluationIndexMixin
+from ._failure_policy import _FailurePolicyMixin
+from ._timings import _add_timing, _summarize_timings, _TimingsMixin
+from ._trace import _TraceMixin
+from ._utils import (
+    _get_evaluation_hash,
+    _get_outputs_dict,
+    _get_process_results,
+    _get_terminated_pks,
+    _InputTemplate,
+    _storage_transaction,
+)
+from .engines._result_mapping import ResultJournal
 from .process_inputs import PROCESS_INPUT_KWARGS, load_object
+from .wrappers._run_or_submit import RunOrSubmitWorkChain
+from .wrappers._run_process_function import RunProcessFunctionWorkChain
 
 __all__ = ["OptimizationWorkChain"]
 
 
-class OptimizationWorkChain(WorkChain):
+def _validate_positive(value, _):  # pylint: disable=inconsistent-return-statements
+    if value.value < 1:
+        return f"The value must be a positive integer, got {value.value}."
+
+
+def _validate_restart_from(value, _):  # pylint: disable=inconsistent-return-statements
+    try:
+        node = orm.load_node(value.value)
+    except (NotExistent, MultipleObjectsError):
+        return f"Could not load the node '{value.value}' given as 'restart_from'."
+    try:
+        process_class = node.process_class
+    except (AttributeError, ValueError):
+        process_class = None
+    if process_class is None or not issubclass(process_class, OptimizationWorkChain):
+        return f"The 'restart_from' node {node.pk} is not an OptimizationWorkChain."
+
+
+_REPORT_LEVELS = {"silent": 0, "summary": 1, "debug": 2}
+
+
+def _validate_report_level(value, _):  # pylint: disable=inconsistent-return-statements
+    if value.value not in _REPORT_LEVELS:
+        return f"Invalid report level '{value.value}', must be one of {tuple(_REPORT_LEVELS)}."
+
+
+def _format_indices(indices):
+    """
+    Format a list of evaluation indices compactly, as a list of ranges.
+    """
+    ranges = []
+    for idx in sorted(indices):
+        if ranges and idx == ranges[-1][1] + 1:
+            ranges[-1][1] = idx
+        else:
+            ranges.append([idx, idx])
+    return ", ".join(str(start) if start == end else f"{start}-{end}" for start, end in ranges)
+
+
+def _migrate_stepper_state(stepper_state):
+    """
+    Migrate the saved state of the outline stepper from the previous
+    outline, in which the loop body consisted of the 'launch_evaluations'
+    and 'get_results' steps, to the current single-step loop body. The
+    function steppers are recreated by name, so the saved step continues
+    through its alias in the current outline.
+    """
+    # The outline is 'create_optimizer, while_(...)(...), finalize'.
+    while_state = stepper_state.get(STEPPER_STATE, None)
+    if stepper_state.get("_pos", None) != 1 or while_state is None:
+        return
+    body_state = while_state.get(STEPPER_STATE, None)
+    if body_state is not None and body_state.get("_pos", 0) > 0:
+        body_state["_pos"] = 0
+
+
+class _EngineLogger:
+    """
+    Logger passed to the engines, which forwards their reports to the
+    workchain at the 'debug' report level.
+    """
+
+    def __init__(self, workchain):
+        self._workchain = workchain
+
+    def report(self, msg, *args, **kwargs):
+        # pylint: disable=protected-access
+        self._workchain._report(msg, *args, level="debug", **kwargs)
+
+
+class OptimizationWorkChain(  # pylint: disable=too-many-ancestors
+    _EvaluationIndexMixin,
+    _FailurePolicyMixin,
+    _TimingsMixin,
+    _TraceMixin,
+    RunOrSubmitWorkChain,
+):
     """
     Runs an optimization procedure, given an optimization engine that defines the optimization
     algorithm, and a process which evaluates the function to be optimized.
@@ -48,7 +140,86 @@ class OptimizationWorkChain(WorkChain):
             help="Inputs that are passed to all evaluation processes.",
             dynamic=True,
         )
-
+        spec.input(
+            "journal_results",
+            valid_type=orm.Bool,
+            default=lambda: orm.Bool(False),
+            help="Record the evaluation results in an append-only journal instead of storing "
+            "all results in the context, which keeps the size of the checkpoints constant as "
+            "the optimization progresses. The journal is stored in Dict nodes in the group "
+            "'aiida_optimize/journal/<UUID>' of the workchain. These nodes are not linked to "
+            "the workchain. To keep their number logarithmic in the number of evaluations, "
+            "chunks of the journal are merged, and the merged nodes are deleted.",
+        )
+        spec.input(
+            "prune_evaluations",
+            valid_type=orm.Bool,
+            default=lambda: orm.Bool(False),
+            help="Replace evaluation processes in the context by their UUID once their "
+            "outputs have been retrieved, such that the context only holds the nodes of "
+            "running evaluations.",
+        )
+        spec.input(
+            "stream_evaluations",
+            valid_type=orm.Bool,
+            default=lambda: orm.Bool(False),
+            help="Pass the finished evaluations to the engine as soon as the oldest running "
+            "evaluation has finished, and launch new evaluations while others are still "
+            "running. This only has an effect for "
+            "engines which accept partial updates; other engines are always updated once "
+            "all running evaluations have finished.",
+        )
+        spec.input(
+            "max_concurrent_evaluations",
+            valid_type=orm.Int,
+            required=False,
+            validator=_validate_positive,
+            help="Maximum number of evaluations which run at the same time. Further "
+            "evaluations created by the engine are queued, and launched as soon as the "
+            "oldest running evaluation has finished.",
+        )
+        spec.input(
+            "evaluation_batch_size",
+            valid_type=orm.Int,
+            required=False,
+            validator=_validate_positive,
+            help="Evaluate up to this many points in one evaluation process. Each input of "
+            "the evaluation process is then an ArrayData, whose 'values' array contains the "
+            "stacked inputs of the points. The evaluation process must return ArrayData "
+            "outputs with a 'values' array containing one row per point, which are split "
+            "into the outputs of the individual points by a calcfunction. Other outputs are "
+            "shared by all points. The 'max_concurrent_evaluations' limit then applies to "
+            "the number of evaluation processes. Input keys which point into a Dict input "
+            "(containing ':') are not supported.",
+        )
+        spec.input(
+            "restart_from",
+            valid_type=orm.Str,
+            required=False,
+            validator=_validate_restart_from,
+            help="UUID of a previous (finished, failed or killed) OptimizationWorkChain. "
+            "Evaluations proposed by the engine which that workchain, or the workchains it "
+            "was restarted from, have already performed are re-used instead of launched. "
+            "With the same engine and evaluate inputs, the optimization follows the same "
+            "path without evaluating anything until it goes beyond the previous run.",
+        )
+        spec.input(
+            "duplicate_tolerance",
+            valid_type=orm.Float,
+            required=False,
+            help="If given, evaluations whose numeric inputs differ from those of a finished "
+            "evaluation by at most this value (in each component) are not launched. Instead, "
+            "the outputs of the finished evaluation are passed to the engine.",
+        )
+        spec.input(
+            "report_level",
+            valid_type=orm.Str,
+            default=lambda: orm.Str("summary"),
+            validator=_validate_report_level,
+            help="Verbosity of the workchain reports: 'silent' creates no reports, 'summary' "
+            "creates one report per step for the launched and retrieved evaluations, and "
+            "'debug' additionally reports each evaluation and the messages of the engine.",
+        )
         spec.exit_code(
             201,
             "ERROR_EVALUATE_PROCESS_FAILED",
@@ -59,10 +230,17 @@ class OptimizationWorkChain(WorkChain):
             "ERROR_ENGINE_FAILED",
             message="Optimization failed because the engine did not finish ok.",
         )
+        spec.exit_code(
+            203,
+            "ERROR_FAILURE_POLICY_NOT_SUPPORTED",
+            message="The 'drop' failure action is not supported by the engine.",
+        )
+
+        spec.inputs.validator = _validate_batch_inputs
 
         spec.outline(
             cls.create_optimizer,
-            while_(cls.not_finished)(cls.launch_evaluations, cls.get_results),
+            while_(cls.not_finished)(cls.update_and_launch),
             cls.finalize,
         )
         spec.output(
@@ -74,17 +252,129 @@ class OptimizationWorkChain(WorkChain):
             "optimal_process_output", help="Output value of the optimal evaluation process."
         )
         spec.output("optimal_process_uuid", help="UUID of the optimal evaluation process.")
+        spec.output(
+            "cancelled_evaluations",
+            valid_type=orm.List,
+            required=False,
+            help="UUIDs of the evaluation processes which were killed because the engine "
+            "no longer needed their results.",
+        )
+        spec.output(
+            "abandoned_evaluations",
+            valid_type=orm.List,
+            required=False,
+            help="UUIDs of the evaluation processes whose results were no longer needed, but "
+            "which could not be killed because the runner has no controller. They are not "
+            "awaited, and may still be running when the optimization has finished.",
+        )
         spec.output_namespace("engine_outputs", required=False, dynamic=True)
 
+    #: Cached (engine instance, serialized state) pair, only valid within
+    #: the current Python process. It is not part of the checkpoint.
+    _optimizer_cache = None
+    #: Cached (engine name, engine class) pair.
+    _engine_cache = None
+    #: Template used to merge the evaluation inputs into the 'evaluate'
+    #: inputs, only valid within the current Python process.
+    _input_template_cache = None
+    #: Default values of the inputs which are missing because they did
+    #: not exist when the checkpoint of the workchain was written.
+    _input_defaults = None
+    #: Indices of the evaluations which were retrieved, launched and
+    #: re-used in the current outline step, which are reported at its end.
+    _step_summary = None
+
+    @property
+    def _input_template(self):
+        """
+        The template which merges the inputs created by the engine into
+        the 'evaluate' inputs. It is created once per Python process.
+        """
+        if self._input_template_cache is None:
+            self._input_template_cache = _InputTemplate(self.inputs.get("evaluate", {}))
+        return self._input_template_cache
+
+    def _get_input_value(self, name):
+        """
+        Returns the value of the input with the given name, which can
+        contain '.' for inputs in a namespace. Inputs which did not exist
+        when the checkpoint of the workchain was written are missing, and
+        the value of their default is returned instead.
+        """
+        namespace = self.inputs
+        *namespace_names, port_name = name.split(".")
+        for namespace_name in namespace_names:
+            namespace = namespace.get(namespace_name, {})
+        if port_name in namespace:
+            return namespace[port_name].value
+        if self._input_defaults is None:
+            self._input_defaults = {}
+        if name not in self._input_defaults:
+            port = self.spec().inputs
+            for part in name.split("."):
+                port = port[part]
+            self._input_defaults[name] = port.default().value
+        return self._input_defaults[name]
+
     @contextmanager
     def optimizer(self):
-        optimizer = self.engine.from_state(state=self.ctx.optimizer_state, logger=self)
-        yield optimizer
-        self.ctx.optimizer_state = optimizer.state
+        """
+        Context manager which gives access to the optimization engine, and
+        stores its state in the context after use.
+
+        The engine instance is kept alive between outline steps. It is
+        re-created from the serialized state only if the state stored in
+        the context is not the one that was last produced by the cached
+        instance, for example after the workchain was reloaded from a
+        checkpoint.
+        """
+        optimizer = self._get_cached_optimizer()
+        if optimizer is None:
+            with self._timed("engine_rebuild"), self._profiled():
+                optimizer = self.engine.from_state(
+                    state=self.ctx.optimizer_state, logger=_EngineLogger(self)
+                )
+        try:
+            yield optimizer
+        except BaseException:
+            # The engine may have been partially modified, so the next
+            # access needs to start again from the serialized state.
+            self._optimizer_cache = None
+            raise
+        self._set_optimizer_state(optimizer)
+
+    def _get_cached_optimizer(self):
+        """
+        Return the cached engine instance if it is consistent with the
+        state stored in the context, or None otherwise.
+        """
+        if self._optimizer_cache is None:
+            return None
+        optimizer, state = self._optimizer_cache
+        if state is not self.ctx.get("optimizer_state"):
+            self._optimizer_cache = None
+            return None
+        return optimizer
+
+    def _set_optimizer_state(self, optimizer):
+        """
+        Store the serialized state of the engine in the context, and
+        cache the engine instance.
+        """
+        with self._timed("state_serialization"), self._profiled():
+            state = optimizer.state
+        self.ctx.optimizer_state = state
+        self._optimizer_cache = (optimizer, state)
 
     @property
     def engine(self):
-        return load_object(self.inputs.engine.value)
+        """
+        The engine class, loaded from the 'engine' input.
+        """
+        engine_name = self.inputs.engine.value
+        if self._engine_cache is None or self._engine_cache[0] != engine_name:
+            self._engine_cache = (engine_name, load_object(engine_name))
+        return self._engine_cache[1]
 
     @property
     def indices_to_retrieve(self):
@@ -94,81 +384,604 @@ class OptimizationWorkChain(WorkChain):
     def indices_to_retrieve(self, value):
         self.ctx.indices_to_retrieve = value
 
-    def create_optimizer(self):  # pylint: disable=missing-docstring
-        self.report("Creating optimizer instance.")
+    @property
+    def queued_evaluations(self):
+        """
+        List of (index, inputs) pairs for the evaluations which have been
+        created by the engine, but not yet launched.
+        """
+        return self.ctx.setdefault("queued_evaluations", [])
+
+    def create_optimizer(  # pylint: disable=missing-docstring,inconsistent-return-statements
+        self,
+    ):
+        self._report("Creating optimizer instance.")
         optimizer = self.engine(  # pylint: disable=not-callable
-            logger=self, **self.inputs.engine_kwargs.get_dict()
+            logger=_EngineLogger(self), **self.inputs.engine_kwargs.get_dict()
+        )
+        if self._get_input_value("journal_results"):
+            optimizer.attach_result_journal(ResultJournal(self.node.uuid))
+        self.ctx.stream_evaluations = (
+            self._get_input_value("stream_evaluations") and optimizer.accepts_partial_updates
         )
-        self.ctx.optimizer_state = optimizer.state
+        self._set_context_defaults()
+        if "restart_from" in self.inputs:
+            self.ctx.restart_chain = self._get_restart_chain(self.inputs.restart_from.value)
+        if self._get_input_value("index_evaluations"):
+            group, _ = orm.Group.collection.get_or_create(
+                label=self._GROUP_LABEL_PREFIX + self.node.uuid
+            )
+            self.ctx.evaluation_group = group.uuid
+        self._set_optimizer_state(optimizer)
+        if self._get_input_value("failure_policy.action") == "drop" and not (
+            optimizer.accepts_partial_updates
+        ):
+            return self.exit_codes.ERROR_FAILURE_POLICY_NOT_SUPPORTED
+
+    def _set_context_defaults(self):
+        """
+        Initialize the counters and bookkeeping entries of the context,
+        unless they are already set.
+        """
+        for name in (
+            "num_failed_evaluations",
+            "num_evaluation_retries",
+            "num_cache_hits",
+            "num_cache_misses",
+            "num_avoided_evaluations",
+            "num_restored_evaluations",
+            "num_iterations",
+        ):
+            self.ctx.setdefault(name, 0)
+        self.ctx.setdefault("evaluation_retries", {})
+
+    def load_instance_state(self, saved_state, load_context):
+        """
+        Load the workchain from a checkpoint. Checkpoints written with the
+        previous outline, whose loop had the 'launch_evaluations' and
+        'get_results' steps, are migrated to the current outline: these
+        steps are resumed through their aliases, and the context entries
+        which did not exist yet are set to their defaults. Inputs which did
+        not exist yet are read through :meth:`_get_input_value`.
+        """
+        stepper_state = saved_state.get(self._STEPPER_STATE, None)
+        if stepper_state is not None:
+            _migrate_stepper_state(stepper_state)
+        super().load_instance_state(saved_state, load_context)
+        self._set_context_defaults()
 
     def not_finished(self):
         """
         Check if the optimization needs to continue.
         """
-        self.report("Checking if optimization is finished.")
+        if self.ctx.get("awaiting_update", False):
+            return True
+        self._report("Checking if optimization is finished.", level="debug")
         with self.optimizer() as opt:
-            return not opt.is_finished
+            return opt.stop_reason is None
+
+    def _report(self, msg, *args, level="summary", **kwargs):
+        """
+        Report the message if the given level is enabled by the 'report_level' input.
+        """
+        if _REPORT_LEVELS[level] <= _REPORT_LEVELS[self._get_input_value("report_level")]:
+            self.report(msg, *args, **kwargs)
+
+    def update_and_launch(self):
+        """
+        Runs the update and launch step, and reports a summary of the
+        evaluations which were launched and retrieved in this step.
+        """
+        return self._run_step(self._update_and_launch)
 
     def launch_evaluations(self):
         """
-        Create evaluations for the current iteration step.
+        Step of the previous outline, which launched the evaluations of an
+        iteration. It is kept such that workchains checkpointed with that
+        outline can be resumed, see :meth:`load_instance_state`.
+        """
+        return self._run_step(self._launch_evaluations)
+
+    def get_results(self):
+        """
+        Step of the previous outline, which retrieved the results of an
+        iteration. It is kept such that workchains checkpointed with that
+        outline can be resumed, see :meth:`load_instance_state`.
+        """
+        return self._run_step(self._get_results)
+
+    def _run_step(self, step):
         """
-        self.report("Launching pending evaluations.")
+        Runs the given outline step, awaits the running evaluations unless
+        the step returned an exit code, and reports a summary of the
+        evaluations which were launched and retrieved in it.
+        """
+        self._step_summary = {"retrieved": [], "launched": [], "re-used": []}
+        wait_start = self.ctx.pop("wait_start", None)
+        if wait_start is not None:
+            _add_timing(self.ctx.setdefault("timings", {}), "waiting", time.time() - wait_start)
+        try:
+            result = step()
+            if result is None:
+                self._await_evaluations()
+            return result
+        finally:
+            parts = [
+                f"{kind} {len(indices)} evaluation{'' if len(indices) == 1 else 's'} "
+                f"({_format_indices(indices)})"
+                for kind, indices in self._step_summary.items()
+                if indices
+            ]
+            if parts:
+                self._report(", ".join(parts).capitalize() + ".")
+
+    def _update_and_launch(self):  # pylint: disable=inconsistent-return-statements
+        """
+        Update the engine with the results of the previously launched
+        evaluations and, unless the optimization is finished, launch the
+        next evaluations.
+
+        Doing both in a single outline step saves one step, and the
+        corresponding checkpoint, per iteration.
+
+        When evaluations are streamed, or evaluations are queued because
+        of the 'max_concurrent_evaluations' limit, this step runs whenever
+        the oldest running evaluation has finished, see
+        :meth:`_await_evaluations`.
+        """
+        stream = self.ctx.get("stream_evaluations", False)
+        if self.ctx.get("awaiting_update", False) and (
+            stream or not (self.queued_evaluations or self._get_running_indices())
+        ):
+            exit_code = self._get_results()
+            if exit_code is not None:
+                return exit_code
+        if stream or not self.ctx.get("awaiting_update", False):
+            with self.optimizer() as opt:
+                finished = opt.stop_reason is not None
+            if not finished:
+                self._launch_evaluations()
+                return
+        self._launch_queued_evaluations()
+
+    def _launch_evaluations(self):
+        """
+        Create evaluations for the current iteration step, and launch
+        them unless this exceeds the 'max_concurrent_evaluations' limit.
+        """
+        self._report("Launching pending evaluations.", level="debug")
+        self.ctx.num_iterations += 1
+        tolerance = self.inputs.get("duplicate_tolerance", None)
         with self.optimizer() as opt:
-            evals = {}
-            evaluate_process = load_object(self.inputs.evaluate_process.value)
-            for idx, inputs in opt.create_inputs().items():
-                self.report(f"Launching evaluation {idx}")
-                inputs_merged = _merge_nested_keys(inputs, self.inputs.get("evaluate", {}))
-                if is_process_function(evaluate_process):
-                    _, node = run_get_node(evaluate_process, **inputs_merged)
-                else:
-                    node = self.submit(evaluate_process, **inputs_merged)
-                evals[self.eval_key(idx)] = node
-                self.indices_to_retrieve.append(idx)
-        return self.to_context(**evals)
-
-    def get_results(self):  # pylint: disable=inconsistent-return-statements
-        """
-        Retrieve results of the current iteration step's evaluations.
-        """
-        self.report("Checking finished evaluations.")
-        outputs = {}
-        while self.indices_to_retrieve:
-            idx = self.indices_to_retrieve.pop(0)
+            if tolerance is None:
+                with self._timed("create_inputs"), self._profiled():
+                    new_inputs = opt.create_inputs()
+                self.queued_evaluations.extend(new_inputs.items())
+            else:
+                with self._timed("create_inputs"), self._profiled():
+                    new_inputs = opt.create_inputs(duplicate_tolerance=tolerance.value)
+                for idx, inputs in new_inputs.items():
+                    if not self._reuse_duplicate(idx, opt.get_duplicate_key(idx)):
+                        self.queued_evaluations.append((idx, inputs))
+        self.ctx.awaiting_update = True
+        self._launch_queued_evaluations()
+
+    def _reuse_duplicate(self, idx, duplicate_idx):
+        """
+        Use the finished evaluation with index 'duplicate_idx' as the
+        evaluation with index 'idx'. Returns whether this was possible.
+        """
+        if duplicate_idx is None:
+            return False
+        eval_node = self.ctx.get(self.eval_key(duplicate_idx), None)
+        if eval_node is None:
+            return False
+        if isinstance(eval_node, str):
+            eval_node = orm.load_node(eval_node)
+        self._report(
+            f"Input of evaluation {idx} duplicates evaluation {duplicate_idx}, re-using it",
+            level="debug",
+        )
+        self._step_summary["re-used"].append(idx)
+        self.ctx.num_avoided_evaluations += 1
+        self.ctx[self.eval_key(idx)] = eval_node
+        if "evaluation_batch_size" in self.inputs:
+            self.ctx.batch_positions[idx] = self.ctx.batch_positions[duplicate_idx]
+        self.indices_to_retrieve.append(idx)
+        return True
+
+    def _launch_queued_evaluations(self):
+        """
+        Launch queued evaluations, until the 'max_concurrent_evaluations'
+        limit is reached. If 'evaluation_batch_size' is set, several
+        evaluations are combined into one evaluation process.
+        """
+        max_concurrent = self.inputs.get("max_concurrent_evaluations", None)
+        batch_size = self.inputs.get("evaluation_batch_size", None)
+        points_per_process = 1 if batch_size is None else batch_size.value
+        num_running = len({self.ctx[self.eval_key(idx)].pk for idx in self._get_running_indices()})
+        evals = {}
+        launched = []
+        reused = []
+        evaluate_process = load_object(self.inputs.evaluate_process.value)
+        while self.queued_evaluations:
+            if max_concurrent is not None and num_running + len(launched) >= max_concurrent.value:
+                self._report(
+                    f"Maximum number of concurrent evaluations reached, "
+                    f"{len(self.queued_evaluations)} evaluations are queued.",
+                    level="debug",
+                )
+                break
+            num_points = len(self.queued_evaluations)
+            if max_concurrent is not None:
+                num_points = min(
+                    num_points,
+                    (max_concurrent.value - num_running - len(launched)) * points_per_process,
+                )
+            batch = self.queued_evaluations[:num_points]
+            del self.queued_evaluations[:num_points]
+            units = [
+                batch[i : i + points_per_process] for i in range(0, num_points, points_per_process)
+            ]
+            # Re-used evaluations free their slot, so the loop continues
+            # with another batch.
+            for indices, inputs_merged, eval_hash in self._merge_evaluation_inputs(units):
+                if batch_size is not None:
+                    self.ctx.setdefault("batch_positions", {}).update(
+                        {idx: pos for pos, idx in enumerate(indices)}
+                    )
+                cached_node = None
+                if eval_hash is not None:
+                    cached_node = self._find_reusable_evaluation(eval_hash)
+                if cached_node is not None:
+                    self._report(
+                        f"Re-using evaluation PK {cached_node.pk} for evaluation "
+                        f"{_format_indices(indices)}",
+                        level="debug",
+                    )
+                    self._step_summary["re-used"].extend(indices)
+                    for idx in indices:
+                        self.ctx[self.eval_key(idx)] = cached_node
+                        self.indices_to_retrieve.append(idx)
+                    reused.append(cached_node)
+                    continue
+                eval_node = self._launch_evaluation(
+                    evaluate_process, indices, inputs_merged, eval_hash
+                )
+                launched.append(eval_node)
+                for idx in indices:
+                    evals[self.eval_key(idx)] = eval_node
+                    self.indices_to_retrieve.append(idx)
+        self._add_to_evaluation_group(launched + reused)
+        self.ctx.update(evals)
+
+    def _merge_evaluation_inputs(self, units):
+        """
+        Merge the inputs of the given units of queued evaluations into the
+        'evaluate' inputs, stacking the inputs of a batch. Returns a list of
+        (indices, merged inputs, evaluation hash) tuples. The hash is only
+        computed if it is needed to find re-usable evaluations, and is None
+        otherwise.
+        """
+        batch_size = self.inputs.get("evaluation_batch_size", None)
+        use_hash = self._get_input_value("use_evaluation_cache") or "restart_from" in self.inputs
+        with self._timed("input_storage"):
+            # The merged inputs of all evaluations in the batch are
+            # stored in one transaction.
+            with _storage_transaction():
+                units_merged = [
+                    (
+                        [idx for idx, _ in unit],
+                        self._input_template.merge(
+                            unit[0][1]
+                            if batch_size is None
+                            else stack_inputs([inputs for _, inputs in unit])
+                        ),
+                    )
+                    for unit in units
+                ]
+            return [
+                (
+                    indices,
+                    inputs_merged,
+                    _get_evaluation_hash(self.inputs.evaluate_process.value, inputs_merged)
+                    if use_hash
+                    else None,
+                )
+                for indices, inputs_merged in units_merged
+            ]
+
+    def _launch_evaluation(self, evaluate_process, indices, inputs_merged, eval_hash):
+        """
+        Launch the evaluation process for the evaluations with the given
+        indices, and tag it with the index extras and its hash.
+        """
+        self._report(f"Launching evaluation {_format_indices(indices)}", level="debug")
+        self._step_summary["launched"].extend(indices)
+        with self._timed("submission"):
+            eval_node = self.run_or_submit(evaluate_process, **inputs_merged)
+        batch_size = self.inputs.get("evaluation_batch_size", None)
+        extras = self._get_index_extras(indices[0] if batch_size is None else indices)
+        if eval_hash is not None:
+            extras[self._EVAL_HASH_EXTRA] = eval_hash
+        if extras:
+            eval_node.base.extras.set_many(extras)
+        return eval_node
+
+    def _get_results(self):  # pylint: disable=inconsistent-return-statements
+        """
+        Retrieve results of the finished evaluations, and update the engine.
+        """
+        self._report("Checking finished evaluations.", level="debug")
+        finished_indices = self._get_finished_indices()
+        for idx in finished_indices:
             key = self.eval_key(idx)
-            self.report(f"Retrieving output for evaluation {idx}")
-            eval_proc = self.ctx[key]
-            if not eval_proc.is_finished_ok:
-                return self.exit_codes.ERROR_EVALUATE_PROCESS_FAILED
-            outputs[idx] = _get_outputs_dict(eval_proc)
+            eval_proc = self._unwrap_evaluation(self.ctx[key])
+            if eval_proc is not self.ctx[key]:
+                self._copy_index_extras(self.ctx[key], eval_proc)
+            self.ctx[key] = eval_proc
+        with self._timed("output_retrieval"):
+            # The states and outputs of all finished evaluations are
+            # fetched at once, instead of querying each evaluation.
+            process_results = _get_process_results(
+                self.ctx[self.eval_key(idx)] for idx in finished_indices
+            )
+        finished, retried = self._retry_failed_evaluations(finished_indices, process_results)
+        if retried and not self.ctx.get("stream_evaluations", False):
+            # The engine expects the outputs of all evaluations at once, so
+            # it is updated only after the retried evaluations have finished.
+            return
+
+        outputs = {}
+        dropped = []
+        finished_procs = {}
+        split_outputs = {}
+        finished_set = set(finished)
+        self.indices_to_retrieve = [
+            idx for idx in self.indices_to_retrieve if idx not in finished_set
+        ]
+        for idx in finished:
+            self._report(f"Retrieving output for evaluation {idx}", level="debug")
+            self._step_summary["retrieved"].append(idx)
+            eval_proc = self.ctx[self.eval_key(idx)]
+            finished_procs[idx] = eval_proc
+            finished_ok, _, eval_outputs = process_results[eval_proc.pk]
+            position = None
+            if "evaluation_batch_size" in self.inputs:
+                # The position is kept after retrieval, since the point
+                # may be re-used as the duplicate of a later one.
+                position = self.ctx.batch_positions[idx]
+                if finished_ok:
+                    eval_outputs = self._get_point_outputs(
+                        eval_proc, eval_outputs, position, split_outputs
+                    )
+            if finished_ok:
+                outputs[idx] = eval_outputs
+                if self._get_input_value("index_evaluations"):
+                    self._set_objective_extra(eval_proc, eval_outputs, position)
+            else:
+                exit_code = self._apply_failure_action(idx, outputs, dropped)
+                if exit_code is not None:
+                    return exit_code
+            if self._get_input_value("prune_evaluations"):
+                self.ctx[self.eval_key(idx)] = eval_proc.uuid
+        self._update_engine(finished_procs, outputs, dropped)
 
+    def _update_engine(self, finished_procs, outputs, dropped):
+        """
+        Pass the outputs of the finished evaluations to the engine, drop
+        the given evaluations, and cancel those which became obsolete.
+        """
         with self.optimizer() as opt:
-            opt.update(outputs)
+            if "trace_file" in self.inputs:
+                self._trace_evaluations(opt, finished_procs, outputs)
+            if dropped:
+                opt.drop(dropped)
+            with self._timed("update"), self._profiled():
+                opt.update(outputs)
+            if "trace_file" in self.inputs and outputs:
+                self._trace_iteration(opt)
+            obsolete = opt.get_obsolete_keys()
+            if obsolete:
+                opt.drop(obsolete)
+        if obsolete:
+            self._cancel_evaluations(obsolete)
+        self.ctx.awaiting_update = bool(self.indices_to_retrieve or self.queued_evaluations)
+
+    def _cancel_evaluations(self, indices):
+        """
+        Remove the evaluations with the given indices from the queue, and
+        kill them if they are already running. Running evaluations are no
+        longer awaited. If the runner has no controller, they cannot be
+        killed, and are recorded as abandoned instead of cancelled. A batch
+        evaluation is only killed if all of its points are obsolete.
+        """
+        indices = set(indices)
+        num_queued = len(self.queued_evaluations)
+        self.queued_evaluations[:] = [
+            (idx, inputs) for idx, inputs in self.queued_evaluations if idx not in indices
+        ]
+        if len(self.queued_evaluations) < num_queued:
+            self._report(
+                f"Removed {num_queued - len(self.queued_evaluations)} obsolete queued evaluations."
+            )
+        cancelled = self.ctx.setdefault("cancelled_evaluations", [])
+        abandoned = self.ctx.setdefault("abandoned_evaluations", [])
+        # In batch mode, several indices share one evaluation process.
+        running = {}
+        for idx in self._get_running_indices():
+            running.setdefault(self.ctx[self.eval_key(idx)].pk, []).append(idx)
+        for pk, process_indices in running.items():
+            obsolete = [idx for idx in process_indices if idx in indices]
+            if not obsolete:
+                continue
+            eval_node = orm.load_node(pk)
+            indices_str = _format_indices(obsolete)
+            if len(obsolete) < len(process_indices):
+                self._report(
+                    f"No longer awaiting obsolete evaluation {indices_str} (PK {pk}), the other "
+                    "points of its batch are still needed."
+                )
+            elif self.runner.controller is None:
+                self._report(
+                    f"Cannot kill obsolete evaluation {indices_str} (PK {pk}), the runner has "
+                    "no controller. It is no longer awaited."
+                )
+                abandoned.append(eval_node.uuid)
+            else:
+                self._report(f"Killing obsolete evaluation {indices_str} (PK {pk}).")
+                self.runner.controller.kill_process(
+                    pk, "Killed because the result is no longer needed."
+                )
+                cancelled.append(eval_node.uuid)
+            for idx in obsolete:
+                self.ctx[self.eval_key(idx)] = eval_node
+                self.indices_to_retrieve.remove(idx)
+
+    @staticmethod
+    def _get_point_outputs(eval_proc, eval_outputs, position, split_outputs):
+        """
+        Returns the outputs of the point at the given position of a batch
+        evaluation. The stacked outputs of each batch evaluation are split
+        once, and the result is stored in 'split_outputs'.
+        """
+        if eval_proc.pk not in split_outputs:
+            arrays = {label: node for label, node in eval_outputs.items() if is_batch_array(node)}
+            _, split_node = split_batch_outputs.run_get_node(**arrays)
+            split_outputs[eval_proc.pk] = _get_outputs_dict(split_node)
+        point_outputs = {
+            label: node for label, node in eval_outputs.items() if not is_batch_array(node)
+        }
+        prefix = f"point_{position}__"
+        point_outputs.update(
+            {
+                label[len(prefix) :]: node
+                for label, node in split_outputs[eval_proc.pk].items()
+                if label.startswith(prefix)
+            }
+        )
+        return point_outputs
+
+    @staticmethod
+    def _unwrap_evaluation(eval_proc):
+        """
+        Returns the process function node for evaluations which were
+        submitted wrapped in a :class:`.RunProcessFunctionWorkChain`, and
+        the given node otherwise.
+        """
+        if eval_proc.process_class is RunProcessFunctionWorkChain:
+            called = eval_proc.called
+            if called:
+                return called[0]
+        return eval_proc
+
+    def _get_finished_indices(self):
+        """
+        Returns the indices of the evaluations which have terminated.
+        """
+        running_indices = set(self._get_running_indices())
+        return [idx for idx in self.indices_to_retrieve if idx not in running_indices]
+
+    def _get_running_indices(self):
+        """
+        Returns the indices of the evaluations which are still running. The
+        process states of all evaluations are fetched in a single query.
+        """
+        terminated_pks = _get_terminated_pks(
+            self.ctx[self.eval_key(idx)].pk for idx in self.indices_to_retrieve
+        )
+        return [
+            idx
+            for idx in self.indices_to_retrieve
+            if self.ctx[self.eval_key(idx)].pk not in terminated_pks
+        ]
+
+    def _await_evaluations(self):
+        """
+        Await the running evaluations before the next step.
+
+        If evaluations are streamed or queued, only the running evaluation
+        which was launched first is awaited, such that the next step runs
+        as soon as it has finished. All evaluations which have finished by
+        then are retrieved in that step. Otherwise, all running evaluations
+        are awaited.
+        """
+        # In batch mode, several indices share one evaluation process.
+        running = {}
+        for idx in self._get_running_indices():
+            running.setdefault(self.ctx[self.eval_key(idx)].pk, idx)
+        if not running:
+            return
+        awaited = list(running.values())
+        if self.ctx.get("stream_evaluations", False) or self.queued_evaluations:
+            awaited = awaited[:1]
+        self.to_context(**{self.eval_key(idx): self.ctx[self.eval_key(idx)] for idx in awaited})
+        if self._get_input_value("record_timings"):
+            # Wall-clock time, since the workchain may be reloaded while waiting.
+            self.ctx.wait_start = time.time()
 
     def finalize(self):  # pylint: disable=inconsistent-return-statements
         """
         Return the output after the optimization procedure has finished.
         """
-        self.report("Finalizing optimization procedure.")
+        self._report("Finalizing optimization procedure.")
+        self._check_restored_evaluations()
         with self.optimizer() as opt:
+            engine_outputs = {}
             if hasattr(opt, "get_engine_outputs"):
-                self.out("engine_outputs", opt.get_engine_outputs())
-            if not opt.is_finished_ok:
+                engine_outputs.update(opt.get_engine_outputs())
+            engine_outputs.update(self._get_failure_outputs())
+            if "duplicate_tolerance" in self.inputs:
+                engine_outputs["num_avoided_evaluations"] = orm.Int(
+                    self.ctx.num_avoided_evaluations
+                ).store()
+            if "restart_from" in self.inputs:
+                engine_outputs["num_restored_evaluations"] = orm.Int(
+                    self.ctx.num_restored_evaluations
+                ).store()
+            if self._get_input_value("use_evaluation_cache"):
+                engine_outputs["num_cache_hits"] = orm.Int(self.ctx.num_cache_hits).store()
+                engine_outputs["num_cache_misses"] = orm.Int(self.ctx.num_cache_misses).store()
+            if self._get_input_value("record_timings"):
+                engine_outputs["timings"] = orm.Dict(
+                    dict=_summarize_timings(self.ctx.get("timings", {}))
+                ).store()
+            stop_reason = opt.stop_reason
+            engine_outputs["stop_reason"] = orm.Str(stop_reason).store()
+            self.out("engine_outputs", engine_outputs)
+            for name in ("cancelled_evaluations", "abandoned_evaluations"):
+                if self.ctx.get(name):
+                    self.out(name, orm.List(list=self.ctx[name]).store())
+            if stop_reason == "finished" and not opt.is_finished_ok:
+                self._output_engine_profile()
                 return self.exit_codes.ERROR_ENGINE_FAILED
-            optimal_process_input = opt.result_input_value
+            if stop_reason != "finished":
+                self._report(
+                    f"Optimization stopped because the '{stop_reason}' budget is exhausted."
+                )
+            with self._profiled():
+                optimal_process_input = opt.result_input_value
+                optimal_process_output = opt.result_output_value
+                result_index = opt.result_index
             if optimal_process_input is not None:
                 assert optimal_process_input.is_stored
                 self.out("optimal_process_input", optimal_process_input)
-            optimal_process_output = opt.result_output_value
             optimal_process_output.store()
             self.out("optimal_process_output", optimal_process_output)
-            result_index = opt.result_index
-            optimal_process = self.ctx[self.eval_key(result_index)]
-            self.out("optimal_process_uuid", orm.Str(optimal_process.uuid).store())
+            self.out("optimal_process_uuid", orm.Str(self.eval_uuid(result_index)).store())
+        self._output_engine_profile()
 
     def eval_key(self, index):
         """
         Returns the evaluation key corresponding to a given index.
         """
         return self._EVAL_PREFIX + str(index)
+
+    def eval_uuid(self, index):
+        """
+        Returns the UUID of the evaluation process with the given index.
+        """
+        eval_proc = self.ctx[self.eval_key(index)]
+        if isinstance(eval_proc, str):
+            return eval_proc
+        return eval_proc.uuid
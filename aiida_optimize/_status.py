@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Defines functions to inspect the progress of an OptimizationWorkChain from
+its checkpoint, without re-creating the process.
+"""
+
+import typing as ty
+
+from aiida import orm
+from aiida.engine import Awaitable, ProcessState
+from aiida.orm.utils.serialize import AiiDALoader
+import yaml
+
+from .process_inputs import load_object
+
+__all__ = ("get_status",)
+
+
+class _NodeReference(str):
+    """
+    Placeholder for a node referenced in the checkpoint, holding its UUID.
+    """
+
+
+class _StatusLoader(AiiDALoader):  # pylint: disable=too-many-ancestors
+    """
+    Loader for checkpoints which does not load the referenced nodes.
+    """
+
+
+yaml.add_constructor(
+    "!aiida_node",
+    lambda loader, node: _NodeReference(loader.construct_scalar(node)),
+    Loader=_StatusLoader,
+)
+
+
+def _get_running_uuids(uuids: ty.Set[str]) -> ty.Set[str]:
+    """
+    Returns the UUIDs of those of the given processes which have not
+    terminated yet.
+    """
+    if not uuids:
+        return set()
+    terminated_states = [
+        state.value for state in (ProcessState.FINISHED, ProcessState.EXCEPTED, ProcessState.KILLED)
+    ]
+    query = orm.QueryBuilder().append(
+        orm.ProcessNode,
+        filters={
+            "uuid": {"in": list(uuids)},
+            "attributes.process_state": {"!in": terminated_states},
+        },
+        project=["uuid"],
+    )
+    return set(query.all(flat=True))
+
+
+def get_status(node: orm.WorkflowNode) -> ty.Dict[str, ty.Any]:
+    """
+    Returns the progress of the given OptimizationWorkChain. For running
+    workchains, this is read from the checkpoint, which is parsed without
+    loading the evaluation nodes or instantiating the process. The lowest
+    result is only available if the evaluations were tagged through the
+    'index_evaluations' input.
+    """
+    status: ty.Dict[str, ty.Any] = {
+        "pk": node.pk,
+        "process_state": node.process_state.value if node.process_state else None,
+        "exit_status": node.exit_status,
+    }
+    engine_name = node.inputs.engine.value
+    status["engine"] = engine_name
+
+    lowest = (
+        orm.QueryBuilder()
+        .append(
+            orm.ProcessNode,
+            filters={
+                "extras.optimize_workchain_uuid": node.uuid,
+                # 'has_key' is not implemented for SQLite storage, while
+                # 'of_type' is supported by all storage backends.
+                "extras.optimize_objective": {"of_type": "number"},
+            },
+            project=[
+                "extras.optimize_objective",
+                "extras.optimize_evaluation_index",
+                "extras.optimize_batch_objectives",
+            ],
+        )
+        .order_by({orm.ProcessNode: {"extras.optimize_objective": {"order": "asc", "cast": "f"}}})
+        .first()
+    )
+    if lowest is not None:
+        objective, index, batch_objectives = lowest
+        if isinstance(index, list):
+            # The objective of a batch evaluation is the lowest result of its points.
+            index = index[batch_objectives.index(objective)]
+        status["lowest_result"], status["lowest_result_index"] = objective, index
+
+    checkpoint = node.checkpoint
+    if checkpoint is None:
+        return status
+    ctx = yaml.load(checkpoint, Loader=_StatusLoader).get("CONTEXT", {})
+    evaluations = [value for key, value in ctx.items() if key.startswith("eval_")]
+    pending = [ctx.get(f"eval_{idx}", None) for idx in ctx.get("indices_to_retrieve", [])]
+    running_uuids = _get_running_uuids(
+        {value for value in pending if isinstance(value, _NodeReference)}
+    )
+    # Checkpoints of older versions contain awaitables for running evaluations.
+    num_running = sum(isinstance(value, Awaitable) or value in running_uuids for value in pending)
+    status["iteration"] = ctx.get("num_iterations", None)
+    status["evaluations_finished"] = len(evaluations) - num_running
+    status["evaluations_running"] = num_running
+    status["evaluations_queued"] = len(ctx.get("queued_evaluations", []))
+    state = dict(ctx.get("optimizer_state", {}))
+    budget_state = state.pop("budget_state", None) or {}
+    state.pop("result_state", None)
+    status["budget"] = {
+        key: value
+        for key, value in budget_state.items()
+        if key in ("max_evaluations", "max_walltime", "max_stagnation", "num_evaluations")
+        and value is not None
+    }
+    engine_impl = load_object(engine_name)._IMPL_CLASS  # pylint: disable=protected-access
+    status["engine_state"] = engine_impl.summarize_state(state)
+    return status
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Defines the timing and profiling instrumentation of the
+OptimizationWorkChain, see its 'record_timings' and 'profile_engine' inputs.
+"""
+
+import bisect
+import cProfile
+from contextlib import contextmanager
+import itertools
+import math
+import os
+import pstats
+import tempfile
+import time
+
+from aiida import orm
+
+_TIMING_PHASES = (
+    "engine_rebuild",
+    "create_inputs",
+    "input_storage",
+    "submission",
+    "waiting",
+    "output_retrieval",
+    "update",
+    "state_serialization",
+)
+
+
+#: The durations are counted in a histogram with logarithmic bins of
+#: fixed edges, from '_HISTOGRAM_MIN' seconds over '_HISTOGRAM_DECADES'
+#: decades. The first and last bin count the shorter and longer durations.
+_HISTOGRAM_MIN = 1e-6
+_HISTOGRAM_DECADES = 10
+_HISTOGRAM_BINS_PER_DECADE = 10
+_NUM_HISTOGRAM_BINS = _HISTOGRAM_DECADES * _HISTOGRAM_BINS_PER_DECADE + 2
+
+_PERCENTILES = (50, 90, 99)
+
+
+def _get_histogram_bin(duration):
+    """
+    Returns the index of the histogram bin of the given duration.
+    """
+    if duration < _HISTOGRAM_MIN:
+        return 0
+    idx = int(math.floor(math.log10(duration / _HISTOGRAM_MIN) * _HISTOGRAM_BINS_PER_DECADE)) + 1
+    return min(idx, _NUM_HISTOGRAM_BINS - 1)
+
+
+def _add_timing(timings, phase, duration):
+    """
+    Add the given duration to the running count, total, maximum and
+    histogram of the given phase. Only these aggregates are kept, such that
+    the size of the timings does not grow with the number of evaluations.
+    """
+    aggregate = timings.setdefault(
+        phase, {"count": 0, "total": 0.0, "max": 0.0, "histogram": [0] * _NUM_HISTOGRAM_BINS}
+    )
+    aggregate["count"] += 1
+    aggregate["total"] += duration
+    aggregate["max"] = max(aggregate["max"], duration)
+    aggregate["histogram"][_get_histogram_bin(duration)] += 1
+
+
+def _get_percentile(aggregate, percentile):
+    """
+    Returns the given percentile of the durations of a phase, estimated
+    from its histogram as the upper edge of the bin containing it. It is
+    exact to within the bin width of about 26 %, and at most the maximum.
+    """
+    rank = percentile / 100 * aggregate["count"]
+    idx = bisect.bisect_left(list(itertools.accumulate(aggregate["histogram"])), rank)
+    if idx == _NUM_HISTOGRAM_BINS - 1:
+        return aggregate["max"]
+    upper_edge = _HISTOGRAM_MIN * 10 ** (idx / _HISTOGRAM_BINS_PER_DECADE)
+    return min(upper_edge, aggregate["max"])
+
+
+def _summarize_timings(timings):
+    """
+    Compute the count, total, mean, percentiles and maximum of the
+    durations recorded for each phase.
+    """
+    res = {}
+    for phase in _TIMING_PHASES:
+        if phase not in timings:
+            continue
+        aggregate = timings[phase]
+        res[phase] = {
+            "count": aggregate["count"],
+            "total": aggregate["total"],
+            "mean": aggregate["total"] / aggregate["count"],
+            **{f"p{q}": _get_percentile(aggregate, q) for q in _PERCENTILES},
+            "max": aggregate["max"],
+        }
+    return res
+
+
+class _TimingsMixin:
+    """
+    Adds the 'record_timings' and 'profile_engine' inputs to the
+    OptimizationWorkChain, and the context managers which measure the
+    phases of the optimization loop and profile the engine calls.
+    """
+
+    #: Accumulated profile of the engine calls, only valid within the
+    #: current Python process.
+    _profile_stats = None
+
+    @classmethod
+    def define(cls, spec):
+        """
+        Add the timing and profiling inputs and outputs to the spec.
+        """
+        super().define(spec)
+
+        spec.input(
+            "record_timings",
+            valid_type=orm.Bool,
+            default=lambda: orm.Bool(False),
+            help="Measure the time spent in each phase of the optimization loop (re-creating "
+            "the engine, creating and storing inputs, submitting, waiting, retrieving "
+            "outputs, updating the engine and creating its state), and return the count, "
+            "total, mean, 50th / 90th / 99th percentile and maximum duration of each phase in "
+            "'engine_outputs.timings'. The percentiles are estimated from a histogram with "
+            "logarithmic bins, and are accurate to about 26 %.",
+        )
+        spec.input(
+            "profile_engine",
+            valid_type=orm.Bool,
+            default=lambda: orm.Bool(False),
+            help="Profile the calls to the engine (creating inputs, updating, finding the "
+            "optimal result, and creating the engine from / serializing it to its state) "
+            "with cProfile, and return the profile in the 'engine_profile' output. The "
+            "file can be read with the 'pstats' module. The statistics are kept in memory, "
+            "and only cover the calls since the workchain was last loaded from a checkpoint.",
+        )
+        spec.output(
+            "engine_profile",
+            valid_type=orm.SinglefileData,
+            required=False,
+            help="Profile of the engine calls in 'pstats' format, if 'profile_engine' is set.",
+        )
+
+    @contextmanager
+    def _timed(self, phase):
+        """
+        Context manager which records the duration of the given phase, if
+        the 'record_timings' input is set.
+        """
+        if not self._get_input_value("record_timings"):
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            _add_timing(self.ctx.setdefault("timings", {}), phase, time.perf_counter() - start)
+
+    @contextmanager
+    def _profiled(self):
+        """
+        Context manager which profiles the enclosed engine calls, if the
+        'profile_engine' input is set. The statistics are accumulated in
+        memory over all steps of the workchain.
+        """
+        if not self._get_input_value("profile_engine"):
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            if self._profile_stats is None:
+                self._profile_stats = pstats.Stats(profiler)
+            else:
+                self._profile_stats.add(profiler)
+
+    def _output_engine_profile(self):
+        """
+        Add the accumulated profile statistics as output, in the format
+        written by 'pstats.Stats.dump_stats'.
+        """
+        if not self._get_input_value("profile_engine"):
+            return
+        stats = self._profile_stats if self._profile_stats is not None else pstats.Stats()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            profile_path = os.path.join(tmp_dir, "engine.pstats")
+            stats.dump_stats(profile_path)
+            self.out("engine_profile", orm.SinglefileData(profile_path).store())
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Defines the trace file of the OptimizationWorkChain, to which its
+progress is appended as JSON lines, see its 'trace_file' input.
+"""
+
+import json
+import os
+
+from aiida import orm
+from aiida.common import timezone
+
+from ._utils import _get_json_value
+
+
+def _validate_trace_file(value, _):  # pylint: disable=inconsistent-return-statements
+    if not os.path.isabs(value.value):
+        return f"The 'trace_file' must be an absolute path, got '{value.value}'."
+
+
+class _TraceMixin:
+    """
+    Adds the 'trace_file' input to the OptimizationWorkChain, and the
+    methods which write the trace records.
+    """
+
+    @classmethod
+    def define(cls, spec):
+        """
+        Add the 'trace_file' input to the spec.
+        """
+        super().define(spec)
+
+        spec.input(
+            "trace_file",
+            valid_type=orm.Str,
+            required=False,
+            validator=_validate_trace_file,
+            help="Absolute path of a local file to which the progress of the optimization is "
+            "appended as JSON lines: one line per finished evaluation, with its inputs, "
+            "outputs and timestamps, and one line per engine update, with the best result "
+            "so far and a summary of the engine state.",
+        )
+
+    def _write_trace(self, records):
+        """
+        Append the given records to the trace file, as JSON lines.
+        """
+        time_str = timezone.now().isoformat()
+        with open(self.inputs.trace_file.value, "a", encoding="utf-8") as trace_file:
+            for record in records:
+                trace_file.write(json.dumps({"time": time_str, **record}) + "\n")
+
+    def _trace_evaluations(self, opt, eval_procs, outputs):
+        """
+        Write a trace record for each of the given finished evaluations.
+        """
+        self._write_trace(
+            {
+                "event": "evaluation",
+                "index": idx,
+                "uuid": eval_proc.uuid,
+                "exit_status": eval_proc.exit_status,
+                "inputs": _get_json_value(opt.get_inputs(idx)),
+                "outputs": _get_json_value(outputs.get(idx)),
+                "started": eval_proc.ctime.isoformat(),
+                "finished": eval_proc.mtime.isoformat(),
+            }
+            for idx, eval_proc in eval_procs.items()
+        )
+
+    def _trace_iteration(self, opt):
+        """
+        Write a trace record with the best result so far and a summary of
+        the engine state, after the engine was updated.
+        """
+        self.ctx.num_traced_updates = self.ctx.get("num_traced_updates", 0) + 1
+        self._write_trace(
+            [
+                {
+                    "event": "iteration",
+                    "iteration": self.ctx.num_traced_updates,
+                    "best_index": opt.result_index,
+                    "best_output": _get_json_value(opt.result_output_value),
+                    "stop_reason": opt.stop_reason,
+                    "engine_state": opt.get_state_summary(),
+                }
+            ]
+        )
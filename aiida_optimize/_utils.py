@@ -3,13 +3,83 @@
 Defines common helper functions.
 """
 from collections import defaultdict
+import copy
+import functools
 import typing as ty
 
 from aiida import orm
+from aiida.common.hashing import make_hash
 from aiida.common.links import LinkType
+from aiida.engine import ProcessState, calcfunction
+from aiida.engine.utils import is_process_function
+from aiida.manage import get_manager
 from aiida.orm.nodes.data.base import to_aiida_type
+from aiida.tools import delete_nodes
+import numpy as np
+from plumpy.ports import InputPort
 from plumpy.utils import AttributesFrozendict
 
+from .process_inputs import load_object
+
+#: Name of the array in which vector values are stored in an ArrayData.
+_ARRAY_NAME = "values"
+
+
+def _storage_transaction() -> ty.ContextManager:
+    """
+    Returns a context manager in which all nodes are stored in a single
+    database transaction, instead of one transaction per node.
+    """
+    return get_manager().get_profile_storage().transaction()
+
+
+def _delete_unlinked_nodes(pks: ty.Sequence[int]) -> None:
+    """
+    Delete the given nodes, and remove them from their groups. The nodes
+    are deleted with :func:`aiida.tools.delete_nodes`, and only if this
+    does not delete any other nodes, i.e. if the given nodes do not have
+    any links. Otherwise, a ValueError is raised.
+    """
+    if not pks:
+        return
+    pks_set = set(pks)
+    _, deleted = delete_nodes(pks, dry_run=lambda pks_to_delete: pks_to_delete != pks_set)
+    if not deleted:
+        raise ValueError(f"The nodes {sorted(pks_set)} cannot be deleted, because they have links.")
+
+
+def _to_array_data(values: ty.Any) -> orm.ArrayData:
+    """
+    Create an ArrayData which stores the given values as a float64 array.
+    """
+    res = orm.ArrayData()
+    res.set_array(_ARRAY_NAME, np.asarray(values, dtype=np.float64))
+    return res
+
+
+def _get_vector(node: orm.Node) -> np.ndarray:
+    """
+    Returns the values of a vector input, given as List or as ArrayData
+    created by :func:`_to_array_data`.
+    """
+    if isinstance(node, orm.ArrayData):
+        return node.get_array(_ARRAY_NAME)
+    return np.array(node.get_list())
+
+
+def _get_inputs_dict(process: orm.ProcessNode) -> ty.Dict[str, ty.Any]:
+    """
+    Returns the (nested) inputs with which the given process was called.
+    """
+    return _wrap_nested_links(
+        {
+            link_triplet.link_label: link_triplet.node
+            for link_triplet in process.base.links.get_incoming(
+                link_type=(LinkType.INPUT_CALC, LinkType.INPUT_WORK)
+            ).all()
+        }
+    )
+
 
 def _get_outputs_dict(process: orm.ProcessNode, wrap_nested=False) -> ty.Dict[str, orm.Node]:
     """
@@ -24,6 +94,70 @@ def _get_outputs_dict(process: orm.ProcessNode, wrap_nested=False) -> ty.Dict[st
     return res
 
 
+def _get_process_results(
+    processes: ty.Iterable[orm.ProcessNode],
+) -> ty.Dict[int, ty.Tuple[bool, ty.Optional[int], ty.Dict[str, orm.Node]]]:
+    """
+    Returns, for each of the given processes, whether it finished ok, its
+    exit status, and its outputs as in :func:`_get_outputs_dict`. These
+    are fetched with a single query, and a second one only if some of
+    the processes do not have any outputs.
+    """
+    pks = [process.pk for process in processes]
+    if not pks:
+        return {}
+    projections = ["id", "attributes.process_state", "attributes.exit_status"]
+    query = orm.QueryBuilder()
+    query.append(orm.ProcessNode, filters={"id": {"in": pks}}, project=projections, tag="process")
+    query.append(
+        orm.Node,
+        with_incoming="process",
+        edge_filters={"type": {"in": [LinkType.RETURN.value, LinkType.CREATE.value]}},
+        edge_project=["label"],
+        edge_tag="link",
+        project=["*"],
+        tag="output",
+    )
+    res: ty.Dict[int, ty.Tuple[bool, ty.Optional[int], ty.Dict[str, orm.Node]]] = {}
+
+    def _add_process(pk, process_state, exit_status):
+        if pk not in res:
+            finished_ok = process_state == ProcessState.FINISHED.value and exit_status == 0
+            res[pk] = (finished_ok, exit_status, {})
+
+    for row in query.iterdict():
+        _add_process(*(row["process"][key] for key in projections))
+        res[row["process"]["id"]][2][row["link"]["label"]] = row["output"]["*"]
+
+    missing = [pk for pk in pks if pk not in res]
+    if missing:
+        query = orm.QueryBuilder()
+        query.append(orm.ProcessNode, filters={"id": {"in": missing}}, project=projections)
+        for row in query.iterall():
+            _add_process(*row)
+    return res
+
+
+def _get_terminated_pks(pks: ty.Iterable[int]) -> ty.Set[int]:
+    """
+    Returns the PKs of those of the given processes which have terminated,
+    fetched with a single query.
+    """
+    pks = list(set(pks))
+    if not pks:
+        return set()
+    terminated_states = [
+        state.value for state in (ProcessState.FINISHED, ProcessState.EXCEPTED, ProcessState.KILLED)
+    ]
+    query = orm.QueryBuilder()
+    query.append(
+        orm.ProcessNode,
+        filters={"id": {"in": pks}, "attributes.process_state": {"in": terminated_states}},
+        project=["id"],
+    )
+    return set(query.all(flat=True))
+
+
 def _wrap_nested_links(output_dict):
     """Wrap links containing `__` into nested dicts."""
     if not isinstance(output_dict, dict):
@@ -50,47 +184,139 @@ def _wrap_nested_links(output_dict):
     return res
 
 
+def _get_json_value(value: ty.Any) -> ty.Any:
+    """
+    Convert (nested) AiiDA nodes to a JSON-serializable representation.
+    Nodes supported by :func:`_from_aiida_type` are replaced by their
+    value, and all other nodes by their UUID.
+    """
+    if isinstance(value, (dict, AttributesFrozendict)):
+        return {key: _get_json_value(val) for key, val in value.items()}
+    try:
+        return _from_aiida_type(value)
+    except TypeError:
+        return {"uuid": value.uuid}
+
+
 def _merge_nested_keys(nested_key_inputs, target_inputs):
     """
     Maps nested_key_inputs onto target_inputs with support for nested keys:
         x.y:a.b -> x.y['a']['b']
     Note: keys will be python str; values will be AiiDA data types
+
+    To merge many inputs into the same target inputs, create an
+    :class:`_InputTemplate` once and use its ``merge`` method instead.
+    """
+    return _InputTemplate(target_inputs).merge(nested_key_inputs)
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_nested_key(
+    key: str,
+) -> ty.Tuple[ty.Tuple[str, ...], str, ty.Optional[ty.Tuple[ty.Tuple[str, ...], str]]]:
+    """
+    Split a nested key 'x.y:a.b' into the port path ('x',), the port name
+    'y', and the path ('a',) and name 'b' of the attribute in the Dict,
+    which is None for keys without ':'.
     """
+    full_port_path, *full_attr_path = key.split(":")
+    *port_path, port_name = full_port_path.split(".")
+    if not full_attr_path:
+        return tuple(port_path), port_name, None
+    if len(full_attr_path) != 1:
+        raise ValueError(f"Nested key syntax can contain at most one ':'. Got '{key}'")
+    *sub_dict_path, attr_name = full_attr_path[0].split(".")
+    return tuple(port_path), port_name, (tuple(sub_dict_path), attr_name)
+
 
-    def _get_nested_dict(in_dict, split_path):
-        res_dict = in_dict
-        for path_part in split_path:
-            res_dict = res_dict.setdefault(path_part, {})
-        return res_dict
+def _get_nested_dict(in_dict, split_path):
+    res_dict = in_dict
+    for path_part in split_path:
+        res_dict = res_dict.setdefault(path_part, {})
+    return res_dict
 
-    destination = _copy_nested_dict(target_inputs)
 
-    for key, value in nested_key_inputs.items():
-        full_port_path, *full_attr_path = key.split(":")
-        *port_path, port_name = full_port_path.split(".")
-        namespace = _get_nested_dict(in_dict=destination, split_path=port_path)
+class _InputTemplate:
+    """
+    Maps inputs with nested keys onto fixed target inputs, as described in
+    :func:`_merge_nested_keys`.
+
+    Only the namespaces of the target inputs which are modified are
+    copied. The content of the target Dict nodes is read once, and merged
+    Dict nodes with identical content are re-used instead of being stored
+    again.
+    """
 
-        if not full_attr_path:
-            if not isinstance(value, orm.Node):
-                value = to_aiida_type(value).store()
-            res_value = value
-        else:
-            if len(full_attr_path) != 1:
-                raise ValueError(f"Nested key syntax can contain at most one ':'. Got '{key}'")
+    def __init__(self, target_inputs: ty.Mapping[str, ty.Any]) -> None:
+        self._target_inputs = target_inputs
+        self._dict_contents: ty.Dict[str, ty.Dict[str, ty.Any]] = {}
+        self._merged_dicts: ty.Dict[str, orm.Dict] = {}
 
-            # Get or create the top-level dictionary.
-            try:
-                res_dict = namespace[port_name].get_dict()
-            except KeyError:
-                res_dict = {}
+    def merge(self, nested_key_inputs: ty.Mapping[str, ty.Any]) -> ty.Dict[str, ty.Any]:
+        """
+        Returns the target inputs, with the given inputs mapped onto them.
+        """
+        destination = dict(self._target_inputs)
+        copied_namespaces = {id(destination)}
+        # Attributes set in the same Dict are collected, such that only
+        # one Dict is created per port.
+        dict_updates: ty.Dict[ty.Tuple[int, str], ty.Tuple[dict, dict]] = {}
 
-            *sub_dict_path, attr_name = full_attr_path[0].split(".")
+        for key, value in nested_key_inputs.items():
+            port_path, port_name, attr_path = _parse_nested_key(key)
+            namespace = destination
+            for path_part in port_path:
+                sub_namespace = namespace.get(path_part, {})
+                if id(sub_namespace) not in copied_namespaces:
+                    sub_namespace = dict(sub_namespace)
+                    copied_namespaces.add(id(sub_namespace))
+                    namespace[path_part] = sub_namespace
+                namespace = sub_namespace
+
+            if attr_path is None:
+                dict_updates.pop((id(namespace), port_name), None)
+                if not isinstance(value, orm.Node):
+                    value = to_aiida_type(value).store()
+                namespace[port_name] = value
+                continue
+
+            update_key = (id(namespace), port_name)
+            if update_key not in dict_updates:
+                # Get or create the top-level dictionary.
+                try:
+                    res_dict = self._get_dict_content(namespace[port_name])
+                except KeyError:
+                    res_dict = {}
+                dict_updates[update_key] = (namespace, res_dict)
+            _, res_dict = dict_updates[update_key]
+
+            sub_dict_path, attr_name = attr_path
             sub_dict = _get_nested_dict(in_dict=res_dict, split_path=sub_dict_path)
             sub_dict[attr_name] = _from_aiida_type(value)
-            res_value = orm.Dict(dict=res_dict).store()
 
-        namespace[port_name] = res_value
-    return destination
+        for (_, port_name), (namespace, res_dict) in dict_updates.items():
+            namespace[port_name] = self._get_merged_dict(res_dict)
+        return destination
+
+    def _get_dict_content(self, node: orm.Dict) -> ty.Dict[str, ty.Any]:
+        """
+        Returns a copy of the content of the given Dict node.
+        """
+        if not node.is_stored:
+            return node.get_dict()
+        if node.uuid not in self._dict_contents:
+            self._dict_contents[node.uuid] = node.get_dict()
+        return copy.deepcopy(self._dict_contents[node.uuid])
+
+    def _get_merged_dict(self, content: ty.Dict[str, ty.Any]) -> orm.Dict:
+        """
+        Returns a stored Dict with the given content, re-using an earlier
+        Dict with the same content.
+        """
+        content_hash = make_hash(content)
+        if content_hash not in self._merged_dicts:
+            self._merged_dicts[content_hash] = orm.Dict(dict=content).store()
+        return self._merged_dicts[content_hash]
 
 
 def _copy_nested_dict(value):
@@ -117,4 +343,103 @@ def _from_aiida_type(value):
         return value.get_dict()
     if isinstance(value, orm.List):
         return value.get_list()
+    if isinstance(value, orm.ArrayData) and value.get_arraynames() == [_ARRAY_NAME]:
+        return value.get_array(_ARRAY_NAME).tolist()
     raise TypeError(f"value of type {type(value)} is not supported")
+
+
+def _load_nodes(pks: ty.Iterable[int], chunk_size: int = 500) -> ty.Dict[int, orm.Node]:
+    """
+    Load the nodes with the given PKs, using one query per chunk of PKs
+    instead of one query per node.
+    """
+    pks = list(set(pks))
+    res = {}
+    for start in range(0, len(pks), chunk_size):
+        query = orm.QueryBuilder()
+        query.append(
+            orm.Node, filters={"id": {"in": pks[start : start + chunk_size]}}, project=["id", "*"]
+        )
+        res.update(dict(query.all()))
+    return res
+
+
+def _get_nested_output(key: str, value: ty.Any) -> ty.Dict[str, orm.Node]:
+    """
+    Create an outputs dictionary which contains the given value at the given
+    nested key, such that ``get_nested_result`` retrieves the value again.
+    The returned nodes are not stored.
+    """
+    node_label, *attr_path = key.split(":")
+    if attr_path:
+        res_dict: ty.Dict[str, ty.Any] = {}
+        sub_dict = res_dict
+        *sub_dict_path, attr_name = attr_path[0].split(".")
+        for path_part in sub_dict_path:
+            sub_dict = sub_dict.setdefault(path_part, {})
+        sub_dict[attr_name] = _from_aiida_type(value)
+        node = orm.Dict(dict=res_dict)
+    elif isinstance(value, orm.Node):
+        node = value.clone() if value.is_stored else value
+    else:
+        node = to_aiida_type(value)
+    return {node_label.replace(".", "__"): node}
+
+
+@calcfunction
+def create_penalty_output(result_key: orm.Str, penalty_value: orm.Float):
+    """
+    Create the outputs assigned to a failed evaluation, which contain the
+    penalty value at the given result key.
+    """
+    return _get_nested_output(result_key.value, penalty_value)
+
+
+def _get_evaluation_hash(process_name: str, inputs: ty.Dict[str, ty.Any]) -> str:
+    """
+    Returns a hash of the evaluate process identity and the content of its
+    (nested) inputs, which identifies equivalent evaluations across runs.
+    Inputs which have the value of their port default do not contribute,
+    such that the hash of a finished evaluation, whose input links include
+    the defaults, is the same as the hash of the inputs it was launched with.
+    """
+    # Like for AiiDA's own caching, the metadata does not contribute to the hash.
+    inputs = {key: value for key, value in inputs.items() if key != "metadata"}
+    default_hashes = _get_default_hashes(process_name)
+    content_hashes = {
+        key: value
+        for key, value in _get_content_hashes(inputs).items()
+        if default_hashes.get(key, None) != value
+    }
+    return make_hash({"process": process_name, "inputs": content_hashes})
+
+
+@functools.lru_cache(maxsize=None)
+def _get_default_hashes(process_name: str) -> ty.Dict[str, str]:
+    """
+    Returns the content hashes of the default values of the top-level
+    inputs of the given process.
+    """
+    process = load_object(process_name)
+    process_class = process.process_class if is_process_function(process) else process
+    res = {}
+    for name, port in process_class.spec().inputs.items():
+        if not isinstance(port, InputPort) or not port.has_default():
+            continue
+        default = port.default() if callable(port.default) else port.default
+        if isinstance(default, orm.Node):
+            # The default is not stored, so its hash is computed the same
+            # way as when storing it.
+            res[name] = make_hash(default.base.caching.get_objects_to_hash())
+    return res
+
+
+def _get_content_hashes(value):
+    """
+    Replace the AiiDA nodes in nested dictionaries by their content hash.
+    """
+    if isinstance(value, (dict, AttributesFrozendict)):
+        return {k: _get_content_hashes(v) for k, v in value.items()}
+    if isinstance(value, orm.Node):
+        return value.base.caching.get_hash()
+    return value
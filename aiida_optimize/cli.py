@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Defines the ``aiida-optimize`` command line interface.
+"""
+
+import click
+
+__all__ = ("cli",)
+
+
+@click.group()
+@click.option(
+    "-p", "--profile", default=None, help="Name of the AiiDA profile, the default profile if unset."
+)
+@click.pass_context
+def cli(ctx, profile):
+    """
+    Commands for monitoring aiida-optimize optimizations.
+    """
+    ctx.obj = {"profile": profile}
+
+
+@cli.command()
+@click.argument("pks", nargs=-1, type=int, required=True)
+@click.pass_context
+def status(ctx, pks):
+    """
+    Print the progress of the OptimizationWorkChains with the given PKs.
+
+    The progress of running workchains is read from their checkpoint,
+    without loading the evaluations or re-creating the process.
+    """
+    from aiida import load_profile, orm  # pylint: disable=import-outside-toplevel
+
+    from ._status import get_status  # pylint: disable=import-outside-toplevel
+
+    load_profile(ctx.obj["profile"], allow_switch=True)
+    for pk in pks:
+        click.echo(format_status(get_status(orm.load_node(pk))))
+
+
+def format_status(info):
+    """
+    Format the status returned by :func:`._status.get_status` for printing.
+    """
+    state = info["process_state"]
+    if state == "finished":
+        state = f"{state} [{info['exit_status']}]"
+    lines = [f"OptimizationWorkChain<{info['pk']}> {state}", f"  engine: {info['engine']}"]
+    if info.get("iteration") is not None:
+        lines.append(f"  iteration: {info['iteration']}")
+    if "evaluations_finished" in info:
+        lines.append(
+            f"  evaluations: {info['evaluations_finished']} finished, "
+            f"{info['evaluations_running']} running, {info['evaluations_queued']} queued"
+        )
+    if "lowest_result" in info:
+        lines.append(
+            f"  lowest result: {info['lowest_result']} "
+            f"(evaluation {info['lowest_result_index']})"
+        )
+    for section in ("budget", "engine_state"):
+        if info.get(section):
+            lines.append(f"  {section.replace('_', ' ')}:")
+            lines.extend(f"    {key}: {value}" for key, value in sorted(info[section].items()))
+    return "\n".join(lines)
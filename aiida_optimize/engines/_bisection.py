@@ -49,7 +49,17 @@ class _BisectionImpl(OptimizationEngineImpl):
 
     @property
     def _state(self) -> ty.Dict[str, ty.Any]:
-        return {k: v for k, v in self.__dict__.items() if k not in ["_result_mapping", "_logger"]}
+        return {
+            k: v
+            for k, v in self.__dict__.items()
+            if k not in ["_result_mapping", "_budget", "_logger"]
+        }
+
+    @classmethod
+    def summarize_state(cls, state: ty.Dict[str, ty.Any]) -> ty.Dict[str, ty.Any]:
+        summary = super().summarize_state(state)
+        summary["interval"] = abs(state["upper"] - state["lower"])
+        return summary
 
     @property
     def is_finished(self) -> bool:
@@ -99,11 +109,7 @@ class _BisectionImpl(OptimizationEngineImpl):
         """
         output_values = {
             key: get_nested_result(value.output, self.result_key)
-            for key, value in ty.cast(
-                # .items() is exposed dynamically via '_result_mapping.__getattr__'
-                ty.Tuple[int, ty.Any],
-                self._result_mapping.items(),
-            )
+            for key, value in self._result_mapping.items()
         }
         opt_index, opt_output = min(
             output_values.items(), key=lambda item: abs(item[1].value - self.target_value)  # type: ignore
@@ -133,6 +139,8 @@ class Bisection(OptimizationEngineWrapper):
 
     :param target_value: Target value of the function towards which it should be optimized.
     :type target_value: float
+
+    Additional keyword arguments (``max_evaluations``, ``max_walltime``, ``max_stagnation``) set the budget of the optimization, see :meth:`.OptimizationEngineImpl.set_budget`.
     """
 
     _IMPL_CLASS = _BisectionImpl
@@ -147,8 +155,9 @@ class Bisection(OptimizationEngineWrapper):
         result_key: str = "result",
         target_value: float = 0.0,
         logger: ty.Optional[ty.Any] = None,
+        **budget: ty.Any,
     ) -> _BisectionImpl:
-        return cls._IMPL_CLASS(  # pylint: disable=no-member
+        engine = cls._IMPL_CLASS(  # pylint: disable=no-member
             lower=lower,
             upper=upper,
             tol=tol,
@@ -157,3 +166,5 @@ class Bisection(OptimizationEngineWrapper):
             target_value=target_value,
             logger=logger,
         )
+        engine.set_budget(**budget)
+        return engine
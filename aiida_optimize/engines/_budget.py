@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Defines the stopping rules which apply to all optimization engines.
+"""
+
+from __future__ import annotations
+
+import time
+import typing as ty
+
+__all__ = ["Budget"]
+
+
+class Budget:
+    """
+    Keeps track of the evaluation, wall-time and stagnation budgets of an
+    optimization engine, and decides when the optimization must stop
+    because one of them is exhausted.
+    """
+
+    MAX_EVALUATIONS = "max_evaluations"
+    MAX_WALLTIME = "max_walltime"
+    MAX_STAGNATION = "max_stagnation"
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        max_evaluations: ty.Optional[int] = None,
+        max_walltime: ty.Optional[float] = None,
+        max_stagnation: ty.Optional[int] = None,
+        start_time: ty.Optional[float] = None,
+        num_evaluations: int = 0,
+        best_index: ty.Optional[int] = None,
+        num_without_improvement: int = 0,
+        exhausted: ty.Optional[str] = None,
+    ) -> None:
+        self.max_evaluations = max_evaluations
+        self.max_walltime = max_walltime
+        self.max_stagnation = max_stagnation
+        self.start_time = start_time
+        self.num_evaluations = num_evaluations
+        self.best_index = best_index
+        self.num_without_improvement = num_without_improvement
+        self.exhausted = exhausted
+
+    @property
+    def state(self) -> ty.Dict[str, ty.Any]:
+        """
+        Uniquely defines the state of the object. This can be used to create an identical copy.
+        """
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_state(cls, state: ty.Optional[ty.Dict[str, ty.Any]]) -> Budget:
+        """
+        Create a :class:`Budget` instance from a state.
+        """
+        return cls(**(state or {}))
+
+    @property
+    def tracks_improvement(self) -> bool:
+        """
+        Whether the index of the optimal evaluation needs to be passed to :meth:`register`.
+        """
+        return self.max_stagnation is not None
+
+    def register(self, num_evaluations: int, best_index: ty.Optional[int] = None) -> None:
+        """
+        Register newly finished evaluations, and the index of the optimal
+        evaluation after they have been passed to the engine.
+        """
+        self.num_evaluations += num_evaluations
+        if best_index is not None and best_index != self.best_index:
+            self.best_index = best_index
+            self.num_without_improvement = 0
+        else:
+            self.num_without_improvement += num_evaluations
+
+    @property
+    def exhausted_budget(self) -> ty.Optional[str]:
+        """
+        The name of the exhausted budget, or None if the optimization can
+        continue. Once a budget is exhausted, this does not change anymore.
+        The budgets only apply after at least one evaluation has finished.
+        """
+        if self.exhausted is None and self.num_evaluations > 0:
+            if self.max_evaluations is not None and self.num_evaluations >= self.max_evaluations:
+                self.exhausted = self.MAX_EVALUATIONS
+            elif (
+                self.max_stagnation is not None
+                and self.num_without_improvement >= self.max_stagnation
+            ):
+                self.exhausted = self.MAX_STAGNATION
+            elif (
+                self.max_walltime is not None
+                and self.start_time is not None
+                and time.time() - self.start_time >= self.max_walltime
+            ):
+                self.exhausted = self.MAX_WALLTIME
+        return self.exhausted
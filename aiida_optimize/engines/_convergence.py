@@ -59,7 +59,11 @@ class _ConvergenceImpl(OptimizationEngineImpl):
         and excluding variables
             logger
         """
-        return {k: v for k, v in self.__dict__.items() if k not in ["_result_mapping", "_logger"]}
+        return {
+            k: v
+            for k, v in self.__dict__.items()
+            if k not in ["_result_mapping", "_budget", "_logger"]
+        }
 
     @property
     def _result_window(self) -> ty.List[ty.Any]:
@@ -222,6 +226,9 @@ class Convergence(OptimizationEngineWrapper):
     array_name : str or None
         Name of array within output / result ArrayData (only necessary if the output is
         given in an ArrayData)
+    **budget
+        Budget of the optimization (``max_evaluations``, ``max_walltime``,
+        ``max_stagnation``), see :meth:`.OptimizationEngineImpl.set_budget`
     """
 
     _IMPL_CLASS = _ConvergenceImpl
@@ -235,8 +242,9 @@ class Convergence(OptimizationEngineWrapper):
         convergence_window: int = 2,
         array_name: ty.Optional[str] = None,
         logger: ty.Optional[ty.Any] = None,
+        **budget: ty.Any,
     ) -> _ConvergenceImpl:
-        return cls._IMPL_CLASS(  # pylint: disable=no-member
+        engine = cls._IMPL_CLASS(  # pylint: disable=no-member
             input_values=input_values,
             tol=tol,
             input_key=input_key,
@@ -248,3 +256,5 @@ class Convergence(OptimizationEngineWrapper):
             initialized=False,
             logger=logger,
         )
+        engine.set_budget(**budget)
+        return engine
@@ -24,6 +24,7 @@ from decorator import decorator
 import numpy as np
 import scipy.linalg as la
 
+from .._utils import _get_vector, _to_array_data
 from ..helpers import get_nested_result
 from .base import OptimizationEngineImpl, OptimizationEngineWrapper
 
@@ -78,6 +79,7 @@ class _NelderMeadImpl(OptimizationEngineImpl):
         input_key: str,
         result_key: str,
         logger,
+        array_input=False,
         num_iter=0,
         extra_points: ty.Optional[ty.Dict[str, ty.Tuple[float, float]]] = None,
         next_submit="submit_initialize",
@@ -110,6 +112,7 @@ class _NelderMeadImpl(OptimizationEngineImpl):
 
         self.input_key = input_key
         self.result_key = result_key
+        self.array_input = array_input
 
         self.next_submit = next_submit
         self.next_update = next_update
@@ -122,7 +125,7 @@ class _NelderMeadImpl(OptimizationEngineImpl):
 
     def _get_single_result(self, outputs):
         (idx,) = outputs.keys()
-        x = np.array(self._result_mapping[idx].input[self.input_key].get_attribute("list"))
+        x = _get_vector(self._result_mapping[idx].input[self.input_key])
         f = get_nested_result(outputs[idx], self.result_key).value
         return x, f
 
@@ -132,9 +135,9 @@ class _NelderMeadImpl(OptimizationEngineImpl):
         return [self._to_input_list(x) for x in self.simplex]
 
     def _to_input_list(self, x):
-        input_list = orm.List()
-        input_list.extend(x)
-        return {self.input_key: input_list}
+        if self.array_input:
+            return {self.input_key: _to_array_data(x)}
+        return {self.input_key: orm.List(list=np.asarray(x).tolist())}
 
     @update_method(next_submit="new_iter")
     def update_initialize(self, outputs):
@@ -280,13 +283,23 @@ class _NelderMeadImpl(OptimizationEngineImpl):
         state_dict = {
             k: v
             for k, v in self.__dict__.items()
-            if k not in ["_result_mapping", "_logger", "xtol", "ftol"]
+            if k not in ["_result_mapping", "_budget", "_logger", "xtol", "ftol"]
         }
         # Hide inf values before passing on to AiiDA
         state_dict["xtol"] = self.xtol if self.xtol < np.inf else None
         state_dict["ftol"] = self.ftol if self.ftol < np.inf else None
         return state_dict
 
+    @classmethod
+    def summarize_state(cls, state):
+        summary = super().summarize_state(state)
+        simplex = np.array(state["simplex"])
+        summary["simplex_size"] = float(np.max(la.norm(simplex[1:] - simplex[0], axis=-1)))
+        if state["fun_simplex"] is not None:
+            fun_simplex = np.array(state["fun_simplex"])
+            summary["fun_simplex_spread"] = float(np.max(np.abs(fun_simplex[1:] - fun_simplex[0])))
+        return summary
+
     @property
     def is_finished(self):
         return self.finished
@@ -347,6 +360,11 @@ class NelderMead(OptimizationEngineWrapper):
 
     :param result_key: Name of the output argument in the evaluation process.
     :type result_key: str
+
+    :param array_input: If True, the input is passed to the evaluation process as an ArrayData, whose float64 'values' array contains the parameter vector, instead of a List. This is faster for high-dimensional problems.
+    :type array_input: bool
+
+    Additional keyword arguments (``max_evaluations``, ``max_walltime``, ``max_stagnation``) set the budget of the optimization, see :meth:`.OptimizationEngineImpl.set_budget`.
     """
 
     _IMPL_CLASS = _NelderMeadImpl
@@ -361,8 +379,10 @@ class NelderMead(OptimizationEngineWrapper):
         input_key="x",
         result_key="result",
         logger=None,
+        array_input=False,
+        **budget,
     ):
-        return cls._IMPL_CLASS(  # pylint: disable=no-member
+        engine = cls._IMPL_CLASS(  # pylint: disable=no-member
             simplex=simplex,
             fun_simplex=fun_simplex,
             xtol=xtol,
@@ -370,5 +390,8 @@ class NelderMead(OptimizationEngineWrapper):
             max_iter=max_iter,
             input_key=input_key,
             result_key=result_key,
+            array_input=array_input,
             logger=logger,
         )
+        engine.set_budget(**budget)
+        return engine
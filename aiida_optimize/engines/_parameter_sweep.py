@@ -19,24 +19,42 @@ class _ParameterSweepImpl(OptimizationEngineImpl):
     Implementation class for the parameter sweep engine.
     """
 
-    def __init__(self, parameters, result_key, logger, result_state=None):
+    def __init__(
+        self, parameters, result_key, logger, result_state=None, stop_below=None
+    ):  # pylint: disable=too-many-arguments
         super().__init__(logger=logger, result_state=result_state)
         self._parameters = parameters
         self._result_key = result_key
+        self._stop_below = stop_below
 
     @property
     def _state(self):
-        return {"parameters": self._parameters, "result_key": self._result_key}
+        return {
+            "parameters": self._parameters,
+            "result_key": self._result_key,
+            "stop_below": self._stop_below,
+        }
 
     @property
     def is_finished(self):
-        if len(self._result_mapping) < len(self._parameters):
+        if self._stop_below is not None and any(
+            get_nested_result(res.output, self._result_key).value < self._stop_below
+            for res in self._result_mapping.values()
+            if res.output is not None
+        ):
+            return True
+        if self._result_mapping.num_created < len(self._parameters):
             return False
         return not any(res.output is None for res in self._result_mapping.values())
 
+    @property
+    def accepts_partial_updates(self):
+        return True
+
     def _create_inputs(self):
         return [
-            {k: to_aiida_type(v) for k, v in param_dict.items()} for param_dict in self._parameters
+            {k: to_aiida_type(v) for k, v in param_dict.items()}
+            for param_dict in self._parameters[self._result_mapping.num_created :]
         ]
 
     def _update(self, outputs):
@@ -49,6 +67,7 @@ class _ParameterSweepImpl(OptimizationEngineImpl):
         cost_values = {
             k: get_nested_result(v.output, self._result_key)
             for k, v in self._result_mapping.items()
+            if v.output is not None
         }
         opt_index, opt_output = min(cost_values.items(), key=lambda item: item[1].value)
         input_keys = list(self._parameters[opt_index].keys())
@@ -65,13 +84,24 @@ class ParameterSweep(OptimizationEngineWrapper):
 
     :param result_key: Name of the evaluation process output argument.
     :type result_key: str
+
+    :param stop_below: If given, the sweep finishes as soon as a result below this value is found. Evaluations which are still running are then cancelled. This is most useful together with ``stream_evaluations``, since otherwise all evaluations of the sweep have already finished.
+    :type stop_below: float
+
+    Additional keyword arguments (``max_evaluations``, ``max_walltime``, ``max_stagnation``) set the budget of the optimization, see :meth:`.OptimizationEngineImpl.set_budget`.
     """
 
     _IMPL_CLASS = _ParameterSweepImpl
 
     def __new__(
-        cls, parameters, result_key="result", logger=None
+        cls, parameters, result_key="result", logger=None, stop_below=None, **budget
     ):  # pylint: disable=arguments-differ
-        return cls._IMPL_CLASS(
-            parameters=parameters, result_key=result_key, logger=logger
+        engine = cls._IMPL_CLASS(
+            parameters=parameters, result_key=result_key, stop_below=stop_below, logger=logger
         )  # pylint: disable=no-member
+        engine.set_budget(**budget)
+        return engine
+
+    @classmethod
+    def get_input_keys(cls, engine_kwargs):
+        return {key for parameters in engine_kwargs.get("parameters", []) for key in parameters}
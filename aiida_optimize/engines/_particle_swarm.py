@@ -12,8 +12,8 @@ import typing as ty
 from aiida import orm
 from decorator import decorator
 import numpy as np
-from numpy.random import get_state, set_state, uniform
 
+from .._utils import _to_array_data
 from ..helpers import get_nested_result
 from .base import OptimizationEngineImpl, OptimizationEngineWrapper
 
@@ -58,13 +58,14 @@ class _ParticleSwarmImpl(OptimizationEngineImpl):
     Implementation class for the Particle-Swarm optimization engine.
     """
 
-    def __init__(  # pylint: disable=too-many-arguments
+    def __init__(  # pylint: disable=too-many-arguments,too-many-locals
         self,
         particles: ty.List[float],  # ty.Optional[ty.List[float]],
         max_iter: int,
         input_key: str,
         result_key: str,
         logger,
+        array_input=False,
         num_iter=0,
         next_submit="submit_initialize",
         next_update=None,
@@ -77,6 +78,7 @@ class _ParticleSwarmImpl(OptimizationEngineImpl):
         fun_local_best=None,
         velocities=None,
         rand_state=None,
+        seed=None,
     ):
         super().__init__(logger=logger, result_state=result_state)
 
@@ -95,6 +97,7 @@ class _ParticleSwarmImpl(OptimizationEngineImpl):
 
         self.input_key = input_key
         self.result_key = result_key
+        self.array_input = array_input
 
         self.next_submit = next_submit
         self.next_update = next_update
@@ -103,6 +106,7 @@ class _ParticleSwarmImpl(OptimizationEngineImpl):
         self.exceeded_max_iters = exceeded_max_iters
 
         self.rand_state = rand_state
+        self.seed = seed
 
     @submit_method(next_update="update_general")
     def submit_initialize(self):
@@ -111,19 +115,22 @@ class _ParticleSwarmImpl(OptimizationEngineImpl):
         self.local_best = self.particles
         self.fun_local_best = np.full(n_parts, np.inf)
         self.fun_global_best = np.inf
+        # The random number generator is local to the engine, such that
+        # the global NumPy random state is not modified.
+        rng = np.random.RandomState(self.seed)  # pylint: disable=no-member
         # Initialize the velocities to random number in [-1,1]
         self.velocities = np.zeros((n_parts, n_vars))
         for line, _ in enumerate(self.velocities):
             for col, _ in enumerate(self.velocities[line]):
-                self.velocities[line][col] = uniform(-1, 1)
-        self.rand_state = get_state()
+                self.velocities[line][col] = rng.uniform(-1, 1)
+        self.rand_state = rng.get_state()
         self._logger.report("Submitting first step.")
         return [self._to_input_list(x) for x in self.particles]
 
     def _to_input_list(self, x):
-        input_list = orm.List()
-        input_list.extend(x)
-        return {self.input_key: input_list}
+        if self.array_input:
+            return {self.input_key: _to_array_data(x)}
+        return {self.input_key: orm.List(list=np.asarray(x).tolist())}
 
     @update_method(next_submit="new_iter")
     def update_general(self, outputs):  # pylint: disable=missing-function-docstring
@@ -140,7 +147,7 @@ class _ParticleSwarmImpl(OptimizationEngineImpl):
     def _get_values(self, outputs):
         return [get_nested_result(res, self.result_key).value for _, res in sorted(outputs.items())]
 
-    def create_particle(self):  # pylint: disable=missing-function-docstring
+    def create_particle(self, rng=np.random):  # pylint: disable=missing-function-docstring
         n_var = len(self.particles[0])
         new_vel = deepcopy(self.velocities)
         for idx, val in enumerate(self.particles):
@@ -153,6 +160,7 @@ class _ParticleSwarmImpl(OptimizationEngineImpl):
                     val[i],
                     self.local_best[idx][i],
                     self.global_best[i],
+                    rng,
                 )
                 for i in range(n_var)
             ]
@@ -164,8 +172,10 @@ class _ParticleSwarmImpl(OptimizationEngineImpl):
         return np.array(new_parts), np.array(new_vel)
 
     @staticmethod
-    def update_vel(omega, v, c1, c2, x, pi, pg):  # pylint: disable=too-many-arguments
-        return omega * v + c1 * uniform(0, 1) * (pi - x) + c2 * uniform(0, 1) * (pg - x)
+    def update_vel(
+        omega, v, c1, c2, x, pi, pg, rng=np.random
+    ):  # pylint: disable=too-many-arguments
+        return omega * v + c1 * rng.uniform(0, 1) * (pi - x) + c2 * rng.uniform(0, 1) * (pg - x)
 
     @submit_method()
     def new_iter(self):  # pylint: disable=missing-function-docstring
@@ -178,9 +188,10 @@ class _ParticleSwarmImpl(OptimizationEngineImpl):
             f"Start of Particle-Swarm iteration {self.num_iter}, max number of iterations: {self.max_iter}."
         )
         self.next_update = "update_general"
-        set_state(self.rand_state)
-        self.particles, self.velocities = self.create_particle()
-        self.rand_state = get_state()
+        rng = np.random.RandomState()  # pylint: disable=no-member
+        rng.set_state(self.rand_state)
+        self.particles, self.velocities = self.create_particle(rng)
+        self.rand_state = rng.get_state()
 
         return [self._to_input_list(x) for x in self.particles]
 
@@ -208,10 +219,18 @@ class _ParticleSwarmImpl(OptimizationEngineImpl):
         state_dict = {
             k: v
             for k, v in self.__dict__.items()
-            if k not in ["_result_mapping", "_logger", "xtol", "ftol"]
+            if k not in ["_result_mapping", "_budget", "_logger", "xtol", "ftol"]
         }
         return state_dict
 
+    @classmethod
+    def summarize_state(cls, state):
+        summary = super().summarize_state(state)
+        summary["swarm_spread"] = float(np.max(np.std(np.array(state["particles"]), axis=0)))
+        if state["fun_global_best"] is not None:
+            summary["fun_global_best"] = float(state["fun_global_best"])
+        return summary
+
     @property
     def is_finished(self):
         return self.finished
@@ -265,6 +284,14 @@ class ParticleSwarm(OptimizationEngineWrapper):
 
     :param result_key: Name of the output argument in the evaluation process.
     :type result_key: str
+
+    :param array_input: If True, the input is passed to the evaluation process as an ArrayData, whose float64 'values' array contains the parameter vector, instead of a List. This is faster for high-dimensional problems.
+    :type array_input: bool
+
+    :param seed: Seed for the random number generator. If given, the optimization is reproducible, such that it can be restarted with the ``restart_from`` input of the :class:`.OptimizationWorkChain`.
+    :type seed: int
+
+    Additional keyword arguments (``max_evaluations``, ``max_walltime``, ``max_stagnation``) set the budget of the optimization, see :meth:`.OptimizationEngineImpl.set_budget`.
     """
 
     _IMPL_CLASS = _ParticleSwarmImpl
@@ -276,11 +303,18 @@ class ParticleSwarm(OptimizationEngineWrapper):
         input_key="x",
         result_key="result",
         logger=None,
+        seed=None,
+        array_input=False,
+        **budget,
     ):
-        return cls._IMPL_CLASS(  # pylint: disable=no-member
+        engine = cls._IMPL_CLASS(  # pylint: disable=no-member
             particles=particles,
             max_iter=max_iter,
             input_key=input_key,
             result_key=result_key,
+            array_input=array_input,
+            seed=seed,
             logger=logger,
         )
+        engine.set_budget(**budget)
+        return engine
@@ -10,7 +10,13 @@ from __future__ import annotations
 
 import typing as ty
 
-__all__ = ["Result", "ResultMapping"]
+from aiida import orm
+import numpy as np
+from scipy.spatial import cKDTree
+
+from .._utils import _delete_unlinked_nodes, _load_nodes, _storage_transaction
+
+__all__ = ["Result", "ResultMapping", "ResultJournal"]
 
 
 class Result:
@@ -18,11 +24,201 @@ class Result:
     Data object for storing the input created by the optimization engine, and the output from the evaluation process corresponding to that input.
     """
 
+    #: Set for evaluations that were dropped, e.g. because they failed.
+    dropped = False
+    #: Key of an earlier evaluation whose input is equal within the
+    #: tolerance given to :meth:`ResultMapping.add_inputs`. This is not
+    #: stored in the :class:`ResultJournal`.
+    duplicate_of: ty.Optional[int] = None
+
     def __init__(self, input_: ty.Any, output: ty.Any = None) -> None:
         self.input = input_
         self.output = output
 
 
+class ResultJournal:
+    """
+    Append-only record of the inputs and outputs added to a
+    :class:`ResultMapping`, associated with an AiiDA node.
+
+    The entries are stored in Dict nodes, which are collected in a group
+    labelled with the UUID of the associated node. Each entry references
+    the input and output nodes by their PK. To bound the number of nodes,
+    an append merges the new entries with the most recent chunks which
+    are not larger than the result, such that there are only logarithmically
+    many chunks, and each entry is re-written a logarithmic number of
+    times. The serialized state of the journal only contains the UUID of
+    the associated node and a cursor, so its size does not grow with the
+    number of results. Entries beyond the cursor (for example written
+    after the last checkpoint of a workchain) are ignored when the results
+    are re-created, and overwritten by subsequent entries.
+    """
+
+    _GROUP_LABEL_PREFIX = "aiida_optimize/journal/"
+    _INPUTS = "inputs"
+    _OUTPUTS = "outputs"
+    _DROPPED = "dropped"
+
+    def __init__(self, node_uuid: str, cursor: int = 0) -> None:
+        self._node_uuid = node_uuid
+        self._cursor = cursor
+        # The [pk, start, size] of the stored chunks, in the order they
+        # were stored. This is queried on the first append.
+        self._chunks: ty.Optional[ty.List[ty.List[int]]] = None
+
+    @property
+    def state(self) -> ty.Dict[str, ty.Any]:
+        """
+        Uniquely defines the state of the object. This can be used to create an identical copy.
+        """
+        return {"journal_uuid": self._node_uuid, "cursor": self._cursor}
+
+    @classmethod
+    def from_state(cls, state: ty.Dict[str, ty.Any]) -> ResultJournal:
+        """
+        Create a :class:`ResultJournal` instance from a state.
+        """
+        return cls(node_uuid=state["journal_uuid"], cursor=state["cursor"])
+
+    @staticmethod
+    def is_journal_state(state: ty.Any) -> bool:
+        """
+        Check whether the given result state is the state of a :class:`ResultJournal`.
+        """
+        return isinstance(state, dict) and "journal_uuid" in state
+
+    @property
+    def group_label(self) -> str:
+        """
+        The label of the group which contains the journal chunks.
+        """
+        return self._GROUP_LABEL_PREFIX + self._node_uuid
+
+    def add_inputs(self, results: ty.Dict[int, Result]) -> None:
+        """
+        Append the inputs of the given results to the journal.
+        """
+        self._append([(self._INPUTS, key, res.input) for key, res in results.items()])
+
+    def add_outputs(self, outputs: ty.Dict[int, ty.Any]) -> None:
+        """
+        Append the given evaluation outputs to the journal.
+        """
+        self._append([(self._OUTPUTS, key, out) for key, out in outputs.items()])
+
+    def add_dropped(self, keys: ty.Iterable[int]) -> None:
+        """
+        Append the keys of dropped evaluations to the journal.
+        """
+        self._append([(self._DROPPED, key, {}) for key in keys])
+
+    def _append(self, entries: ty.List[ty.Tuple[str, int, ty.Dict[str, orm.Node]]]) -> None:
+        if not entries:
+            return
+        if self._chunks is None:
+            self._chunks = self._query_chunks()
+        start = self._cursor
+        new_entries = [
+            [kind, key, [[label, node.pk] for label, node in nodes.items()]]
+            for kind, key, nodes in entries
+        ]
+        size = len(new_entries)
+        num_merged = 0
+        while num_merged < len(self._chunks) and self._chunks[-1 - num_merged][2] <= size:
+            size += self._chunks[-1 - num_merged][2]
+            num_merged += 1
+        merged = self._chunks[len(self._chunks) - num_merged :]
+        if merged:
+            entries_by_position = self._load_chunk_entries([pk for pk, _, _ in merged])
+            for offset, entry in enumerate(new_entries):
+                entries_by_position[start + offset] = entry
+            start = min(entries_by_position)
+            positions = range(start, max(entries_by_position) + 1)
+            if len(positions) == len(entries_by_position):
+                new_entries = [entries_by_position[pos] for pos in positions]
+            else:
+                # The merged chunks do not cover a contiguous range, so
+                # the new entries are stored on their own.
+                merged = []
+                start = self._cursor
+
+        group, _ = orm.Group.collection.get_or_create(label=self.group_label)
+        chunk = orm.Dict(dict={"start": start, "size": len(new_entries), "entries": new_entries})
+        with _storage_transaction():
+            chunk.store()
+            group.add_nodes(chunk)
+        # If the workchain is interrupted before the merged chunks are
+        # deleted, their entries are overwritten by the new chunk.
+        _delete_unlinked_nodes([pk for pk, _, _ in merged])
+        del self._chunks[len(self._chunks) - len(merged) :]
+        self._chunks.append([ty.cast(int, chunk.pk), start, len(new_entries)])
+        self._cursor += len(entries)
+
+    def _query_chunks(self) -> ty.List[ty.List[int]]:
+        """
+        Returns the [pk, start, size] of the stored chunks, in the order
+        they were stored.
+        """
+        query = orm.QueryBuilder()
+        query.append(orm.Group, filters={"label": self.group_label}, tag="group")
+        query.append(
+            orm.Dict,
+            with_group="group",
+            project=["id", "attributes.start", "attributes.size"],
+        )
+        query.order_by({orm.Dict: {"id": "asc"}})
+        return [list(row) for row in query.iterall()]
+
+    def _load_chunk_entries(
+        self, pks: ty.Optional[ty.List[int]] = None
+    ) -> ty.Dict[int, ty.List[ty.Any]]:
+        """
+        Returns the entries of the given chunks (or of all chunks) by their
+        position, fetched with a single query. Chunks stored later
+        overwrite the entries of earlier chunks at the same positions.
+        """
+        query = orm.QueryBuilder()
+        query.append(orm.Group, filters={"label": self.group_label}, tag="group")
+        query.append(
+            orm.Dict,
+            with_group="group",
+            filters={"id": {"in": pks}} if pks is not None else {},
+            project=["attributes"],
+        )
+        query.order_by({orm.Dict: {"id": "asc"}})
+        entries_by_position = {}
+        for (chunk,) in query.iterall():
+            for offset, entry in enumerate(chunk["entries"]):
+                entries_by_position[chunk["start"] + offset] = entry
+        return entries_by_position
+
+    def _get_entries(self) -> ty.List[ty.List[ty.Any]]:
+        """
+        Returns the (kind, key, [[label, pk], ...]) journal entries up to
+        the cursor.
+        """
+        entries_by_position = self._load_chunk_entries()
+        return [entries_by_position[i] for i in range(self._cursor)]
+
+    def replay(self) -> ty.Dict[int, Result]:
+        """
+        Re-create the results from the journal entries up to the cursor.
+        """
+        entries = self._get_entries()
+        nodes = _load_nodes(pk for _, _, pairs in entries for _, pk in pairs)
+
+        results: ty.Dict[int, Result] = {}
+        for kind, key, pairs in entries:
+            values = {label: nodes[pk] for label, pk in pairs}
+            if kind == self._INPUTS:
+                results[key] = Result(input_=values)
+            elif kind == self._OUTPUTS:
+                results[key].output = values
+            else:
+                results[key].dropped = True
+        return results
+
+
 class ResultMapping:
     """
     Maps the keys used to identify evaluations to their inputs / outputs.
@@ -30,36 +226,85 @@ class ResultMapping:
 
     def __init__(self) -> None:
         self._results: ty.Dict[int, Result] = {}
+        self._journal: ty.Optional[ResultJournal] = None
+        # Spatial index of the inputs of finished evaluations, used to
+        # detect near-duplicate inputs. It is not part of the state.
+        self._indexed_keys: ty.Set[int] = set()
+        self._points: ty.Dict[ty.Hashable, ty.Tuple[ty.List[int], ty.List[np.ndarray]]] = {}
+        self._trees: ty.Dict[ty.Hashable, cKDTree] = {}
 
     @property
-    def state(self) -> ty.Dict[int, Result]:
+    def state(self) -> ty.Union[ty.Dict[int, Result], ty.Dict[str, ty.Any]]:
         """
         Uniquely defines the state of the object. This can be used to create an identical copy.
+
+        If a :class:`ResultJournal` is attached, this is the state of the journal.
         """
+        if self._journal is not None:
+            return self._journal.state
         return self._results
 
     @classmethod
-    def from_state(cls, state: ty.Optional[ty.Dict[int, Result]]) -> ResultMapping:
+    def from_state(
+        cls, state: ty.Union[ty.Dict[int, Result], ty.Dict[str, ty.Any], None]
+    ) -> ResultMapping:
         """
         Create a :class:`ResultMapping` instance from a state.
         """
         instance = cls()
-        if state is not None:
-            instance._results = state  # pylint: disable=protected-access
+        if ResultJournal.is_journal_state(state):
+            journal = ResultJournal.from_state(ty.cast(ty.Dict[str, ty.Any], state))
+            instance._journal = journal  # pylint: disable=protected-access
+            instance._results = journal.replay()  # pylint: disable=protected-access
+        elif state is not None:
+            instance._results = ty.cast(  # pylint: disable=protected-access
+                ty.Dict[int, Result], state
+            )
         return instance
 
-    def add_inputs(self, inputs_list: ty.List[ty.Any]) -> ty.Dict[int, Result]:
+    def attach_journal(self, journal: ResultJournal) -> None:
+        """
+        Record the results in the given journal. Existing results are
+        added to the journal.
+        """
+        journal.add_inputs(self._results)
+        journal.add_outputs(
+            {key: res.output for key, res in self._results.items() if res.output is not None}
+        )
+        journal.add_dropped(key for key, res in self._results.items() if res.dropped)
+        self._journal = journal
+
+    def add_inputs(
+        self, inputs_list: ty.List[ty.Any], duplicate_tolerance: ty.Optional[float] = None
+    ) -> ty.Dict[int, Result]:
         """
         Adds a list of inputs to the mapping, generating new keys. Returns a dict mapping the keys to the inputs.
+
+        If a ``duplicate_tolerance`` is given, inputs whose numeric values
+        differ by at most this tolerance (in each component) from the
+        input of a finished evaluation are marked with the key of that
+        evaluation in :attr:`Result.duplicate_of`. Non-numeric values
+        must be identical.
         """
+        if duplicate_tolerance is not None:
+            self._update_point_index()
+        with _storage_transaction():
+            for input_value in inputs_list:
+                for value in input_value.values():
+                    if not value.is_stored:
+                        value.store()
         keys = []
         for input_value in inputs_list:
-            for value in input_value.values():
-                if not value.is_stored:
-                    value.store()
             key = self._get_new_key()
             keys.append(key)
             self._results[key] = Result(input_=input_value)
+            if duplicate_tolerance is not None:
+                self._results[key].duplicate_of = self._find_duplicate(
+                    input_value, duplicate_tolerance
+                )
+
+        if self._journal is not None:
+            self._journal.add_inputs({k: self._results[k] for k in keys})
 
         return {k: self._results[k].input for k in keys}
 
@@ -69,9 +314,81 @@ class ResultMapping:
         except ValueError:
             return 0
 
+    def _update_point_index(self) -> None:
+        """
+        Add the inputs of newly finished evaluations to the spatial index.
+        """
+        changed = set()
+        for key, res in self._results.items():
+            if key in self._indexed_keys or res.output is None:
+                continue
+            self._indexed_keys.add(key)
+            point = _get_input_point(res.input)
+            if point is None:
+                continue
+            signature, vector = point
+            keys, vectors = self._points.setdefault(signature, ([], []))
+            keys.append(key)
+            vectors.append(vector)
+            changed.add(signature)
+        for signature in changed:
+            self._trees[signature] = cKDTree(np.array(self._points[signature][1]))
+
+    def _find_duplicate(self, input_value: ty.Any, tolerance: float) -> ty.Optional[int]:
+        """
+        Returns the key of the closest indexed evaluation whose input is
+        equal to the given input within the tolerance, or None.
+        """
+        point = _get_input_point(input_value)
+        if point is None:
+            return None
+        signature, vector = point
+        tree = self._trees.get(signature)
+        if tree is None:
+            return None
+        keys, vectors = self._points[signature]
+        candidates = [
+            (np.max(np.abs(vectors[i] - vector)), keys[i])
+            for i in tree.query_ball_point(vector, r=tolerance, p=np.inf)
+            if not self._results[keys[i]].dropped
+        ]
+        if not candidates:
+            return None
+        return min(candidates)[1]
+
     def add_outputs(self, outputs: ty.Dict[int, ty.Any]) -> None:
         for key, out in outputs.items():
             self._results[key].output = out
+        if self._journal is not None:
+            self._journal.add_outputs(outputs)
+
+    def drop(self, keys: ty.Iterable[int]) -> None:
+        """
+        Mark the evaluations with the given keys as dropped. Dropped
+        evaluations are no longer listed by the mapping, but their keys
+        are not re-used.
+        """
+        keys = list(keys)
+        for key in keys:
+            self._results[key].dropped = True
+        if self._journal is not None:
+            self._journal.add_dropped(keys)
+
+    @property
+    def num_created(self) -> int:
+        """
+        The number of inputs that were added to the mapping, including dropped evaluations.
+        """
+        return len(self._results)
+
+    def keys(self) -> ty.List[int]:
+        return [key for key, res in self._results.items() if not res.dropped]
+
+    def values(self) -> ty.List[Result]:
+        return [res for res in self._results.values() if not res.dropped]
+
+    def items(self) -> ty.List[ty.Tuple[int, Result]]:
+        return [(key, res) for key, res in self._results.items() if not res.dropped]
 
     def __getattr__(self, key: str) -> ty.Any:
         return getattr(self._results, key)
@@ -79,5 +396,45 @@ class ResultMapping:
     def __getitem__(self, key: int) -> Result:
         return self._results[key]
 
+    def __iter__(self) -> ty.Iterator[int]:
+        return iter(self.keys())
+
     def __len__(self) -> int:
-        return len(self._results)
+        return len(self.keys())
+
+
+def _get_input_point(
+    input_value: ty.Dict[str, orm.Node]
+) -> ty.Optional[ty.Tuple[ty.Hashable, np.ndarray]]:
+    """
+    Split the given evaluation input into a signature, which contains the
+    labels, the shapes of the numeric values and the hash of all other
+    values, and a vector of the numeric values. Returns None if the input
+    does not contain any numeric value.
+    """
+    signature: ty.List[ty.Tuple[str, ty.Any]] = []
+    values: ty.List[np.ndarray] = []
+    for label in sorted(input_value):
+        node = input_value[label]
+        try:
+            if isinstance(node, (orm.Float, orm.Int)):
+                arrays = [np.array([node.value], dtype=float)]
+            elif isinstance(node, orm.List):
+                arrays = [np.array(node.get_list(), dtype=float)]
+            elif isinstance(node, orm.ArrayData):
+                arrays = [
+                    np.array(node.get_array(name), dtype=float)
+                    for name in sorted(node.get_arraynames())
+                ]
+            else:
+                arrays = None
+        except (TypeError, ValueError):
+            arrays = None
+        if arrays is None:
+            signature.append((label, node.base.caching.get_hash()))
+        else:
+            signature.append((label, tuple(arr.shape for arr in arrays)))
+            values.extend(arr.ravel() for arr in arrays)
+    if not values:
+        return None
+    return tuple(signature), np.concatenate(values)
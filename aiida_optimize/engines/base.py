@@ -9,11 +9,13 @@ Defines the base classes needed to implement an optimization engine.
 from __future__ import annotations
 
 from abc import ABCMeta, abstractmethod
+import time
 import typing as ty
 
 import yaml
 
-from ._result_mapping import Result, ResultMapping
+from ._budget import Budget
+from ._result_mapping import Result, ResultJournal, ResultMapping
 
 yaml.representer.Representer.add_representer(ABCMeta, yaml.representer.Representer.represent_name)  # type: ignore
 
@@ -36,20 +38,41 @@ class OptimizationEngineImpl:
     ) -> None:
         self._logger = logger
         self._result_mapping = ResultMapping.from_state(result_state)
+        self._budget = Budget()
 
     @classmethod
     def from_state(cls, state: ty.Dict[str, ty.Any]) -> OptimizationEngineImpl:
         """
         Create an instance of the class from the serialized state.
         """
-        return cls(**state)
+        # The budget is restored here, such that child classes do not
+        # need to accept it as an argument.
+        state = dict(state)
+        budget_state = state.pop("budget_state", None)
+        instance = cls(**state)
+        instance._budget = Budget.from_state(budget_state)  # pylint: disable=protected-access
+        return instance
 
     @property
     def state(self) -> ty.Dict[str, ty.Any]:
         """
         The serialized state of the instance, including the result mapping.
         """
-        return dict(result_state=self._result_mapping.state, **self._state)
+        # Engines which serialize their '__dict__' can contain the budget.
+        engine_state = {key: value for key, value in self._state.items() if key != "_budget"}
+        return dict(
+            result_state=self._result_mapping.state,
+            budget_state=self._budget.state,
+            **engine_state,
+        )
+
+    def attach_result_journal(self, journal: ResultJournal) -> None:
+        """
+        Record the results in the given :class:`.ResultJournal`. The
+        serialized state then references the journal instead of
+        containing all results.
+        """
+        self._result_mapping.attach_journal(journal)
 
     @property
     @abstractmethod
@@ -58,6 +81,25 @@ class OptimizationEngineImpl:
         The serialized state of the instance, without the result mapping. This function needs to be implemented by child classes.
         """
 
+    def get_state_summary(self) -> ty.Dict[str, ty.Any]:
+        """
+        Returns a short summary of the progress of the engine, see
+        :meth:`summarize_state`.
+        """
+        return self.summarize_state(self._state)
+
+    @classmethod
+    def summarize_state(cls, state: ty.Dict[str, ty.Any]) -> ty.Dict[str, ty.Any]:
+        """
+        Returns a short summary of the progress of an engine, computed
+        from its serialized state without creating the engine. By default,
+        this contains the scalar entries of the state. Engines can add
+        their convergence metrics.
+        """
+        return {
+            key: value for key, value in state.items() if isinstance(value, (bool, int, float, str))
+        }
+
     @property
     @abstractmethod
     def is_finished(self) -> bool:
@@ -72,11 +114,65 @@ class OptimizationEngineImpl:
         """
         return self.is_finished
 
-    def create_inputs(self):
+    def set_budget(
+        self,
+        *,
+        max_evaluations: ty.Optional[int] = None,
+        max_walltime: ty.Optional[float] = None,
+        max_stagnation: ty.Optional[int] = None,
+    ) -> None:
+        """
+        Set stopping rules which apply in addition to the engine's own
+        convergence criteria. When one of them is reached, the optimization
+        stops and the best result found so far is returned.
+
+        :param max_evaluations: Maximum number of finished evaluations.
+        :param max_walltime: Maximum wall-clock time in seconds, counted from this call.
+        :param max_stagnation: Maximum number of evaluations without a change of the optimal evaluation.
+        """
+        self._budget = Budget(
+            max_evaluations=max_evaluations,
+            max_walltime=max_walltime,
+            max_stagnation=max_stagnation,
+            start_time=time.time() if max_walltime is not None else None,
+        )
+
+    @property
+    def stop_reason(self) -> ty.Optional[str]:
+        """
+        Returns 'finished' if the engine is finished, the name of the
+        exhausted budget if the optimization was stopped by one of the
+        rules given in :meth:`set_budget`, or None if it continues.
+        """
+        # Once a budget is exhausted, the remaining evaluations are
+        # dropped, which can make the engine appear finished.
+        if self._budget.exhausted is not None:
+            return self._budget.exhausted
+        if self.is_finished:
+            return "finished"
+        return self._budget.exhausted_budget
+
+    @property
+    def accepts_partial_updates(self) -> bool:
+        """
+        Returns true if the engine can be updated with the outputs of only
+        some of the launched evaluations, and create new inputs while other
+        evaluations are still running. If false (the default), the engine is
+        only updated once all launched evaluations have finished.
+        """
+        return False
+
+    def create_inputs(self, duplicate_tolerance: ty.Optional[float] = None):
         """
         Creates the inputs and adds them to the result mapping.
+
+        If a ``duplicate_tolerance`` is given, inputs which are equal to
+        the input of a finished evaluation within this tolerance can be
+        looked up with :meth:`get_duplicate_key`.
         """
-        return self._result_mapping.add_inputs(self._create_inputs())
+        return self._result_mapping.add_inputs(
+            self._create_inputs(), duplicate_tolerance=duplicate_tolerance
+        )
 
     @abstractmethod
     def _create_inputs(self):
@@ -84,12 +180,49 @@ class OptimizationEngineImpl:
         Creates the inputs for evaluations that need to be launched. This function needs to be implemented by child classes.
         """
 
+    def get_inputs(self, key: int) -> ty.Dict[str, ty.Any]:
+        """
+        Returns the inputs that were created for the evaluation with the given key.
+        """
+        return self._result_mapping[key].input
+
+    def get_duplicate_key(self, key: int) -> ty.Optional[int]:
+        """
+        Returns the key of a finished evaluation whose input is equal to
+        the input of the given evaluation, within the tolerance passed to
+        :meth:`create_inputs`, or None if there is no such evaluation.
+        """
+        return self._result_mapping[key].duplicate_of
+
+    def drop(self, keys: ty.Iterable[int]) -> None:
+        """
+        Drops the evaluations with the given keys, such that the engine
+        continues without their outputs. This is only supported by engines
+        which accept partial updates.
+        """
+        self._result_mapping.drop(keys)
+
+    def get_obsolete_keys(self) -> ty.List[int]:
+        """
+        Returns the keys of evaluations whose outputs are no longer needed
+        by the engine. The workchain cancels these evaluations, and drops
+        them from the results. By default, all evaluations which have not
+        finished yet are obsolete once the engine is finished.
+        """
+        if self.stop_reason is None:
+            return []
+        return [key for key, res in self._result_mapping.items() if res.output is None]
+
     def update(self, outputs) -> None:
         """
         Updates the result mapping and engine instance with the evaluation outputs.
         """
         self._result_mapping.add_outputs(outputs)
         self._update(outputs)
+        self._budget.register(
+            len(outputs),
+            best_index=self.result_index if outputs and self._budget.tracks_improvement else None,
+        )
 
     @abstractmethod
     def _update(self, outputs: ty.Dict[int, ty.Any]) -> None:
@@ -160,4 +293,13 @@ class OptimizationEngineWrapper:
 
     @classmethod
     def from_state(cls, state, logger):
-        return cls._IMPL_CLASS(logger=logger, **state)
+        return cls._IMPL_CLASS.from_state(dict(state, logger=logger))
+
+    @classmethod
+    def get_input_keys(cls, engine_kwargs: ty.Dict[str, ty.Any]) -> ty.Set[str]:
+        """
+        Returns the keys of the evaluation inputs which the engine sets,
+        when created with the given keyword arguments. By default, this is
+        the 'input_key' argument, if it is given.
+        """
+        return {engine_kwargs["input_key"]} if "input_key" in engine_kwargs else set()
@@ -2,12 +2,21 @@
 """Defines helper functions for using `aiida-optimize`.
 """
 
+import datetime
 import typing as ty
 
 from aiida import orm
+from aiida.common.links import LinkType
 from aiida.orm.nodes.data.base import to_aiida_type
+import numpy as np
 
-__all__ = ("get_nested_result",)
+from ._utils import _ARRAY_NAME, _get_vector, _load_nodes
+
+__all__ = ("get_nested_result", "get_optimization_history", "OptimizationHistory")
+
+#: Labels of the calcfunctions which the OptimizationWorkChain calls
+#: besides the evaluations.
+_HELPER_PROCESS_LABELS = ("create_penalty_output", "split_batch_outputs")
 
 
 def get_nested_result(output: ty.Dict[str, orm.Node], key: str) -> orm.Node:
@@ -62,3 +71,193 @@ def get_nested_result(output: ty.Dict[str, orm.Node], key: str) -> orm.Node:
         result = node  # type: ignore
 
     return result
+
+
+class OptimizationHistory(ty.NamedTuple):
+    """
+    History of the evaluations of an optimization, as returned by
+    :func:`get_optimization_history`. The entries of all arrays
+    correspond to each other, and are sorted by evaluation index.
+    """
+
+    #: Index of the evaluation within the optimization.
+    index: np.ndarray
+    #: Input values, with one row per evaluation for vector inputs.
+    inputs: np.ndarray
+    #: Result values, or NaN for evaluations which did not finish ok.
+    results: np.ndarray
+    #: Creation time of the evaluations, in UTC.
+    ctime: np.ndarray
+    #: Last modification time of the evaluations, in UTC.
+    mtime: np.ndarray
+
+
+def get_optimization_history(
+    workchain: orm.WorkflowNode, input_key: str, result_key: str = "result"
+) -> OptimizationHistory:
+    """Return the history of an optimization as NumPy arrays.
+
+    The evaluations, their inputs and their results are fetched with one
+    query each, instead of loading every evaluation. Evaluations which
+    were re-used from other optimizations are not part of the history.
+    Batch evaluations (see the ``evaluation_batch_size`` input) are
+    expanded into one entry per point.
+
+    Parameters
+    ----------
+    workchain :
+        The node of the ``OptimizationWorkChain``.
+    input_key :
+        The name of the evaluation input which is varied.
+    result_key :
+        The key of the evaluation output which is optimized, in the
+        nested key syntax of :func:`get_nested_result`.
+
+    Returns
+    -------
+    OptimizationHistory :
+        The index, inputs, results, and timestamps of the evaluations.
+    """
+    query = orm.QueryBuilder()
+    query.append(orm.WorkflowNode, filters={"id": workchain.pk}, tag="optimization")
+    query.append(
+        orm.ProcessNode,
+        with_incoming="optimization",
+        filters={"attributes.process_label": {"!in": list(_HELPER_PROCESS_LABELS)}},
+        project=[
+            "id",
+            "ctime",
+            "mtime",
+            "extras.optimize_evaluation_index",
+            "attributes.exit_status",
+        ],
+    )
+    evaluations = query.all()
+    pks = [pk for pk, *_ in evaluations]
+    if not pks:
+        empty = np.array([])
+        return OptimizationHistory(
+            index=empty.astype(int),
+            inputs=empty,
+            results=empty,
+            ctime=empty.astype("datetime64[us]"),
+            mtime=empty.astype("datetime64[us]"),
+        )
+
+    inputs, results = _get_history_values(pks, input_key, result_key)
+    points = _get_history_points(
+        evaluations, inputs, results, is_batch="evaluation_batch_size" in workchain.inputs
+    )
+    # Evaluations which are not tagged with their index are numbered in
+    # the order in which they were created.
+    rows = sorted(
+        ((i if index is None else index, *rest) for i, (index, *rest) in enumerate(points)),
+        key=lambda row: row[:2],
+    )
+    return OptimizationHistory(
+        index=np.array([row[0] for row in rows], dtype=int),
+        inputs=np.array([row[3] for row in rows]),
+        results=np.array([row[4] for row in rows], dtype=float),
+        ctime=np.array([_to_datetime64(row[1]) for row in rows]),
+        mtime=np.array([_to_datetime64(row[2]) for row in rows]),
+    )
+
+
+def _get_history_values(pks, input_key, result_key):
+    """
+    Returns the input and result values of the evaluations with the given
+    PKs, as dictionaries mapping the PK to the value.
+    """
+    input_label = input_key.replace(".", "__")
+    inputs = _get_linked_values(
+        pks,
+        relationship="with_outgoing",
+        link_types=(LinkType.INPUT_CALC, LinkType.INPUT_WORK),
+        # Evaluations submitted through the RunProcessFunctionWorkChain
+        # receive the inputs in the 'function_inputs' namespace.
+        link_labels=[input_label, f"function_inputs__{input_label}"],
+    )
+    if ":" in result_key:
+        output_label, dict_key = result_key.split(":")
+    else:
+        output_label, dict_key = result_key, None
+    results = _get_linked_values(
+        pks,
+        relationship="with_incoming",
+        link_types=(LinkType.RETURN, LinkType.CREATE),
+        link_labels=[output_label.replace(".", "__")],
+        dict_key=dict_key,
+    )
+    return inputs, results
+
+
+def _get_history_points(evaluations, inputs, results, is_batch):
+    """
+    Returns the (index, ctime, mtime, input, result) tuples of the given
+    evaluations, in the order in which they were created. Batch
+    evaluations are expanded into one tuple per point.
+    """
+    points = []
+    for pk, ctime, mtime, index, exit_status in sorted(evaluations, key=lambda e: e[1]):
+        input_value = inputs.get(pk, np.nan)
+        result = results.get(pk, np.nan) if exit_status == 0 else np.nan
+        if not is_batch:
+            points.append((index, ctime, mtime, input_value, result))
+            continue
+        # The inputs and array outputs of batch evaluations contain one
+        # row per point, and their index extra is the list of the indices.
+        if index is None:
+            index = [None] * (len(input_value) if np.ndim(input_value) > 0 else 1)
+        for pos, point_index in enumerate(index):
+            points.append(
+                (
+                    point_index,
+                    ctime,
+                    mtime,
+                    input_value[pos] if np.ndim(input_value) > 0 else input_value,
+                    result[pos] if np.ndim(result) > 0 else result,
+                )
+            )
+    return points
+
+
+def _get_linked_values(pks, relationship, link_types, link_labels, dict_key=None):
+    """
+    Returns the values of the nodes linked to the processes with the
+    given PKs, with one of the given link types and labels. The
+    relationship is 'with_outgoing' for inputs and 'with_incoming' for
+    outputs of the processes.
+    """
+    query = orm.QueryBuilder()
+    query.append(orm.ProcessNode, filters={"id": {"in": pks}}, project=["id"], tag="process")
+    query.append(
+        orm.Data,
+        **{relationship: "process"},
+        edge_filters={
+            "type": {"in": [link_type.value for link_type in link_types]},
+            "label": {"in": link_labels},
+        },
+        project=["attributes", "id"],
+    )
+    res = {}
+    # The values of ArrayData nodes are not stored in the attributes,
+    # these nodes are loaded after the query.
+    array_pks = {}
+    for pk, attributes, node_pk in query.iterall():
+        if dict_key is None and f"array|{_ARRAY_NAME}" in attributes:
+            array_pks[pk] = node_pk
+            continue
+        if dict_key is None:
+            value = attributes.get("value", attributes.get("list"))
+        else:
+            value = attributes
+            for key_part in dict_key.split("."):
+                value = value[key_part]
+        res[pk] = value
+    array_nodes = _load_nodes(array_pks.values())
+    res.update({pk: _get_vector(array_nodes[node_pk]) for pk, node_pk in array_pks.items()})
+    return res
+
+
+def _to_datetime64(time: datetime.datetime) -> np.datetime64:
+    return np.datetime64(time.astimezone(datetime.timezone.utc).replace(tzinfo=None), "us")
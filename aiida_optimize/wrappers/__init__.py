@@ -7,5 +7,11 @@ a format compatible with the optimization procedure.
 from ._add_inputs import AddInputsWorkChain
 from ._concatenate import ConcatenateWorkChain
 from ._create_evaluate import CreateEvaluateWorkChain
+from ._run_process_function import RunProcessFunctionWorkChain
 
-__all__ = ["CreateEvaluateWorkChain", "AddInputsWorkChain", "ConcatenateWorkChain"]
+__all__ = [
+    "CreateEvaluateWorkChain",
+    "AddInputsWorkChain",
+    "ConcatenateWorkChain",
+    "RunProcessFunctionWorkChain",
+]
@@ -9,15 +9,37 @@ import typing as ty
 from aiida import orm
 from aiida.engine import Process, WorkChain, run_get_node, utils
 
+from ._run_process_function import RunProcessFunctionWorkChain
+
 
 class RunOrSubmitWorkChain(WorkChain):
     """
     Adds a 'run_or_submit' method to the WorkChain class, which uses
     'run' for process functions and 'submit' else.
+
+    If the 'submit_process_functions' input is set, process functions
+    are instead submitted wrapped in a :class:`.RunProcessFunctionWorkChain`,
+    such that multiple process functions can run concurrently.
     """
 
+    @classmethod
+    def define(cls, spec):
+        super().define(spec)
+
+        spec.input(
+            "submit_process_functions",
+            valid_type=orm.Bool,
+            default=lambda: orm.Bool(False),
+            help="Submit process functions wrapped in a workchain instead of running them "
+            "directly, such that multiple process functions can run concurrently.",
+        )
+
     def run_or_submit(self, proc: ty.Type[Process], **kwargs: ty.Any) -> orm.ProcessNode:
         if utils.is_process_function(proc):
+            if self.inputs.submit_process_functions.value:
+                return self.submit(
+                    RunProcessFunctionWorkChain, process_function=proc, function_inputs=kwargs
+                )
             _, node = run_get_node(proc, **kwargs)
             return node
         return self.submit(proc, **kwargs)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Defines a workchain which runs a process function, such that it can be
+submitted instead of being run in the step of the calling workchain.
+"""
+
+from aiida.engine import WorkChain, run_get_node
+
+from .._utils import _get_outputs_dict
+from ..process_inputs import PROCESS_INPUT_KWARGS, load_object
+
+__all__ = ("RunProcessFunctionWorkChain",)
+
+
+class RunProcessFunctionWorkChain(WorkChain):
+    """
+    Wrapper workchain which runs a process function (calcfunction or
+    workfunction). Process functions cannot be submitted, and running them
+    blocks the workchain step they are called from. Submitting this
+    wrapper instead allows running several process functions concurrently,
+    for example on different daemon workers.
+
+    The outputs of the wrapper workchain are the same as those of the
+    process function.
+    """
+
+    @classmethod
+    def define(cls, spec):
+        super().define(spec)
+
+        spec.input(
+            "process_function",
+            **PROCESS_INPUT_KWARGS,
+            help="The process function which should be run.",
+        )
+        spec.input_namespace(
+            "function_inputs",
+            dynamic=True,
+            required=False,
+            help="Inputs to be passed on to the process function.",
+        )
+
+        spec.exit_code(
+            201,
+            "ERROR_SUB_PROCESS_FAILED",
+            message="Workchain failed because the process function did not finish ok.",
+        )
+
+        spec.outputs.dynamic = True
+
+        spec.outline(cls.run_function)
+
+    def run_function(self):  # pylint: disable=inconsistent-return-statements
+        """
+        Run the process function, and forward its outputs.
+        """
+        self.report(f"Running process function '{self.inputs.process_function.value}'.")
+        _, node = run_get_node(
+            load_object(self.inputs.process_function.value),
+            **self.inputs.get("function_inputs", {}),
+        )
+        self.out_many(_get_outputs_dict(node))
+        if not node.is_finished_ok:
+            return self.exit_codes.ERROR_SUB_PROCESS_FAILED
@@ -35,13 +35,14 @@ def run_optimization():  # pylint: disable=unused-argument
     """
 
     def inner(
-        engine, func_workchain, engine_kwargs, evaluate=None
+        engine, func_workchain, engine_kwargs, evaluate=None, workchain_inputs=None
     ):  # pylint: disable=missing-docstring,useless-suppression
         inputs = dict(
             engine=engine,
             engine_kwargs=orm.Dict(dict=dict(engine_kwargs)),
             evaluate_process=func_workchain,
             evaluate=evaluate if evaluate is not None else {},
+            **(workchain_inputs or {}),
         )
 
         _, result_node = run_get_node(OptimizationWorkChain, **inputs)
@@ -70,6 +71,7 @@ def check_optimization(
         evaluate=None,
         input_getter=operator.attrgetter("x"),
         output_port_names=None,
+        workchain_inputs=None,
     ):
         func_workchain = getattr(sample_processes, func_workchain_name)
 
@@ -78,6 +80,7 @@ def check_optimization(
             engine_kwargs=ChainMap(engine_kwargs, {"result_key": "result"}),
             func_workchain=func_workchain,
             evaluate=evaluate,
+            workchain_inputs=workchain_inputs,
         )
 
         assert "optimal_process_uuid" in result_node.outputs
@@ -95,6 +98,8 @@ def check_optimization(
             optimal_process_input = optimal_process_input_node.value
         elif isinstance(optimal_process_input_node, orm.List):
             optimal_process_input = optimal_process_input_node.get_list()
+        elif isinstance(optimal_process_input_node, orm.ArrayData):
+            optimal_process_input = optimal_process_input_node.get_array("values")
         else:
             optimal_process_input = optimal_process_input_node
 
@@ -129,6 +134,7 @@ def check_error(
         exit_status,
         evaluate=None,
         output_port_names=None,
+        workchain_inputs=None,
     ):
         func_workchain = getattr(sample_processes, func_workchain_name)
 
@@ -137,6 +143,7 @@ def check_error(
             engine_kwargs=ChainMap(engine_kwargs, {"result_key": "result"}),
             func_workchain=func_workchain,
             evaluate=evaluate,
+            workchain_inputs=workchain_inputs,
         )
 
         assert result_node.exit_status == exit_status
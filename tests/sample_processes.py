@@ -9,7 +9,7 @@ Defines simple processes which are used in the tests.
 import copy
 
 from aiida import orm
-from aiida.engine import WorkChain, calcfunction, workfunction
+from aiida.engine import ToContext, WorkChain, calcfunction, if_, workfunction
 import numpy as np
 import scipy.linalg as la
 
@@ -32,6 +32,24 @@ class Echo(WorkChain):
         self.out("result", self.inputs.x)
 
 
+class EchoScaled(WorkChain):
+    """
+    WorkChain which returns the input, multiplied by an optional scale.
+    """
+
+    @classmethod
+    def define(cls, spec):
+        super().define(spec)
+
+        spec.input("x", valid_type=orm.Float)
+        spec.input("scale", valid_type=orm.Float, default=lambda: orm.Float(1.0))
+        spec.output("result", valid_type=orm.Float)
+        spec.outline(cls.echo)
+
+    def echo(self):
+        self.out("result", orm.Float(self.inputs.x.value * self.inputs.scale.value).store())
+
+
 @workfunction
 def echo_workfunction(x):
     return x
@@ -150,6 +168,11 @@ class Norm(WorkChain):
         self.out("result", res)
 
 
+@calcfunction
+def array_norm(x):
+    return orm.Float(la.norm(x.get_array("values")))
+
+
 @workfunction
 def sin_list(x):
     return orm.Float(np.sin(list(x)[0])).store()
@@ -186,3 +209,139 @@ class X2Y2(WorkChain):
             "result",
             orm.Float(self.inputs.x.get_list()[0] ** 2 + self.inputs.x.get_list()[1] ** 2).store(),
         )
+
+
+class EchoDelayed(WorkChain):
+    """
+    WorkChain which returns the input through a chain of 'num_steps' nested
+    sub-processes, such that evaluations finish in a different order.
+    """
+
+    @classmethod
+    def define(cls, spec):
+        super().define(spec)
+
+        spec.input("x", valid_type=orm.Float)
+        spec.input("num_steps", valid_type=orm.Int)
+        spec.output("result", valid_type=orm.Float)
+        spec.outline(if_(cls.has_steps)(cls.run_nested), cls.echo)
+
+    def has_steps(self):
+        return self.inputs.num_steps.value > 0
+
+    def run_nested(self):
+        return ToContext(
+            nested=self.submit(
+                EchoDelayed, x=self.inputs.x, num_steps=orm.Int(self.inputs.num_steps.value - 1)
+            )
+        )
+
+    def echo(self):
+        self.out("result", self.inputs.x)
+
+
+RECORDED_CONCURRENCY = []
+
+
+class EchoConcurrency(EchoDelayed):
+    """
+    Variant of EchoDelayed which records how many evaluations of the
+    optimization which called it are running at the same time.
+    """
+
+    def echo(self):
+        RECORDED_CONCURRENCY.append(sum(not node.is_terminated for node in self.node.caller.called))
+        super().echo()
+
+
+class FailNegative(WorkChain):
+    """
+    WorkChain which returns the input, but fails for negative inputs.
+    """
+
+    @classmethod
+    def define(cls, spec):
+        super().define(spec)
+
+        spec.input("x", valid_type=orm.Float)
+        spec.output("result", valid_type=orm.Float)
+        spec.exit_code(400, "ERROR_NEGATIVE_INPUT", message="The input is negative.")
+        spec.outline(cls.echo)
+
+    def echo(self):  # pylint: disable=inconsistent-return-statements
+        if self.inputs.x.value < 0:
+            return self.exit_codes.ERROR_NEGATIVE_INPUT
+        self.out("result", self.inputs.x)
+
+
+#: Status of the calling optimization, recorded by the EchoStatus workchain.
+RECORDED_STATUS = []
+
+
+class EchoStatus(WorkChain):
+    """
+    WorkChain which returns the input, and records the status of the
+    optimization which called it.
+    """
+
+    @classmethod
+    def define(cls, spec):
+        super().define(spec)
+
+        spec.input("x", valid_type=orm.Float)
+        spec.output("result", valid_type=orm.Float)
+        spec.outline(cls.echo)
+
+    def echo(self):
+        from aiida_optimize._status import get_status  # pylint: disable=import-outside-toplevel
+
+        RECORDED_STATUS.append(get_status(self.node.caller))
+        self.out("result", self.inputs.x)
+
+
+@calcfunction
+def batch_norm(x):
+    """
+    Calculates the norm of each row of the stacked input.
+    """
+    res = orm.ArrayData()
+    res.set_array("values", la.norm(x.get_array("values"), axis=-1))
+    return {"result": res, "num_points": orm.Int(len(res.get_array("values")))}
+
+
+@calcfunction
+def batch_echo(x):
+    """
+    Returns the stacked input.
+    """
+    res = orm.ArrayData()
+    res.set_array("values", x.get_array("values"))
+    return {"result": res}
+
+
+class BatchEchoDelayed(WorkChain):
+    """
+    WorkChain which returns the stacked input after a chain of nested
+    sub-processes, whose length is the largest of the stacked 'num_steps'.
+    """
+
+    @classmethod
+    def define(cls, spec):
+        super().define(spec)
+
+        spec.input("x", valid_type=orm.ArrayData)
+        spec.input("num_steps", valid_type=orm.ArrayData)
+        spec.output("result", valid_type=orm.ArrayData)
+        spec.outline(if_(cls.has_steps)(cls.run_nested), cls.echo)
+
+    def has_steps(self):
+        return self.inputs.num_steps.get_array("values").max() > 0
+
+    def run_nested(self):
+        num_steps = int(self.inputs.num_steps.get_array("values").max())
+        return ToContext(
+            nested=self.submit(EchoDelayed, x=orm.Float(0), num_steps=orm.Int(num_steps - 1))
+        )
+
+    def echo(self):
+        self.out("result", self.inputs.x)
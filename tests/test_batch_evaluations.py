@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for evaluating several points in one evaluation process.
+"""
+
+from aiida import orm
+from aiida.engine.runners import Runner
+import numpy as np
+import pytest
+
+from aiida_optimize._batch import stack_inputs
+from aiida_optimize.engines import Convergence, ParameterSweep, ParticleSwarm
+import sample_processes
+
+
+@pytest.mark.parametrize("max_concurrent", [None, 1])
+def test_batch_parameter_sweep(run_optimization, max_concurrent):
+    """
+    Check a parameter sweep whose points are evaluated in batches.
+    """
+    workchain_inputs = {"evaluation_batch_size": orm.Int(2), "index_evaluations": orm.Bool(True)}
+    if max_concurrent is not None:
+        workchain_inputs["max_concurrent_evaluations"] = orm.Int(max_concurrent)
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(parameters=[{"x": float(x)} for x in [3, 1, -2, 4, 0]]),
+        func_workchain=sample_processes.batch_echo,
+        workchain_inputs=workchain_inputs,
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.optimal_process_output.value == -2.0
+    assert result_node.outputs.optimal_process_input.value == -2.0
+    evaluations = [
+        node for node in result_node.called if node.process_class is sample_processes.batch_echo
+    ]
+    assert sorted(len(node.inputs.x.get_array("values")) for node in evaluations) == [1, 2, 2]
+    values = [3.0, 1.0, -2.0, 4.0, 0.0]
+    for node in evaluations:
+        extras = node.base.extras.all
+        objectives = [values[idx] for idx in extras["optimize_evaluation_index"]]
+        assert extras["optimize_batch_objectives"] == objectives
+        assert extras["optimize_objective"] == min(objectives)
+
+
+def test_batch_particle_swarm(run_optimization):
+    """
+    Check that evaluating a particle swarm in batches gives the same
+    result as evaluating each particle separately.
+    """
+    engine_kwargs = dict(
+        particles=[[1.0, 2.0], [-1.0, 0.5], [0.3, -0.2], [2.0, 2.0]],
+        max_iter=5,
+        result_key="result",
+        seed=3,
+    )
+    reference = run_optimization(
+        engine=ParticleSwarm,
+        engine_kwargs=engine_kwargs,
+        func_workchain=sample_processes.Norm,
+    )
+    result_node = run_optimization(
+        engine=ParticleSwarm,
+        engine_kwargs=engine_kwargs,
+        func_workchain=sample_processes.batch_norm,
+        workchain_inputs={"evaluation_batch_size": orm.Int(4)},
+    )
+    assert result_node.is_finished_ok
+    assert np.isclose(
+        result_node.outputs.optimal_process_output.value,
+        reference.outputs.optimal_process_output.value,
+    )
+    assert result_node.outputs.optimal_process_input.get_list() == pytest.approx(
+        reference.outputs.optimal_process_input.get_list()
+    )
+    num_evaluations = len(
+        [node for node in result_node.called if node.process_class is sample_processes.batch_norm]
+    )
+    assert (
+        num_evaluations
+        == len([node for node in reference.called if node.process_class is sample_processes.Norm])
+        // 4
+    )
+
+
+def test_batch_duplicate_tolerance(run_optimization):
+    """
+    Check that points which duplicate a point of a finished batch re-use
+    the outputs of that point.
+    """
+    result_node = run_optimization(
+        engine=Convergence,
+        engine_kwargs={
+            "input_values": [0.0, 5.0, 0.0, 5.0, 5.0],
+            "tol": 1e-1,
+            "input_key": "x",
+            "result_key": "result",
+            "convergence_window": 2,
+        },
+        func_workchain=sample_processes.batch_echo,
+        workchain_inputs={
+            "evaluation_batch_size": orm.Int(1),
+            "duplicate_tolerance": orm.Float(1e-6),
+        },
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.optimal_process_output.value == 5.0
+    assert result_node.outputs.engine_outputs.num_avoided_evaluations.value == 3
+    evaluations = [
+        node for node in result_node.called if node.process_class is sample_processes.batch_echo
+    ]
+    assert len(evaluations) == 2
+
+
+def test_batch_cancel(run_optimization, monkeypatch):
+    """
+    Check that an obsolete batch evaluation is killed once, and not once
+    per point.
+    """
+    killed = []
+
+    class Controller:  # pylint: disable=too-few-public-methods
+        def kill_process(self, pid, msg=None):  # pylint: disable=unused-argument
+            killed.append(pid)
+
+    monkeypatch.setattr(Runner, "controller", property(lambda self: Controller()))
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(
+            parameters=[
+                {"x": -2.0, "num_steps": 0},
+                {"x": -3.0, "num_steps": 0},
+                {"x": -4.0, "num_steps": 10},
+                {"x": -5.0, "num_steps": 10},
+            ],
+            result_key="result",
+            stop_below=-1.0,
+        ),
+        func_workchain=sample_processes.BatchEchoDelayed,
+        workchain_inputs={
+            "evaluation_batch_size": orm.Int(2),
+            "stream_evaluations": orm.Bool(True),
+        },
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.optimal_process_output.value == -3.0
+    (cancelled,) = [orm.load_node(uuid) for uuid in result_node.outputs.cancelled_evaluations]
+    assert killed == [cancelled.pk]
+    assert cancelled.inputs.x.get_array("values").tolist() == [-4.0, -5.0]
+
+
+@pytest.mark.parametrize(
+    ["engine", "engine_kwargs"],
+    [
+        (ParameterSweep, dict(parameters=[{"x:a": 1.0}])),
+        (ParticleSwarm, dict(particles=[[1.0], [2.0]], input_key="x:a")),
+    ],
+)
+def test_batch_nested_keys(run_optimization, engine, engine_kwargs):
+    """
+    Check that batch evaluations are rejected for keys inside a Dict input.
+    """
+    with pytest.raises(ValueError, match="nested keys"):
+        run_optimization(
+            engine=engine,
+            engine_kwargs=engine_kwargs,
+            func_workchain=sample_processes.batch_echo,
+            workchain_inputs={"evaluation_batch_size": orm.Int(2)},
+        )
+
+
+def test_stack_nested_keys():
+    """
+    Check that inputs inside a Dict input cannot be stacked.
+    """
+    with pytest.raises(ValueError, match="x:a"):
+        stack_inputs([{"x:a": orm.Float(1.0)}, {"x:a": orm.Float(2.0)}])
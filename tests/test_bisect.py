@@ -8,6 +8,7 @@ Tests for the OptimizationWorkChain.
 
 import operator
 
+from aiida import orm
 import pytest
 
 from aiida_optimize.engines import Bisection
@@ -171,3 +172,22 @@ def test_multiple_input_keys(check_optimization):
         x_exact=0.0,
         f_exact=0.0,
     )
+
+
+def test_bisect_stream(check_optimization):
+    """
+    Test that streaming evaluations has no effect for engines which do not
+    accept partial updates.
+    """
+
+    tol = 1e-1
+    check_optimization(
+        engine=Bisection,
+        engine_kwargs=dict(lower=-1.1, upper=1.0, tol=tol),
+        func_workchain_name="Echo",
+        xtol=tol,
+        ftol=tol,
+        x_exact=0.0,
+        f_exact=0.0,
+        workchain_inputs={"stream_evaluations": orm.Bool(True)},
+    )
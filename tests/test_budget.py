@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the evaluation, wall-time and stagnation budgets of the engines.
+"""
+
+from aiida import orm
+import pytest
+
+from aiida_optimize.engines import Bisection, NelderMead, ParameterSweep
+from aiida_optimize.engines.base import OptimizationEngineImpl, OptimizationEngineWrapper
+import sample_processes
+
+
+class _GridImpl(OptimizationEngineImpl):
+    """
+    Engine written like the tutorial: its state is created from
+    '__dict__', and its constructor does not know about the budget.
+    """
+
+    def __init__(self, values, logger, result_state=None):
+        super().__init__(logger=logger, result_state=result_state)
+        self.values = values
+
+    @property
+    def _state(self):
+        return {k: v for k, v in self.__dict__.items() if k not in ["_result_mapping", "_logger"]}
+
+    @property
+    def is_finished(self):
+        return self._result_mapping.num_created == len(self.values) and all(
+            res.output is not None for res in self._result_mapping.values()
+        )
+
+    def _create_inputs(self):
+        # Evaluate one value at a time.
+        if any(res.output is None for res in self._result_mapping.values()):
+            return []
+        return [{"x": orm.Float(x)} for x in self.values[self._result_mapping.num_created :][:1]]
+
+    def _update(self, outputs):
+        pass
+
+    def _get_optimal_result(self):
+        index, res = min(self._result_mapping.items(), key=lambda item: item[1].output["result"])
+        return index, res.input["x"], res.output["result"]
+
+
+class Grid(OptimizationEngineWrapper):
+    """
+    Wrapper for the tutorial-style engine.
+    """
+
+    _IMPL_CLASS = _GridImpl
+
+    def __new__(cls, values, logger=None, **budget):  # pylint: disable=arguments-differ
+        engine = cls._IMPL_CLASS(values=values, logger=logger)
+        engine.set_budget(**budget)
+        return engine
+
+
+def test_no_budget(run_optimization):
+    """
+    Check the stop reason of an optimization without budget.
+    """
+    result_node = run_optimization(
+        engine=Bisection,
+        engine_kwargs=dict(lower=-1.1, upper=1.0, tol=1e-1, result_key="result"),
+        func_workchain=sample_processes.Echo,
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.engine_outputs.stop_reason.value == "finished"
+
+
+def test_max_evaluations(run_optimization):
+    """
+    Check that the optimization stops after the maximum number of evaluations.
+    """
+    result_node = run_optimization(
+        engine=NelderMead,
+        engine_kwargs=dict(
+            simplex=[[1.2, 0.9], [1.0, 2.0], [2.0, 1.0]],
+            xtol=1e-3,
+            ftol=1e-3,
+            result_key="result",
+            max_evaluations=10,
+        ),
+        func_workchain=sample_processes.rosenbrock,
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.engine_outputs.stop_reason.value == "max_evaluations"
+    assert 10 <= len(result_node.called) <= 12
+    assert "optimal_process_output" in result_node.outputs
+
+
+def test_max_walltime(run_optimization):
+    """
+    Check that the optimization stops once the wall time is exceeded.
+    """
+    result_node = run_optimization(
+        engine=Bisection,
+        engine_kwargs=dict(lower=-1.1, upper=1.0, tol=1e-3, result_key="result", max_walltime=0),
+        func_workchain=sample_processes.Echo,
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.engine_outputs.stop_reason.value == "max_walltime"
+    assert len(result_node.called) == 2
+
+
+def test_max_stagnation(run_optimization):
+    """
+    Check that the optimization stops if the optimal evaluation does not
+    change, and that the remaining evaluations are not launched.
+    """
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(
+            parameters=[{"x": float(x)} for x in range(10)],
+            result_key="result",
+            max_stagnation=3,
+        ),
+        func_workchain=sample_processes.Echo,
+        workchain_inputs={
+            "stream_evaluations": orm.Bool(True),
+            "max_concurrent_evaluations": orm.Int(1),
+        },
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.engine_outputs.stop_reason.value == "max_stagnation"
+    assert len(result_node.called) == 4
+    assert result_node.outputs.optimal_process_output.value == 0
+
+
+def test_invalid_budget():
+    """
+    Check that unknown budget arguments are rejected.
+    """
+    with pytest.raises(TypeError):
+        Bisection(lower=0.0, upper=1.0, max_iterations=3)
+
+
+def test_budget_custom_engine_state():
+    """
+    Check that the budget is restored for an engine which does not accept
+    it as an argument, and which creates its state from '__dict__'.
+    """
+    engine = _GridImpl(values=[0.0, 1.0, 2.0], logger=None)
+    engine.set_budget(max_evaluations=2)
+    state = engine.state
+    assert "_budget" not in state
+    assert state["budget_state"]["max_evaluations"] == 2
+
+    restored = Grid.from_state(state, logger=None)
+    assert restored.state == state
+
+
+def test_budget_custom_engine(run_optimization):
+    """
+    Check that the budget of a tutorial-style engine is applied in the
+    workchain.
+    """
+    result_node = run_optimization(
+        engine=Grid,
+        engine_kwargs=dict(values=[3.0, 2.0, 1.0, 0.0], max_evaluations=2),
+        func_workchain=sample_processes.Echo,
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.engine_outputs.stop_reason.value == "max_evaluations"
+    assert result_node.outputs.optimal_process_output.value == 2.0
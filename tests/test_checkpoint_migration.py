@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for resuming workchains from checkpoints written with the previous
+outline of the OptimizationWorkChain.
+"""
+
+from aiida import orm
+from aiida.manage import get_manager
+import plumpy
+from plumpy.workchains import _Block, while_
+import pytest
+
+from aiida_optimize import OptimizationWorkChain
+from aiida_optimize.engines import Bisection
+import sample_processes
+
+
+def _get_legacy_stepper_state(workchain):
+    """
+    Create the saved stepper state of the previous outline, in which
+    the 'get_results' step is the next one to run.
+    """
+    legacy_outline = _Block(
+        [
+            OptimizationWorkChain.create_optimizer,
+            while_(OptimizationWorkChain.not_finished)(
+                OptimizationWorkChain.launch_evaluations, OptimizationWorkChain.get_results
+            ),
+            OptimizationWorkChain.finalize,
+        ]
+    )
+    stepper = legacy_outline.create_stepper(workchain)
+    stepper.next_instruction()
+    # pylint: disable=protected-access
+    stepper._child_stepper._child_stepper = legacy_outline[1].body.create_stepper(workchain)
+    stepper._child_stepper._child_stepper.next_instruction()
+    return stepper.save()
+
+
+@pytest.mark.usefixtures("aiida_profile_clean")
+def test_load_legacy_checkpoint():
+    """
+    Check that a checkpoint of the previous outline, without the inputs
+    and context entries added since, can be loaded.
+    """
+    runner = get_manager().get_runner()
+    process = runner.instantiate_process(
+        OptimizationWorkChain,
+        engine=Bisection,
+        engine_kwargs=orm.Dict(dict=dict(lower=-1.1, upper=1.0, tol=0.1)),
+        evaluate_process=sample_processes.Echo,
+    )
+    bundle = plumpy.Bundle(process)
+    parsed_inputs = dict(process.decode_input_args(bundle["INPUTS_PARSED"]))
+    del parsed_inputs["record_timings"]
+    del parsed_inputs["failure_policy"]
+    bundle["INPUTS_PARSED"] = process.encode_input_args(parsed_inputs)
+    bundle["stepper_state"] = _get_legacy_stepper_state(process)
+
+    loaded = bundle.unbundle(plumpy.LoadSaveContext(runner=runner))
+    stepper = loaded._stepper  # pylint: disable=protected-access
+    assert str(stepper) == "1:while_(not_finished)(0:get_results)"
+    # pylint: disable=protected-access
+    assert "record_timings" not in loaded.inputs
+    assert not loaded._get_input_value("record_timings")
+    assert loaded._get_input_value("failure_policy.action") == "abort"
+    assert loaded._get_input_value("failure_policy.max_retries") == 0
+    assert loaded.ctx.num_iterations == 0
+    assert loaded.ctx.evaluation_retries == {}
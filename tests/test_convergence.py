@@ -7,6 +7,7 @@ Tests for the Convergence engine.
 from aiida import orm
 
 from aiida_optimize.engines import Convergence
+import sample_processes
 
 
 def test_convergence_echo_wf(check_optimization):
@@ -72,3 +73,25 @@ def test_convergence_echo_wf_202(check_error):
         func_workchain_name="echo_workfunction",
         exit_status=202,
     )
+
+
+def test_convergence_duplicates(run_optimization):
+    """
+    Test that an input which duplicates a finished evaluation is not evaluated again.
+    """
+    result_node = run_optimization(
+        engine=Convergence,
+        engine_kwargs={
+            "input_values": [0, 1, 2, 2 + 1e-12, 3],
+            "tol": 1e-1,
+            "input_key": "x",
+            "result_key": "result",
+            "convergence_window": 2,
+        },
+        func_workchain=sample_processes.echo_workfunction,
+        workchain_inputs={"duplicate_tolerance": orm.Float(1e-9)},
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.optimal_process_output.value == 2
+    assert result_node.outputs.engine_outputs.num_avoided_evaluations.value == 1
+    assert len(result_node.called) == 3
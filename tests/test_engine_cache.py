@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests that the OptimizationWorkChain re-uses the engine instance between steps.
+"""
+
+from aiida_optimize.engines import Bisection
+
+
+class CountingBisection(Bisection):
+    """
+    Bisection engine which counts how often it is re-created from its state.
+    """
+
+    num_from_state = 0
+
+    @classmethod
+    def from_state(cls, state, logger):
+        cls.num_from_state += 1
+        return super().from_state(state=state, logger=logger)
+
+
+def test_engine_not_recreated(check_optimization):
+    """
+    Check that the engine is not re-created from its serialized state
+    while the workchain is running in the same Python process.
+    """
+    CountingBisection.num_from_state = 0
+    tol = 1e-1
+    check_optimization(
+        engine=CountingBisection,
+        engine_kwargs=dict(lower=-1.1, upper=1.0, tol=tol),
+        func_workchain_name="Echo",
+        xtol=tol,
+        ftol=tol,
+        x_exact=0.0,
+        f_exact=0.0,
+    )
+    assert CountingBisection.num_from_state == 0
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for profiling the engine calls of the OptimizationWorkChain.
+"""
+
+import pstats
+
+from aiida import orm
+
+from aiida_optimize.engines import Bisection
+import sample_processes
+
+
+def test_profile_engine(run_optimization, tmp_path):
+    """
+    Check that the engine profile is returned, and can be read with pstats.
+    """
+    result_node = run_optimization(
+        engine=Bisection,
+        engine_kwargs=dict(lower=-1.1, upper=1.0, tol=1e-1, result_key="result"),
+        func_workchain=sample_processes.Echo,
+        workchain_inputs={"profile_engine": orm.Bool(True)},
+    )
+    assert result_node.is_finished_ok
+    profile_file = tmp_path / "engine.pstats"
+    profile_file.write_bytes(result_node.outputs.engine_profile.get_content(mode="rb"))
+    stats = pstats.Stats(str(profile_file))
+    function_names = {name for _, _, name in stats.stats}
+    for name in ["_create_inputs", "_update", "_get_optimal_result", "state"]:
+        assert name in function_names
+
+
+def test_no_profile(run_optimization):
+    """
+    Check that no profile is returned by default.
+    """
+    result_node = run_optimization(
+        engine=Bisection,
+        engine_kwargs=dict(lower=-1.1, upper=1.0, tol=1e-1, result_key="result"),
+        func_workchain=sample_processes.Echo,
+    )
+    assert "engine_profile" not in result_node.outputs
+
+
+def test_profile_not_checkpointed(run_optimization, monkeypatch):
+    """
+    Check that the profile statistics are not part of the checkpoints.
+    """
+    checkpoints = []
+    set_checkpoint = orm.ProcessNode.set_checkpoint
+
+    def spy(self, checkpoint):
+        checkpoints.append(checkpoint)
+        return set_checkpoint(self, checkpoint)
+
+    monkeypatch.setattr(orm.ProcessNode, "set_checkpoint", spy)
+    result_node = run_optimization(
+        engine=Bisection,
+        engine_kwargs=dict(lower=-1.1, upper=1.0, tol=1e-1, result_key="result"),
+        func_workchain=sample_processes.Echo,
+        workchain_inputs={"profile_engine": orm.Bool(True)},
+    )
+    assert result_node.is_finished_ok
+    assert checkpoints
+    assert not any("engine_profile" in checkpoint for checkpoint in checkpoints)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for re-using evaluations across optimization runs.
+"""
+
+from aiida import orm
+import numpy as np
+import pytest
+
+from aiida_optimize.engines import ParameterSweep
+import sample_processes
+
+
+@pytest.fixture
+def run_sweep(run_optimization):
+    """
+    Runs a parameter sweep over the 'add' workfunction.
+    """
+
+    def inner(y=1.0, use_cache=True):
+        return run_optimization(
+            engine=ParameterSweep,
+            engine_kwargs=dict(
+                parameters=[{"x": x} for x in np.linspace(-2, 2, 5)], result_key="result"
+            ),
+            func_workchain=sample_processes.add,
+            evaluate={"y": orm.Float(y)},
+            workchain_inputs={"use_evaluation_cache": orm.Bool(use_cache)},
+        )
+
+    return inner
+
+
+def test_cache_hit(run_sweep):  # pylint: disable=redefined-outer-name
+    """
+    Test that a repeated optimization re-uses the evaluations of the first one.
+    """
+    first = run_sweep()
+    assert first.is_finished_ok
+    assert first.outputs.engine_outputs.num_cache_hits.value == 0
+    assert first.outputs.engine_outputs.num_cache_misses.value == 5
+    assert len(first.called) == 5
+
+    second = run_sweep()
+    assert second.is_finished_ok
+    assert second.outputs.engine_outputs.num_cache_hits.value == 5
+    assert second.outputs.engine_outputs.num_cache_misses.value == 0
+    assert not second.called
+    assert second.outputs.optimal_process_uuid.value == first.outputs.optimal_process_uuid.value
+    assert second.outputs.optimal_process_output.value == -1.0
+
+
+def test_cache_miss(run_sweep):  # pylint: disable=redefined-outer-name
+    """
+    Test that evaluations with different inputs are not re-used.
+    """
+    run_sweep(y=1.0)
+    second = run_sweep(y=2.0)
+    assert second.is_finished_ok
+    assert second.outputs.engine_outputs.num_cache_hits.value == 0
+    assert len(second.called) == 5
+
+
+def test_cache_disabled(run_sweep):  # pylint: disable=redefined-outer-name
+    """
+    Test that evaluations are not re-used unless the cache is enabled.
+    """
+    run_sweep()
+    second = run_sweep(use_cache=False)
+    assert second.is_finished_ok
+    assert len(second.called) == 5
+    assert "num_cache_hits" not in second.outputs.engine_outputs
+    # The evaluation hash is only computed if it is needed.
+    assert not any("optimize_evaluation_hash" in node.base.extras.keys() for node in second.called)
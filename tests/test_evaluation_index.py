@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for tagging the evaluations with extras and adding them to a group.
+"""
+
+from aiida import orm
+import pytest
+
+from aiida_optimize.engines import ParameterSweep
+import sample_processes
+
+
+@pytest.mark.parametrize("submit_process_functions", [False, True])
+def test_index_evaluations(run_optimization, submit_process_functions):
+    """
+    Check that the evaluations can be queried through their extras, and
+    are added to the group of the workchain.
+    """
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(parameters=[{"x": float(x)} for x in range(5)], result_key="result"),
+        func_workchain=sample_processes.echo_workfunction,
+        workchain_inputs={
+            "index_evaluations": orm.Bool(True),
+            "submit_process_functions": orm.Bool(submit_process_functions),
+        },
+    )
+    assert result_node.is_finished_ok
+
+    query = orm.QueryBuilder()
+    query.append(
+        orm.ProcessNode,
+        filters={
+            "extras.optimize_workchain_uuid": result_node.uuid,
+            "extras.optimize_objective": {"<": 2.5},
+        },
+        project=["extras.optimize_evaluation_index", "extras.optimize_iteration"],
+    )
+    assert sorted(query.all()) == [[0, 1], [1, 1], [2, 1]]
+
+    group = orm.load_group(label=f"aiida_optimize/{result_node.uuid}")
+    evaluations = [node for node in group.nodes if isinstance(node, orm.WorkFunctionNode)]
+    assert sorted(node.inputs.x.value for node in evaluations) == list(range(5))
+    assert len(group.nodes) == (10 if submit_process_functions else 5)
+
+
+def test_no_index_evaluations(run_optimization):
+    """
+    Check that no extras and no group are created by default.
+    """
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(parameters=[{"x": 1.0}], result_key="result"),
+        func_workchain=sample_processes.Echo,
+    )
+    assert result_node.is_finished_ok
+    assert "optimize_evaluation_index" not in result_node.called[0].base.extras
+    assert (
+        not orm.QueryBuilder()
+        .append(orm.Group, filters={"label": f"aiida_optimize/{result_node.uuid}"})
+        .count()
+    )
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the handling of failed evaluations.
+"""
+
+from aiida import orm
+import numpy as np
+import pytest
+
+from aiida_optimize.engines import NelderMead, ParameterSweep
+import sample_processes
+
+
+@pytest.fixture
+def sweep_parameters():
+    return [{"x": x} for x in np.linspace(-2, 2, 5)]
+
+
+def _get_evaluations(result_node):
+    return [
+        node for node in result_node.called if node.process_class is sample_processes.FailNegative
+    ]
+
+
+def test_abort(check_error, sweep_parameters):  # pylint: disable=redefined-outer-name
+    """
+    Test that the optimization fails by default if an evaluation fails.
+    """
+    check_error(
+        engine=ParameterSweep,
+        engine_kwargs=dict(parameters=sweep_parameters),
+        func_workchain_name="FailNegative",
+        exit_status=201,
+    )
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_penalty(
+    run_optimization, sweep_parameters, stream
+):  # pylint: disable=redefined-outer-name
+    """
+    Test that failed evaluations are assigned the penalty value.
+    """
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(parameters=sweep_parameters, result_key="result"),
+        func_workchain=sample_processes.FailNegative,
+        workchain_inputs={
+            "failure_policy": {"action": orm.Str("penalty"), "penalty_value": orm.Float(10.0)},
+            "stream_evaluations": orm.Bool(stream),
+        },
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.optimal_process_output.value == 0.0
+    assert result_node.outputs.engine_outputs.num_failed_evaluations.value == 2
+
+
+def test_penalty_nested_key(run_optimization):
+    """
+    Test the penalty action for a result key which points into a Dict.
+    """
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(parameters=[{"x": -1.0}], result_key="result:value"),
+        func_workchain=sample_processes.FailNegative,
+        workchain_inputs={
+            "failure_policy": {"action": orm.Str("penalty"), "penalty_value": orm.Float(10.0)}
+        },
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.optimal_process_output.value == 10.0
+    # The penalty is created by a calcfunction, such that it has provenance.
+    (penalty_proc,) = [
+        node for node in result_node.called if node.process_label == "create_penalty_output"
+    ]
+    assert penalty_proc.outputs.result.get_dict() == {"value": 10.0}
+
+
+def test_drop(run_optimization, sweep_parameters):  # pylint: disable=redefined-outer-name
+    """
+    Test that failed evaluations are dropped from the ParameterSweep.
+    """
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(parameters=sweep_parameters, result_key="result"),
+        func_workchain=sample_processes.FailNegative,
+        workchain_inputs={"failure_policy": {"action": orm.Str("drop")}},
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.optimal_process_output.value == 0.0
+    assert result_node.outputs.engine_outputs.num_failed_evaluations.value == 2
+    assert len(_get_evaluations(result_node)) == 5
+
+
+def test_drop_not_supported(check_error):
+    """
+    Test that the 'drop' action is rejected for engines which need all results.
+    """
+    check_error(
+        engine=NelderMead,
+        engine_kwargs=dict(simplex=[[1.2], [0.9]], xtol=1e-1, ftol=1e-1, input_key="x"),
+        func_workchain_name="FailNegative",
+        exit_status=203,
+        workchain_inputs={"failure_policy": {"action": orm.Str("drop")}},
+    )
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_retry(run_optimization, sweep_parameters, stream):  # pylint: disable=redefined-outer-name
+    """
+    Test that failed evaluations are retried before the penalty is assigned.
+    """
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(parameters=sweep_parameters, result_key="result"),
+        func_workchain=sample_processes.FailNegative,
+        workchain_inputs={
+            "failure_policy": {
+                "max_retries": orm.Int(2),
+                "action": orm.Str("penalty"),
+                "penalty_value": orm.Float(10.0),
+            },
+            "stream_evaluations": orm.Bool(stream),
+        },
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.optimal_process_output.value == 0.0
+    assert result_node.outputs.engine_outputs.num_failed_evaluations.value == 2
+    assert result_node.outputs.engine_outputs.num_evaluation_retries.value == 4
+    assert len(_get_evaluations(result_node)) == 9
+
+
+def test_retry_exit_codes(
+    run_optimization, sweep_parameters
+):  # pylint: disable=redefined-outer-name
+    """
+    Test that only evaluations failing with the given exit codes are retried.
+    """
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(parameters=sweep_parameters, result_key="result"),
+        func_workchain=sample_processes.FailNegative,
+        workchain_inputs={
+            "failure_policy": {
+                "max_retries": orm.Int(2),
+                "retry_exit_codes": orm.List(list=[401]),
+                "action": orm.Str("drop"),
+            },
+        },
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.engine_outputs.num_failed_evaluations.value == 2
+    assert len(_get_evaluations(result_node)) == 5
+
+
+def test_invalid_policy(run_optimization):
+    """
+    Test that the 'penalty' action without a penalty value is rejected.
+    """
+    with pytest.raises(ValueError):
+        run_optimization(
+            engine=ParameterSweep,
+            engine_kwargs=dict(parameters=[{"x": 1.0}], result_key="result"),
+            func_workchain=sample_processes.FailNegative,
+            workchain_inputs={"failure_policy": {"action": orm.Str("penalty")}},
+        )
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for extracting the history of an optimization as NumPy arrays.
+"""
+
+from aiida import orm
+import numpy as np
+import pytest
+
+from aiida_optimize.engines import NelderMead, ParameterSweep
+from aiida_optimize.helpers import get_optimization_history
+import sample_processes
+
+
+@pytest.mark.parametrize("action", ["drop", "penalty"])
+def test_history_parameter_sweep(run_optimization, action):
+    """
+    Check the history of a parameter sweep, including a failed evaluation.
+    """
+    failure_policy = {"action": orm.Str(action)}
+    if action == "penalty":
+        failure_policy["penalty_value"] = orm.Float(10.0)
+    values = [3.0, -1.0, 2.0, 1.0]
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(parameters=[{"x": x} for x in values], result_key="result"),
+        func_workchain=sample_processes.FailNegative,
+        workchain_inputs={"failure_policy": failure_policy},
+    )
+    assert result_node.is_finished_ok
+    history = get_optimization_history(result_node, input_key="x")
+    assert list(history.index) == [0, 1, 2, 3]
+    assert np.allclose(history.inputs, values)
+    assert np.allclose(history.results, [3.0, np.nan, 2.0, 1.0], equal_nan=True)
+    assert np.all(history.ctime <= history.mtime)
+    assert history.ctime.dtype == np.dtype("datetime64[us]")
+
+
+def test_history_vector_inputs(run_optimization):
+    """
+    Check the history of an optimization with vector inputs.
+    """
+    result_node = run_optimization(
+        engine=NelderMead,
+        engine_kwargs=dict(simplex=[[1.2, 0.9], [1.0, 2.0], [2.0, 1.0]], xtol=1e-1, ftol=1e-1),
+        func_workchain=sample_processes.rosenbrock,
+    )
+    history = get_optimization_history(result_node, input_key="x")
+    num_evaluations = len(result_node.called)
+    assert history.inputs.shape == (num_evaluations, 2)
+    assert list(history.index) == list(range(num_evaluations))
+    opt_index = int(np.argmin(history.results))
+    assert history.results[opt_index] == result_node.outputs.optimal_process_output.value
+    assert np.allclose(
+        history.inputs[opt_index], result_node.outputs.optimal_process_input.get_list()
+    )
+
+
+def test_history_wrapped(run_optimization):
+    """
+    Check the history when process functions are submitted wrapped.
+    """
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(parameters=[{"x": float(x)} for x in range(3)], result_key="result"),
+        func_workchain=sample_processes.echo_workfunction,
+        workchain_inputs={"submit_process_functions": orm.Bool(True)},
+    )
+    history = get_optimization_history(result_node, input_key="x")
+    assert np.allclose(history.inputs, [0.0, 1.0, 2.0])
+    assert np.allclose(history.results, [0.0, 1.0, 2.0])
+
+
+def test_history_array_inputs(run_optimization):
+    """
+    Check the history of an optimization with ArrayData inputs.
+    """
+    result_node = run_optimization(
+        engine=NelderMead,
+        engine_kwargs=dict(
+            simplex=[[1.2, 0.9], [1.0, 2.0], [2.0, 1.0]], xtol=1e-1, ftol=1e-1, array_input=True
+        ),
+        func_workchain=sample_processes.array_norm,
+    )
+    history = get_optimization_history(result_node, input_key="x")
+    assert history.inputs.shape == (len(result_node.called), 2)
+    opt_index = int(np.argmin(history.results))
+    assert np.allclose(
+        history.inputs[opt_index], result_node.outputs.optimal_process_input.get_array("values")
+    )
+
+
+@pytest.mark.parametrize("index_evaluations", [True, False])
+def test_history_batch(run_optimization, index_evaluations):
+    """
+    Check that batch evaluations are expanded into one entry per point.
+    """
+    values = [3.0, 1.0, -2.0, 4.0, 0.0]
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(parameters=[{"x": x} for x in values], result_key="result"),
+        func_workchain=sample_processes.batch_echo,
+        workchain_inputs={
+            "evaluation_batch_size": orm.Int(2),
+            "index_evaluations": orm.Bool(index_evaluations),
+        },
+    )
+    assert result_node.is_finished_ok
+    history = get_optimization_history(result_node, input_key="x")
+    assert list(history.index) == [0, 1, 2, 3, 4]
+    assert np.allclose(history.inputs, values)
+    assert np.allclose(history.results, values)
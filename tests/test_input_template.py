@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for merging evaluation inputs with nested keys into fixed inputs.
+"""
+
+from aiida import orm
+from aiida.engine import run_get_node
+import pytest
+
+from aiida_optimize import OptimizationWorkChain
+from aiida_optimize._utils import _InputTemplate, _merge_nested_keys
+from aiida_optimize.engines import ParameterSweep
+import sample_processes
+
+
+@pytest.mark.usefixtures("aiida_profile_clean")
+def test_merge_nested_keys():
+    """
+    Check that the values are merged into the target inputs, without
+    modifying them.
+    """
+    base = orm.Dict(dict={"b": {"c": 1.0, "d": 2.0}}).store()
+    y_node = orm.Float(3.0).store()
+    target = {"a": base, "x": {"y": y_node}}
+    res = _merge_nested_keys({"a:b.c": orm.Float(5.0), "a:e": 4, "x.z": 6.0}, target)
+    assert res["a"].get_dict() == {"b": {"c": 5.0, "d": 2.0}, "e": 4}
+    assert res["x"]["y"].pk == y_node.pk
+    assert res["x"]["z"].value == 6.0
+    assert target == {"a": base, "x": {"y": y_node}}
+    assert base.get_dict() == {"b": {"c": 1.0, "d": 2.0}}
+
+
+@pytest.mark.usefixtures("aiida_profile_clean")
+def test_merge_nested_keys_invalid():
+    with pytest.raises(ValueError):
+        _merge_nested_keys({"a:b:c": 1.0}, {})
+
+
+@pytest.mark.usefixtures("aiida_profile_clean")
+def test_input_template_reuses_dict():
+    """
+    Check that merged Dict nodes with identical content are re-used.
+    """
+    template = _InputTemplate({"a": orm.Dict(dict={"b": 1.0}).store()})
+    first, second, third = [template.merge({"a:c": value}) for value in [2.0, 2.0, 3.0]]
+    assert first["a"].is_stored
+    assert first["a"].pk == second["a"].pk
+    assert third["a"].pk != first["a"].pk
+    assert third["a"].get_dict() == {"b": 1.0, "c": 3.0}
+
+
+@pytest.mark.usefixtures("aiida_profile_clean")
+def test_evaluations_share_dict():
+    """
+    Check that evaluations whose merged Dict inputs are equal use the
+    same Dict node.
+    """
+    _, result_node = run_get_node(
+        OptimizationWorkChain,
+        engine=ParameterSweep,
+        engine_kwargs=orm.Dict(
+            dict=dict(parameters=[{"a:b.c": 1.0, "x": float(x)} for x in range(3)], result_key="x")
+        ),
+        evaluate_process=sample_processes.EchoDictValue,
+        evaluate={},
+    )
+    assert result_node.is_finished_ok
+    dict_pks = {node.inputs.a.pk for node in result_node.called}
+    assert len(result_node.called) == 3
+    assert len(dict_pks) == 1
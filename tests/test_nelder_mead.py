@@ -6,6 +6,9 @@
 Tests for the OptimizationWorkChain.
 """
 
+import logging
+
+from aiida import orm
 import numpy as np
 import pytest
 
@@ -95,3 +98,70 @@ def test_nelder_mead_max_iter(check_error):
             "engine_outputs__last_simplex",
         ],
     )
+
+
+def test_nelder_mead_max_concurrent(check_optimization):
+    """
+    Test the Nelder-Mead engine when only one evaluation may run at a time.
+    """
+
+    check_optimization(
+        engine=NelderMead,
+        engine_kwargs=dict(simplex=[[1.2, 0.9], [1.0, 2.0], [2.0, 1.0]], xtol=1e-1, ftol=1e-1),
+        func_workchain_name="rosenbrock",
+        xtol=0.63,
+        ftol=1e-1,
+        x_exact=[1.0, 1.0],
+        f_exact=0.0,
+        workchain_inputs={"max_concurrent_evaluations": orm.Int(1)},
+    )
+
+
+def test_nelder_mead_procfuncs(check_optimization):
+    """
+    Test the Nelder-Mead engine with a workfunction which is submitted
+    through the RunProcessFunctionWorkChain wrapper.
+    """
+
+    check_optimization(
+        engine=NelderMead,
+        engine_kwargs=dict(simplex=[[1.2, 0.9], [1.0, 2.0], [2.0, 1.0]], xtol=1e-1, ftol=1e-1),
+        func_workchain_name="rosenbrock",
+        xtol=0.63,
+        ftol=1e-1,
+        x_exact=[1.0, 1.0],
+        f_exact=0.0,
+        workchain_inputs={"submit_process_functions": orm.Bool(True)},
+    )
+
+
+def test_nelder_mead_array_input(check_optimization):
+    """
+    Test the Nelder-Mead engine with the input passed as ArrayData.
+    """
+
+    check_optimization(
+        engine=NelderMead,
+        engine_kwargs=dict(
+            simplex=[[1.2, 0.9, 0.5], [1.0, 2.0, 0.0], [2.0, 1.0, 1.0], [0.1, 0.2, 0.3]],
+            xtol=1e-1,
+            ftol=1e-1,
+            array_input=True,
+        ),
+        func_workchain_name="array_norm",
+        xtol=0.1,
+        ftol=0.1,
+        x_exact=[0.0, 0.0, 0.0],
+        f_exact=0.0,
+        input_getter=lambda inputs: inputs.x.get_array("values"),
+    )
+
+
+def test_nelder_mead_pos_logger():
+    """
+    Test that the logger can still be passed as the eighth positional argument.
+    """
+    logger = logging.getLogger(__name__)
+    engine = NelderMead([[1.0], [2.0]], None, 1e-4, 1e-4, 10, "x", "result", logger)
+    assert vars(engine)["_logger"] is logger
+    assert not vars(engine)["array_input"]
@@ -6,11 +6,18 @@
 Tests for the OptimizationWorkChain.
 """
 
+import logging
+from unittest import mock
+
 from aiida import orm
+from aiida.engine.runners import Runner
 import numpy as np
+from plumpy.process_comms import RemoteProcessThreadController
 import pytest
 
 from aiida_optimize.engines import ParameterSweep
+from aiida_optimize.engines._result_mapping import ResultJournal
+import sample_processes
 
 
 @pytest.fixture
@@ -53,3 +60,210 @@ def test_parameter_sweep_add(
         f_exact=-1.0,
         evaluate={"y": orm.Float(1.0)},
     )
+
+
+def test_parameter_sweep_stream(run_optimization, caplog):
+    """
+    Test the ParameterSweep engine when evaluations are streamed to the
+    engine. The evaluation which was launched first finishes immediately,
+    and is passed to the engine while the others are still running.
+    """
+    num_steps = [0, 4, 4, 4, 4]
+    with caplog.at_level(logging.INFO):
+        result_node = run_optimization(
+            engine=ParameterSweep,
+            engine_kwargs=dict(
+                parameters=[
+                    {"x": float(x), "num_steps": n}
+                    for x, n in zip(np.linspace(-2, 2, 5), num_steps)
+                ],
+                result_key="result",
+            ),
+            func_workchain=sample_processes.EchoDelayed,
+            workchain_inputs={
+                "stream_evaluations": orm.Bool(True),
+                "journal_results": orm.Bool(True),
+            },
+        )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.optimal_process_output.value == -2.0
+
+    messages = [
+        record.getMessage().split("]: ", 1)[-1]
+        for record in caplog.records
+        if f"[{result_node.pk}|" in record.getMessage()
+    ]
+    updates = [message for message in messages if message.startswith("Retrieved")]
+    assert updates[0].startswith("Retrieved 1 evaluation (0)")
+    assert len(updates) > 1
+
+    # The journal contains the results in the order they were passed to the engine.
+    journal = ResultJournal(result_node.uuid, cursor=2 * len(num_steps))
+    entries = journal._get_entries()  # pylint: disable=protected-access
+    retrieved = [key for kind, key, _ in entries if kind == "outputs"]
+    assert retrieved == list(range(len(num_steps)))
+
+
+@pytest.mark.parametrize("stream_evaluations", [True, False])
+@pytest.mark.parametrize("func_workchain_name", ["Echo", "echo_workfunction"])
+def test_sweep_max_concurrent(
+    check_optimization, sweep_parameters, stream_evaluations, func_workchain_name
+):  # pylint: disable=redefined-outer-name
+    """
+    Test the ParameterSweep engine with a limited number of concurrent evaluations.
+    """
+
+    check_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(parameters=sweep_parameters),
+        func_workchain_name=func_workchain_name,
+        xtol=0,
+        ftol=0,
+        x_exact=-2.0,
+        f_exact=-2.0,
+        workchain_inputs={
+            "max_concurrent_evaluations": orm.Int(3),
+            "stream_evaluations": orm.Bool(stream_evaluations),
+        },
+    )
+
+
+@pytest.mark.parametrize("stream_evaluations", [True, False])
+def test_sweep_max_concurrent_bound(run_optimization, stream_evaluations):
+    """
+    Test that no more than 'max_concurrent_evaluations' evaluations run at
+    the same time, while evaluations finish in a different order than they
+    were launched.
+    """
+    sample_processes.RECORDED_CONCURRENCY.clear()
+    num_steps = [2, 0, 1, 3, 0, 2, 1]
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(
+            parameters=[
+                {"x": float(x), "num_steps": n}
+                for x, n in zip(np.linspace(-2, 2, len(num_steps)), num_steps)
+            ],
+            result_key="result",
+        ),
+        func_workchain=sample_processes.EchoConcurrency,
+        workchain_inputs={
+            "max_concurrent_evaluations": orm.Int(3),
+            "stream_evaluations": orm.Bool(stream_evaluations),
+        },
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.optimal_process_output.value == -2.0
+    assert len(sample_processes.RECORDED_CONCURRENCY) == len(num_steps)
+    assert max(sample_processes.RECORDED_CONCURRENCY) <= 3
+    sample_processes.RECORDED_CONCURRENCY.clear()
+
+
+@pytest.mark.parametrize("max_concurrent", [None, 2])
+def test_parameter_sweep_stop_below(run_optimization, max_concurrent):
+    """
+    Test that the remaining evaluations are cancelled once the ParameterSweep
+    has found a result below the 'stop_below' value.
+    """
+    workchain_inputs = {"stream_evaluations": orm.Bool(True)}
+    if max_concurrent is not None:
+        workchain_inputs["max_concurrent_evaluations"] = orm.Int(max_concurrent)
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(
+            parameters=[
+                {"x": -2.0, "num_steps": 0},
+                {"x": -3.0, "num_steps": 10},
+                {"x": -4.0, "num_steps": 10},
+                {"x": -5.0, "num_steps": 10},
+            ],
+            result_key="result",
+            stop_below=-1.0,
+        ),
+        func_workchain=sample_processes.EchoDelayed,
+        workchain_inputs=workchain_inputs,
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.optimal_process_output.value == -2.0
+    # Without a broker, the runner cannot kill the processes. They are
+    # recorded as abandoned, and the workchain does not wait for them.
+    assert "cancelled_evaluations" not in result_node.outputs
+    abandoned = [orm.load_node(uuid) for uuid in result_node.outputs.abandoned_evaluations]
+    assert len(abandoned) == (3 if max_concurrent is None else 1)
+    assert not any(node.is_finished_ok for node in abandoned)
+
+
+def test_sweep_kill_obsolete(run_optimization, monkeypatch):
+    """
+    Test that the remaining evaluations are killed through the controller
+    of the runner once the ParameterSweep has found a result below the
+    'stop_below' value.
+    """
+    controller = mock.create_autospec(RemoteProcessThreadController, instance=True)
+    monkeypatch.setattr(Runner, "controller", property(lambda self: controller))
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(
+            parameters=[
+                {"x": -2.0, "num_steps": 0},
+                {"x": -3.0, "num_steps": 10},
+                {"x": -4.0, "num_steps": 10},
+                {"x": -5.0, "num_steps": 10},
+            ],
+            result_key="result",
+            stop_below=-1.0,
+        ),
+        func_workchain=sample_processes.EchoDelayed,
+        workchain_inputs={"stream_evaluations": orm.Bool(True)},
+    )
+    assert result_node.is_finished_ok
+    assert result_node.outputs.optimal_process_output.value == -2.0
+    assert "abandoned_evaluations" not in result_node.outputs
+    cancelled = [orm.load_node(uuid) for uuid in result_node.outputs.cancelled_evaluations]
+    assert len(cancelled) == 3
+    killed_pks = [call.args[0] for call in controller.kill_process.call_args_list]
+    assert sorted(killed_pks) == sorted(node.pk for node in cancelled)
+
+
+def test_sweep_stream_subscriptions(run_optimization, monkeypatch):
+    """
+    Test that the workchain subscribes to the termination of each streamed
+    evaluation only once, because each evaluation is awaited at most once.
+    """
+    subscribed_pks = []
+    call_on_process_finish = Runner.call_on_process_finish
+
+    def spy(self, pk, callback):
+        subscribed_pks.append(pk)
+        return call_on_process_finish(self, pk, callback)
+
+    monkeypatch.setattr(Runner, "call_on_process_finish", spy)
+
+    num_steps = [3, 0, 4, 1, 2]
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(
+            parameters=[
+                {"x": float(x), "num_steps": n} for x, n in zip(np.linspace(-2, 2, 5), num_steps)
+            ],
+            result_key="result",
+        ),
+        func_workchain=sample_processes.EchoDelayed,
+        workchain_inputs={"stream_evaluations": orm.Bool(True)},
+    )
+    assert result_node.is_finished_ok
+    evaluation_pks = [node.pk for node in result_node.called]
+    assert len(evaluation_pks) == len(num_steps)
+    assert any(pk in subscribed_pks for pk in evaluation_pks)
+    for pk in evaluation_pks:
+        assert subscribed_pks.count(pk) <= 1
+
+
+def test_sweep_positional_logger():
+    """
+    Test that the logger can still be passed as the third positional argument.
+    """
+    logger = logging.getLogger(__name__)
+    engine = ParameterSweep([{"x": 1.0}], "result", logger)
+    assert vars(engine)["_logger"] is logger
+    assert vars(engine)["_stop_below"] is None
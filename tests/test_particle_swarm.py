@@ -6,6 +6,9 @@
 Tests for the OptimizationWorkChain.
 """
 
+import logging
+
+import numpy as np
 import pytest
 
 from aiida_optimize.engines import ParticleSwarm
@@ -40,3 +43,57 @@ def test_particle_swarm(
             "engine_outputs__last_particles",
         ],
     )
+
+
+def test_particle_swarm_array_input(check_optimization):
+    """
+    Test the Particle-Swarm engine with the input passed as ArrayData.
+    """
+
+    check_optimization(
+        engine=ParticleSwarm,
+        engine_kwargs=dict(
+            particles=[[1.2, 0.9], [1.0, 2.0], [2.0, 1.0], [0.1, 0.1]],
+            max_iter=25,
+            array_input=True,
+            seed=2,
+        ),
+        func_workchain_name="array_norm",
+        xtol=[0.1, 0.1],
+        ftol=0.1,
+        x_exact=[0.0, 0.0],
+        f_exact=0.0,
+        input_getter=lambda inputs: inputs.x.get_array("values"),
+    )
+
+
+def test_swarm_local_random_state(check_optimization):
+    """
+    Test that a seeded Particle-Swarm optimization does not modify the
+    global NumPy random state.
+    """
+    np.random.seed(0)
+    expected = np.random.uniform(size=3)
+    np.random.seed(0)
+    check_optimization(
+        engine=ParticleSwarm,
+        engine_kwargs=dict(
+            particles=[[1.2, 0.9], [1.0, 2.0], [2.0, 1.0], [0.1, 0.1]], max_iter=25, seed=2
+        ),
+        func_workchain_name="X2Y2",
+        xtol=[0.1, 0.1],
+        ftol=0.01,
+        x_exact=[0.0, 0.0],
+        f_exact=0.0,
+    )
+    assert np.allclose(np.random.uniform(size=3), expected)
+
+
+def test_particle_swarm_pos_logger():
+    """
+    Test that the logger can still be passed as the fifth positional argument.
+    """
+    logger = logging.getLogger(__name__)
+    engine = ParticleSwarm([[1.0], [2.0]], 5, "x", "result", logger)
+    assert vars(engine)["_logger"] is logger
+    assert vars(engine)["seed"] is None
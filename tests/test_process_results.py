@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for retrieving the states and outputs of several processes at once.
+"""
+
+from aiida import orm
+from aiida.engine import run_get_node
+import pytest
+
+from aiida_optimize._utils import _get_outputs_dict, _get_process_results
+import sample_processes
+
+
+@pytest.mark.usefixtures("aiida_profile_clean")
+def test_get_process_results():
+    """
+    Check that the bulk query gives the same results as querying each
+    process, including processes without outputs.
+    """
+    nodes = [
+        run_get_node(sample_processes.FailNegative, x=orm.Float(x))[1] for x in [1.0, -1.0, 2.0]
+    ]
+    res = _get_process_results(nodes)
+    assert set(res) == {node.pk for node in nodes}
+    for node in nodes:
+        finished_ok, exit_status, outputs = res[node.pk]
+        assert finished_ok == node.is_finished_ok
+        assert exit_status == node.exit_status
+        assert {key: val.pk for key, val in outputs.items()} == {
+            key: val.pk for key, val in _get_outputs_dict(node).items()
+        }
+    assert not _get_process_results([])
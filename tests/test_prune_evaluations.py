@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for pruning retrieved evaluations from the OptimizationWorkChain context.
+"""
+
+from aiida import orm
+from aiida.engine.launch import run_get_node
+from aiida.orm.utils.serialize import deserialize_unsafe
+import pytest
+
+from aiida_optimize import OptimizationWorkChain
+from aiida_optimize.engines import Bisection, NelderMead
+import sample_processes
+
+
+@pytest.fixture
+def final_evaluations(monkeypatch):
+    """
+    Records the evaluation entries of the context, and of the last
+    checkpoint, when the OptimizationWorkChain is finalized. The outline
+    steps are bound when the spec is created, so this hooks into a
+    method called at the end of 'finalize'.
+    """
+    recorded = {}
+    output_engine_profile = (
+        OptimizationWorkChain._output_engine_profile  # pylint: disable=protected-access
+    )
+
+    def spy(self):
+        checkpoint_ctx = deserialize_unsafe(self.node.checkpoint)["CONTEXT"]
+        for name, ctx in [("ctx", self.ctx), ("checkpoint", checkpoint_ctx)]:
+            recorded[name] = {key: val for key, val in ctx.items() if key.startswith("eval_")}
+        return output_engine_profile(self)
+
+    monkeypatch.setattr(OptimizationWorkChain, "_output_engine_profile", spy)
+    return recorded
+
+
+def test_bisect_prune(check_optimization):
+    """
+    Run a bisection where the evaluations are pruned from the context.
+    """
+    tol = 1e-1
+    check_optimization(
+        engine=Bisection,
+        engine_kwargs=dict(lower=-1.1, upper=1.0, tol=tol),
+        func_workchain_name="Echo",
+        xtol=tol,
+        ftol=tol,
+        x_exact=0.0,
+        f_exact=0.0,
+        workchain_inputs={"prune_evaluations": orm.Bool(True)},
+    )
+
+
+def test_nelder_mead_prune(check_optimization):
+    """
+    Run a Nelder-Mead optimization where the evaluations are pruned from the context.
+    """
+    check_optimization(
+        engine=NelderMead,
+        engine_kwargs=dict(simplex=[[1.2, 0.9], [1.0, 2.0], [2.0, 1.0]], xtol=1e-1, ftol=1e-1),
+        func_workchain_name="rosenbrock",
+        xtol=0.63,
+        ftol=1e-1,
+        x_exact=[1.0, 1.0],
+        f_exact=0.0,
+        workchain_inputs={"prune_evaluations": orm.Bool(True)},
+    )
+
+
+@pytest.mark.usefixtures("aiida_profile_clean")
+@pytest.mark.parametrize("prune", [True, False])
+@pytest.mark.parametrize(
+    "evaluate_process", [sample_processes.Echo, sample_processes.echo_workfunction]
+)
+def test_pruned_context(
+    final_evaluations, prune, evaluate_process
+):  # pylint: disable=redefined-outer-name
+    """
+    Check that the context and the checkpoint contain only the UUIDs of
+    the retrieved evaluations if they are pruned, and their nodes otherwise.
+    """
+    _, result_node = run_get_node(
+        OptimizationWorkChain,
+        engine=Bisection,
+        engine_kwargs=orm.Dict(dict=dict(lower=-1.1, upper=1.0, tol=1e-1, result_key="result")),
+        evaluate_process=evaluate_process,
+        prune_evaluations=orm.Bool(prune),
+    )
+    assert result_node.is_finished_ok
+    evaluation_uuids = {node.uuid for node in result_node.called}
+    for name in ["ctx", "checkpoint"]:
+        evaluations = final_evaluations[name]
+        assert len(evaluations) == len(evaluation_uuids)
+        if prune:
+            assert set(evaluations.values()) == evaluation_uuids
+        else:
+            assert all(isinstance(val, orm.ProcessNode) for val in evaluations.values())
+            assert {val.uuid for val in evaluations.values()} == evaluation_uuids
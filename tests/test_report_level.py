@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the 'report_level' input of the OptimizationWorkChain.
+"""
+
+import logging
+
+from aiida import orm
+import pytest
+
+from aiida_optimize._optimization_workchain import _format_indices
+from aiida_optimize.engines import NelderMead
+import sample_processes
+
+
+@pytest.mark.parametrize(
+    ["report_level", "expected", "unexpected"],
+    (
+        ["silent", [], ["Creating optimizer instance.", "Launched 3 evaluations (0-2)."]],
+        [
+            "summary",
+            ["Creating optimizer instance.", "Launched 3 evaluations (0-2)."],
+            ["Launching evaluation 0", "Submitting initialization step."],
+        ],
+        [
+            "debug",
+            [
+                "Launched 3 evaluations (0-2).",
+                "Launching evaluation 0",
+                "Submitting initialization step.",
+            ],
+            [],
+        ],
+    ),
+)
+def test_report_level(
+    run_optimization, caplog, report_level, expected, unexpected
+):  # pylint: disable=too-many-arguments
+    """
+    Check which reports are created for the different report levels.
+    """
+    with caplog.at_level(logging.INFO):
+        result_node = run_optimization(
+            engine=NelderMead,
+            engine_kwargs=dict(
+                simplex=[[1.2, 0.9], [1.0, 2.0], [2.0, 1.0]], xtol=1e-1, ftol=1e-1, max_iter=3
+            ),
+            func_workchain=sample_processes.rosenbrock,
+            workchain_inputs={"report_level": orm.Str(report_level)},
+        )
+    messages = [
+        record.getMessage().split("]: ", 1)[-1]
+        for record in caplog.records
+        if f"[{result_node.pk}|" in record.getMessage()
+    ]
+    for message in expected:
+        assert message in messages
+    for message in unexpected:
+        assert message not in messages
+    if report_level == "silent":
+        assert not messages
+
+
+def test_format_indices():
+    """
+    Check that evaluation indices are formatted as ranges.
+    """
+    assert _format_indices([3, 0, 1, 2, 7, 9, 10]) == "0-3, 7, 9-10"
+    assert _format_indices([]) == ""
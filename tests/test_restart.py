@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for restarting an optimization from the evaluations of a previous one.
+"""
+
+from aiida import orm
+import pytest
+
+from aiida_optimize.engines import Bisection, NelderMead, ParticleSwarm
+import sample_processes
+
+
+@pytest.mark.parametrize(
+    ["engine", "engine_kwargs", "func_workchain"],
+    (
+        [
+            NelderMead,
+            dict(simplex=[[1.2, 0.9], [1.0, 2.0], [2.0, 1.0]], xtol=1e-1, ftol=1e-1),
+            sample_processes.rosenbrock,
+        ],
+        [
+            ParticleSwarm,
+            dict(particles=[[1.2, 0.9], [1.0, 2.0], [2.0, 1.0], [0.1, 0.1]], seed=42),
+            sample_processes.X2Y2,
+        ],
+    ),
+)
+def test_restart(run_optimization, engine, engine_kwargs, func_workchain):
+    """
+    Check that a restarted optimization re-uses the evaluations of the
+    optimizations it was restarted from, and arrives at the same result as
+    an optimization that was not interrupted.
+    """
+    reference = run_optimization(
+        engine=engine, engine_kwargs=dict(engine_kwargs, max_iter=8), func_workchain=func_workchain
+    )
+    num_evaluations = len(reference.called)
+
+    first = run_optimization(
+        engine=engine, engine_kwargs=dict(engine_kwargs, max_iter=3), func_workchain=func_workchain
+    )
+    second = run_optimization(
+        engine=engine,
+        engine_kwargs=dict(engine_kwargs, max_iter=5),
+        func_workchain=func_workchain,
+        workchain_inputs={"restart_from": orm.Str(first.uuid)},
+    )
+    assert second.outputs.engine_outputs.num_restored_evaluations.value == len(first.called)
+    third = run_optimization(
+        engine=engine,
+        engine_kwargs=dict(engine_kwargs, max_iter=8),
+        func_workchain=func_workchain,
+        workchain_inputs={"restart_from": orm.Str(second.uuid)},
+    )
+    assert len(first.called) + len(second.called) + len(third.called) == num_evaluations
+    assert third.exit_status == reference.exit_status
+    if reference.is_finished_ok:
+        assert (
+            third.outputs.optimal_process_output.value
+            == reference.outputs.optimal_process_output.value
+        )
+
+
+def test_restart_invalid(run_optimization):
+    """
+    Check that 'restart_from' must point to an OptimizationWorkChain.
+    """
+    with pytest.raises(ValueError):
+        run_optimization(
+            engine=NelderMead,
+            engine_kwargs=dict(simplex=[[0.0], [1.0]]),
+            func_workchain=sample_processes.Norm,
+            workchain_inputs={"restart_from": orm.Str(orm.Int(1).store().uuid)},
+        )
+
+
+@pytest.mark.parametrize(
+    ["func_workchain", "submit_process_functions"],
+    (
+        [sample_processes.EchoScaled, False],
+        [sample_processes.echo_calcfunction, True],
+    ),
+)
+def test_restart_evaluations_only(run_optimization, func_workchain, submit_process_functions):
+    """
+    Check that the evaluations are restored for processes with defaulted
+    inputs and for process functions which are submitted wrapped in a
+    workchain, and that only the evaluations are tagged with their hash.
+    """
+    engine_kwargs = dict(lower=-1.1, upper=1.0, tol=1e-1)
+    workchain_inputs = {"submit_process_functions": orm.Bool(submit_process_functions)}
+    first = run_optimization(
+        engine=Bisection,
+        engine_kwargs=dict(engine_kwargs, max_evaluations=3),
+        func_workchain=func_workchain,
+        workchain_inputs=workchain_inputs,
+    )
+    second = run_optimization(
+        engine=Bisection,
+        engine_kwargs=engine_kwargs,
+        func_workchain=func_workchain,
+        workchain_inputs=dict(workchain_inputs, restart_from=orm.Str(first.uuid)),
+    )
+    assert second.is_finished_ok
+    assert second.outputs.engine_outputs.num_restored_evaluations.value == 3
+    hashed = [
+        node for node in first.called if "optimize_evaluation_hash" in node.base.extras.keys()
+    ]
+    assert len(hashed) == 3
+
+
+def test_restart_no_match(run_optimization, caplog):
+    """
+    Check that a warning is emitted if none of the evaluations of the
+    restarted optimization can be re-used.
+    """
+    engine_kwargs = dict(lower=-1.1, upper=1.0, tol=1e-1)
+    first = run_optimization(
+        engine=Bisection,
+        engine_kwargs=dict(engine_kwargs, max_evaluations=3),
+        func_workchain=sample_processes.Echo,
+    )
+    second = run_optimization(
+        engine=Bisection,
+        engine_kwargs=engine_kwargs,
+        func_workchain=sample_processes.EchoScaled,
+        evaluate={"scale": orm.Float(2.0)},
+        workchain_inputs={"restart_from": orm.Str(first.uuid)},
+    )
+    assert second.outputs.engine_outputs.num_restored_evaluations.value == 0
+    assert any("were re-used" in record.getMessage() for record in caplog.records)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the ResultJournal, which stores the results outside of the engine state.
+"""
+
+import math
+
+from aiida import orm
+import pytest
+
+from aiida_optimize.engines import Bisection
+from aiida_optimize.engines._result_mapping import ResultJournal, ResultMapping
+
+
+@pytest.mark.usefixtures("aiida_profile_clean")
+def test_journal_replay():
+    """
+    Check that a ResultMapping re-created from the journal state contains the same results.
+    """
+    journal_node = orm.Int(0).store()
+    mapping = ResultMapping()
+    mapping.attach_journal(ResultJournal(journal_node.uuid))
+    keys = mapping.add_inputs([{"x": orm.Float(1.0)}, {"a.b:c": orm.Float(2.0)}])
+    mapping.add_outputs({0: {"result": orm.Float(3.0).store()}})
+
+    state = mapping.state
+    assert state == {"journal_uuid": journal_node.uuid, "cursor": 3}
+
+    new_mapping = ResultMapping.from_state(state)
+    assert len(new_mapping) == len(keys) == 2
+    assert new_mapping[0].input["x"].uuid == mapping[0].input["x"].uuid
+    assert new_mapping[1].input["a.b:c"].value == 2.0
+    assert new_mapping[0].output["result"].value == 3.0
+    assert new_mapping[1].output is None
+
+
+@pytest.mark.usefixtures("aiida_profile_clean")
+def test_journal_ignores_stale():
+    """
+    Check that journal entries beyond the cursor of a state are not replayed.
+    """
+    journal_node = orm.Int(0).store()
+    mapping = ResultMapping()
+    mapping.attach_journal(ResultJournal(journal_node.uuid))
+    mapping.add_inputs([{"x": orm.Float(1.0)}])
+    state = mapping.state
+    mapping.add_outputs({0: {"result": orm.Float(3.0).store()}})
+
+    assert ResultMapping.from_state(state)[0].output is None
+
+
+@pytest.mark.parametrize("journal_results", [True, False])
+def test_bisect_journal(check_optimization, journal_results):
+    """
+    Run a bisection with and without the result journal.
+    """
+    tol = 1e-1
+    check_optimization(
+        engine=Bisection,
+        engine_kwargs=dict(lower=-1.1, upper=1.0, tol=tol),
+        func_workchain_name="Echo",
+        xtol=tol,
+        ftol=tol,
+        x_exact=0.0,
+        f_exact=0.0,
+        workchain_inputs={"journal_results": orm.Bool(journal_results)},
+    )
+
+
+@pytest.mark.usefixtures("aiida_profile_clean")
+def test_journal_overwrites_stale():
+    """
+    Check that entries appended from an earlier state replace the entries
+    which were written beyond the cursor of that state.
+    """
+    journal_node = orm.Int(0).store()
+    mapping = ResultMapping()
+    mapping.attach_journal(ResultJournal(journal_node.uuid))
+    mapping.add_inputs([{"x": orm.Float(1.0)}])
+    state = mapping.state
+    mapping.add_outputs({0: {"result": orm.Float(3.0).store()}})
+
+    restored = ResultMapping.from_state(state)
+    restored.add_outputs({0: {"result": orm.Float(4.0).store()}})
+    assert ResultMapping.from_state(restored.state)[0].output["result"].value == 4.0
+
+
+@pytest.mark.usefixtures("aiida_profile_clean")
+def test_journal_keeps_node():
+    """
+    Check that appending to the journal does not write to the extras of
+    the associated node.
+    """
+    journal_node = orm.Int(0).store()
+    extras = journal_node.base.extras.all
+    mapping = ResultMapping()
+    mapping.attach_journal(ResultJournal(journal_node.uuid))
+    for value in range(3):
+        mapping.add_inputs([{"x": orm.Float(value)}])
+    assert orm.load_node(journal_node.pk).base.extras.all == extras
+    assert len(ResultMapping.from_state(mapping.state)) == 3
+
+
+@pytest.mark.usefixtures("aiida_profile_clean")
+def test_journal_merges_chunks():
+    """
+    Check that the number of journal chunks grows only logarithmically
+    with the number of appends, and that the merged chunks are replayed
+    correctly.
+    """
+    journal_node = orm.Int(0).store()
+    mapping = ResultMapping()
+    journal = ResultJournal(journal_node.uuid)
+    mapping.attach_journal(journal)
+    num_appends = 50
+    for value in range(num_appends):
+        mapping.add_inputs([{"x": orm.Float(value)}])
+
+    group = orm.load_group(journal.group_label)
+    assert len(group.nodes) <= math.log2(num_appends) + 1
+    assert orm.QueryBuilder().append(orm.Dict).count() == len(group.nodes)
+
+    restored = ResultMapping.from_state(mapping.state)
+    assert [restored[key].input["x"].value for key in range(num_appends)] == list(
+        range(num_appends)
+    )
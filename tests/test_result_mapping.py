@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the ResultMapping.
+"""
+
+from aiida import orm
+import pytest
+
+from aiida_optimize.engines._result_mapping import ResultMapping
+
+
+@pytest.mark.usefixtures("aiida_profile_clean")
+def test_duplicate_inputs():
+    """
+    Check that inputs close to those of finished evaluations are marked as duplicates.
+    """
+    mapping = ResultMapping()
+    mapping.add_inputs([{"x": orm.List(list=[1.0, 2.0])}, {"x": orm.List(list=[5.0, 2.0])}])
+    mapping.add_outputs({0: {"result": orm.Float(3.0).store()}})
+
+    keys = mapping.add_inputs(
+        [
+            {"x": orm.List(list=[1.0 + 1e-10, 2.0])},
+            {"x": orm.List(list=[1.1, 2.0])},
+            {"x": orm.List(list=[5.0, 2.0])},
+            {"x": orm.List(list=[1.0, 2.0, 3.0])},
+            {"y": orm.List(list=[1.0, 2.0])},
+        ],
+        duplicate_tolerance=1e-9,
+    )
+    assert [mapping[key].duplicate_of for key in keys] == [0, None, None, None, None]
+
+
+@pytest.mark.usefixtures("aiida_profile_clean")
+def test_add_inputs_stores_nodes():
+    """
+    Check that all input nodes are stored, also when some of them already are.
+    """
+    mapping = ResultMapping()
+    stored = orm.Float(1.0).store()
+    inputs = mapping.add_inputs([{"x": stored, "y": orm.Float(2.0)}, {"x": orm.Float(3.0)}])
+    assert list(inputs) == [0, 1]
+    assert all(value.is_stored for value in inputs[0].values())
+    assert inputs[1]["x"].is_stored
+    assert inputs[0]["x"].pk == stored.pk
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for inspecting the progress of an optimization.
+"""
+
+from aiida import orm
+from click.testing import CliRunner
+import pytest
+
+from aiida_optimize._status import get_status
+from aiida_optimize.cli import format_status, status
+from aiida_optimize.engines import Bisection, ParameterSweep
+import sample_processes
+
+
+@pytest.fixture
+def recorded_status():
+    sample_processes.RECORDED_STATUS.clear()
+    yield sample_processes.RECORDED_STATUS
+    sample_processes.RECORDED_STATUS.clear()
+
+
+def test_status_running(run_optimization, recorded_status):  # pylint: disable=redefined-outer-name
+    """
+    Check the status read from the checkpoint of a running optimization.
+    """
+    result_node = run_optimization(
+        engine=Bisection,
+        engine_kwargs=dict(lower=-1.1, upper=1.0, tol=1e-1, result_key="result"),
+        func_workchain=sample_processes.EchoStatus,
+        workchain_inputs={"index_evaluations": orm.Bool(True)},
+    )
+    assert result_node.is_finished_ok
+    first, *_, last = recorded_status
+    assert first["process_state"] == "waiting"
+    assert first["iteration"] == 1
+    assert first["evaluations_finished"] == 0
+    assert first["evaluations_running"] == 2
+    assert first["evaluations_queued"] == 0
+    assert "lowest_result" not in first
+    assert first["engine_state"]["interval"] == pytest.approx(2.1)
+    assert last["iteration"] == len(recorded_status) - 1
+    assert last["evaluations_finished"] == len(recorded_status) - 1
+    assert last["engine_state"]["interval"] < 1e-1 * 2
+    assert last["lowest_result"] == -1.1
+    assert "engine state:" in format_status(last)
+
+
+def test_status_finished(run_optimization):
+    """
+    Check the status of a finished optimization, and the command line interface.
+    """
+    result_node = run_optimization(
+        engine=Bisection,
+        engine_kwargs=dict(lower=-1.1, upper=1.0, tol=1e-1, result_key="result"),
+        func_workchain=sample_processes.Echo,
+        workchain_inputs={"index_evaluations": orm.Bool(True)},
+    )
+    res = get_status(result_node)
+    assert res["process_state"] == "finished"
+    assert res["exit_status"] == 0
+    assert res["lowest_result"] == -1.1
+    assert res["lowest_result_index"] == 0
+
+    cli_result = CliRunner().invoke(status, [str(result_node.pk)], obj={"profile": None})
+    assert cli_result.exit_code == 0, cli_result.output
+    assert f"OptimizationWorkChain<{result_node.pk}> finished [0]" in cli_result.output
+
+
+def test_status_batch(run_optimization):
+    """
+    Check the lowest result of an optimization with batch evaluations.
+    """
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(
+            parameters=[{"x": x} for x in [3.0, 1.0, 4.0, -2.0, 0.0]], result_key="result"
+        ),
+        func_workchain=sample_processes.batch_echo,
+        workchain_inputs={"evaluation_batch_size": orm.Int(2), "index_evaluations": orm.Bool(True)},
+    )
+    res = get_status(result_node)
+    assert res["lowest_result"] == -2.0
+    assert res["lowest_result_index"] == 3
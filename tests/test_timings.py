@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the timing instrumentation of the OptimizationWorkChain.
+"""
+
+from aiida import orm
+import numpy as np
+import pytest
+
+from aiida_optimize._timings import _NUM_HISTOGRAM_BINS, _add_timing, _summarize_timings
+from aiida_optimize.engines import Bisection
+import sample_processes
+
+
+@pytest.mark.parametrize(
+    "func_workchain", [sample_processes.Echo, sample_processes.echo_workfunction]
+)
+def test_record_timings(run_optimization, func_workchain):
+    """
+    Check that the timings of the optimization phases are returned.
+    """
+    result_node = run_optimization(
+        engine=Bisection,
+        engine_kwargs=dict(lower=-1.1, upper=1.0, tol=1e-1, result_key="result"),
+        func_workchain=func_workchain,
+        workchain_inputs={"record_timings": orm.Bool(True)},
+    )
+    assert result_node.is_finished_ok
+    timings = result_node.outputs.engine_outputs.timings.get_dict()
+    num_evaluations = len(result_node.called)
+    assert timings["submission"]["count"] == num_evaluations
+    assert 0 < timings["output_retrieval"]["count"] <= num_evaluations
+    for phase in ["create_inputs", "input_storage", "update", "state_serialization"]:
+        assert timings[phase]["count"] > 0
+        assert 0 <= timings[phase]["mean"] <= timings[phase]["max"] <= timings[phase]["total"]
+    if func_workchain is sample_processes.Echo:
+        assert timings["waiting"]["count"] > 0
+
+
+def test_no_timings(run_optimization):
+    """
+    Check that no timings are returned by default.
+    """
+    result_node = run_optimization(
+        engine=Bisection,
+        engine_kwargs=dict(lower=-1.1, upper=1.0, tol=1e-1, result_key="result"),
+        func_workchain=sample_processes.Echo,
+    )
+    assert "timings" not in result_node.outputs.engine_outputs
+
+
+def test_summarize_timings():
+    """
+    Check the statistics computed from the recorded durations.
+    """
+    timings = {}
+    for duration in [1.0, 3.0, 2.0]:
+        _add_timing(timings, "update", duration)
+    assert timings["update"]["count"] == 3
+    assert timings["update"]["total"] == 6.0
+    assert timings["update"]["max"] == 3.0
+    assert len(timings["update"]["histogram"]) == _NUM_HISTOGRAM_BINS
+    summary = _summarize_timings(timings)
+    assert list(summary) == ["update"]
+    assert summary["update"]["count"] == 3
+    assert summary["update"]["total"] == 6.0
+    assert summary["update"]["mean"] == 2.0
+    assert summary["update"]["max"] == 3.0
+    assert summary["update"]["p50"] == pytest.approx(2.0, rel=0.26)
+    assert summary["update"]["p90"] == summary["update"]["p99"] == 3.0
+
+
+def test_timing_percentiles():
+    """
+    Check that the percentiles are estimated to within the bin width, and
+    that the size of the timings does not grow with the number of durations.
+    """
+    timings = {}
+    durations = np.logspace(-7, 5, 1000)
+    for duration in durations:
+        _add_timing(timings, "update", duration)
+    assert len(timings["update"]["histogram"]) == _NUM_HISTOGRAM_BINS
+    summary = _summarize_timings(timings)["update"]
+    assert summary["count"] == 1000
+    assert summary["max"] == durations[-1]
+    for percentile in [50, 90]:
+        assert summary[f"p{percentile}"] == pytest.approx(
+            np.percentile(durations, percentile), rel=0.3
+        )
+    assert summary["p99"] <= summary["max"]
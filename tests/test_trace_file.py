@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the JSON lines trace file of the OptimizationWorkChain.
+"""
+
+import json
+
+from aiida import orm
+import pytest
+
+from aiida_optimize.engines import Bisection, ParameterSweep
+import sample_processes
+
+
+def _read_trace(path):
+    with open(path, encoding="utf-8") as trace_file:
+        return [json.loads(line) for line in trace_file]
+
+
+def test_trace_file(run_optimization, tmp_path):
+    """
+    Check that one line per finished evaluation and per engine update is
+    written to the trace file.
+    """
+    trace_path = tmp_path / "trace.jsonl"
+    result_node = run_optimization(
+        engine=Bisection,
+        engine_kwargs=dict(lower=-1.1, upper=1.0, tol=1e-1, result_key="result"),
+        func_workchain=sample_processes.Echo,
+        workchain_inputs={"trace_file": orm.Str(str(trace_path))},
+    )
+    assert result_node.is_finished_ok
+    records = _read_trace(trace_path)
+    evaluations = [rec for rec in records if rec["event"] == "evaluation"]
+    iterations = [rec for rec in records if rec["event"] == "iteration"]
+    assert sorted(rec["index"] for rec in evaluations) == list(range(len(result_node.called)))
+    for rec in evaluations:
+        assert rec["inputs"]["x"] == rec["outputs"]["result"]
+        assert rec["exit_status"] == 0
+        assert rec["started"] <= rec["finished"]
+    assert [rec["iteration"] for rec in iterations] == list(range(1, len(iterations) + 1))
+    assert iterations[-1]["stop_reason"] == "finished"
+    assert iterations[-1]["best_output"] == result_node.outputs.optimal_process_output.value
+    assert set(iterations[-1]["engine_state"]) >= {"lower", "upper", "tol"}
+
+
+def test_trace_file_stream(run_optimization, tmp_path):
+    """
+    Check the trace of a parameter sweep whose evaluations are streamed.
+    """
+    trace_path = tmp_path / "trace.jsonl"
+    result_node = run_optimization(
+        engine=ParameterSweep,
+        engine_kwargs=dict(parameters=[{"x": float(x)} for x in [3, 1, 2]], result_key="result"),
+        func_workchain=sample_processes.Echo,
+        workchain_inputs={
+            "trace_file": orm.Str(str(trace_path)),
+            "stream_evaluations": orm.Bool(True),
+        },
+    )
+    assert result_node.is_finished_ok
+    records = _read_trace(trace_path)
+    evaluations = [rec for rec in records if rec["event"] == "evaluation"]
+    assert sorted(rec["outputs"]["result"] for rec in evaluations) == [1.0, 2.0, 3.0]
+    assert records[-1]["event"] == "iteration"
+    assert records[-1]["best_index"] == 1
+
+
+def test_trace_file_relative(run_optimization):
+    """
+    Check that a relative path is rejected.
+    """
+    with pytest.raises(ValueError, match="absolute path"):
+        run_optimization(
+            engine=Bisection,
+            engine_kwargs=dict(lower=-1.1, upper=1.0, tol=1e-1, result_key="result"),
+            func_workchain=sample_processes.Echo,
+            workchain_inputs={"trace_file": orm.Str("trace.jsonl")},
+        )
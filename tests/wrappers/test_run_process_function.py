@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+# © 2017-2019, ETH Zurich, Institut für Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the RunProcessFunctionWorkChain.
+"""
+from aiida import orm
+from aiida.engine import run_get_node
+import pytest
+
+from aiida_optimize.wrappers import AddInputsWorkChain, RunProcessFunctionWorkChain
+from sample_processes import (  # pylint: disable=import-error,useless-suppression
+    echo_calcfunction,
+    echo_workfunction,
+)
+
+
+@pytest.mark.usefixtures("aiida_profile_clean")
+@pytest.mark.parametrize("process_function", [echo_calcfunction, echo_workfunction])
+def test_basic(process_function):
+    """
+    Run a process function through the wrapper workchain.
+    """
+    res, node = run_get_node(
+        RunProcessFunctionWorkChain,
+        process_function=process_function,
+        function_inputs={"x": orm.Float(1.0)},
+    )
+    assert node.is_finished_ok
+    assert res["result"].value == 1
+    assert len(node.called) == 1
+
+
+@pytest.mark.usefixtures("aiida_profile_clean")
+def test_submit_from_wrapper():
+    """
+    Submit the process function from another wrapper workchain.
+    """
+    res, node = run_get_node(
+        AddInputsWorkChain,
+        sub_process=echo_calcfunction,
+        added_input_values=orm.Float(1),
+        added_input_keys=orm.Str("x"),
+        submit_process_functions=orm.Bool(True),
+    )
+    assert node.is_finished_ok
+    assert res["result"].value == 1
+    (wrapper,) = node.called
+    assert wrapper.process_class is RunProcessFunctionWorkChain
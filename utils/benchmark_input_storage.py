@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A simple benchmark comparing the storage of evaluation inputs node by
+node with storing them in a single transaction, as done by
+ResultMapping.add_inputs. It runs on the default AiiDA profile.
+"""
+
+import sys
+import time
+
+from aiida import load_profile, orm
+
+from aiida_optimize._utils import _storage_transaction
+
+
+def _create_inputs(num_evaluations, num_dim):
+    return [
+        {f"x_{i}": orm.Float(float(j + i)) for i in range(num_dim)} for j in range(num_evaluations)
+    ]
+
+
+def store_per_node(inputs_list):
+    for inputs in inputs_list:
+        for value in inputs.values():
+            value.store()
+
+
+def store_batched(inputs_list):
+    with _storage_transaction():
+        store_per_node(inputs_list)
+
+
+def benchmark(num_evaluations=500, num_dim=4, repeat=3):
+    """
+    Return the best of 'repeat' runtimes for storing the inputs of
+    'num_evaluations' evaluations node by node, and in one transaction.
+    """
+    res = {}
+    for name, func in [("per_node", store_per_node), ("batched", store_batched)]:
+        runtimes = []
+        for _ in range(repeat):
+            inputs_list = _create_inputs(num_evaluations, num_dim)
+            start = time.perf_counter()
+            func(inputs_list)
+            runtimes.append(time.perf_counter() - start)
+        res[name] = min(runtimes)
+    return res
+
+
+if __name__ == "__main__":
+    load_profile()
+    NUM_EVALUATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    RESULT = benchmark(num_evaluations=NUM_EVALUATIONS)
+    for NAME, RUNTIME in RESULT.items():
+        print(f"{NAME}: {RUNTIME:.3f} s")
+    print(f"speedup: {RESULT['per_node'] / RESULT['batched']:.1f}x")